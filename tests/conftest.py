@@ -0,0 +1,28 @@
+import pytest
+
+from zombie_code_survival import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Everything the app would share with other processes points into tmp_path or is off
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'LEADERBOARD_STAMP': str(tmp_path / 'leaderboard.stamp'),
+        'CHALLENGE_PACK': str(tmp_path / 'challenges.pack'),
+        'CHALLENGE_PACK_RELOAD_INTERVAL': 0,
+        'COMPILE_CACHE_DIR': None,
+        'PCH_ENABLED': False,
+        'ADMISSION_DIR': None,
+        'RATE_LIMIT_DB': None,
+        'RUNNER_SOCKET': '',
+        'RUNNER_AUTOSTART': False,
+        'SUBMISSION_LOG': None,
+        'VARIANTS_ENABLED': False,
+    })
+    yield app
+    from zombie_code_survival.extensions import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,61 @@
+from zombie_code_survival import create_app
+from zombie_code_survival.challenge_pack import write_pack
+from zombie_code_survival.debug_generator import DebugGenerator
+from zombie_code_survival.extensions import challenge_pack, db
+from zombie_code_survival.models import CatalogChallenge
+
+
+def _make_app(tmp_path, **config):
+    return create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'LEADERBOARD_STAMP': str(tmp_path / 'leaderboard.stamp'),
+        'CHALLENGE_PACK': str(tmp_path / 'challenges.pack'),
+        'CHALLENGE_PACK_RELOAD_INTERVAL': 0,
+        'COMPILE_CACHE_DIR': None,
+        'PCH_ENABLED': False,
+        'ADMISSION_DIR': None,
+        'RATE_LIMIT_DB': None,
+        'RUNNER_SOCKET': '',
+        'SUBMISSION_LOG': None,
+        'VARIANTS_ENABLED': False,
+    }, **config))
+
+
+def _dispose(app):
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_corrupt_pack_falls_back_to_the_generator(tmp_path):
+    (tmp_path / 'challenges.pack').write_bytes(b'ZPACK1\n{"version": "1", "sha')
+    app = _make_app(tmp_path)
+    try:
+        assert challenge_pack.version == 'generator'
+        with app.app_context():
+            assert CatalogChallenge.query.count() == len(DebugGenerator().generate_all_challenges())
+    finally:
+        _dispose(app)
+
+
+def test_new_pack_is_only_synced_by_judge_requests(tmp_path):
+    challenges = DebugGenerator().generate_all_challenges()
+    pack_path = tmp_path / 'challenges.pack'
+    write_pack(str(pack_path), challenges, version='v1')
+    app = _make_app(tmp_path, CHALLENGE_PACK_RELOAD_INTERVAL=0.001)
+    try:
+        challenges[1].title = 'Renamed in v2'
+        write_pack(str(pack_path), challenges, version='v2')
+        client = app.test_client()
+
+        client.get('/leaderboard')
+        with app.app_context():
+            assert db.session.get(CatalogChallenge, 1).title != 'Renamed in v2'
+
+        client.post('/challenge/1/submissions', data={'code': ''})
+        with app.app_context():
+            assert db.session.get(CatalogChallenge, 1).title == 'Renamed in v2'
+        assert challenge_pack.version == 'v2'
+    finally:
+        _dispose(app)
@@ -0,0 +1,67 @@
+import pytest
+
+from zombie_code_survival.compare import first_divergence, make_comparator, outputs_match
+
+
+def _feed(comparator, chunks):
+    for chunk in chunks:
+        if not comparator.feed(chunk):
+            return False
+    return comparator.finish()
+
+
+@pytest.mark.parametrize('mode', ['exact', 'whitespace', 'tokens', 'float'])
+def test_chunk_boundaries_do_not_change_the_verdict(mode):
+    expected = 'Survivors: 5\nAmmo: 12\n3.25'
+    output = 'Survivors: 5\nAmmo: 12\n3.25\n'
+    for size in range(1, len(output) + 1):
+        chunks = [output[i:i + size] for i in range(0, len(output), size)]
+        assert _feed(make_comparator(mode, expected), chunks), (mode, size)
+    wrong = output.replace('12', '13')
+    for size in range(1, len(wrong) + 1):
+        chunks = [wrong[i:i + size] for i in range(0, len(wrong), size)]
+        assert not _feed(make_comparator(mode, expected), chunks), (mode, size)
+
+
+def test_trailing_whitespace():
+    assert outputs_match('exact', 'a b', '  a b \n\n')
+    assert not outputs_match('exact', 'a b', 'a  b')
+    assert outputs_match('whitespace', 'a\nb', 'a  \r\nb\t\n\n\n')
+    assert not outputs_match('whitespace', 'a\nb', 'a\n\nb')
+    assert outputs_match('tokens', 'a b', 'a\n\n  b ')
+
+
+def test_feed_stops_at_the_first_divergence():
+    comparator = make_comparator('exact', 'Survivors: 5')
+    assert comparator.feed('Surv')
+    assert not comparator.feed('ivers: 5')
+    assert comparator.pos == 6
+    assert comparator.divergence() == 'line 1, column 7'
+    # Nothing fed after the divergence can bring it back
+    assert not comparator.feed('ors: 5')
+    assert not comparator.finish()
+
+    lines = make_comparator('whitespace', 'a\nb\nc')
+    assert lines.feed('a\nb\n')
+    assert not lines.feed('x')
+    assert lines.divergence() == 'line 3'
+
+    tokens = make_comparator('tokens', '1 2 3')
+    assert not tokens.feed('1 5 ')
+    assert tokens.divergence() == 'token 2'
+
+
+def test_divergence_of_short_and_long_outputs():
+    assert first_divergence('exact', 'ab\ncd', 'ab\nc') == 'line 2, column 2'
+    assert first_divergence('exact', 'ab', 'abc') == 'line 1, column 3'
+    assert first_divergence('whitespace', 'a\nb', 'a') == 'line 2'
+    assert first_divergence('tokens', '1 2', '1 2 3') == 'token 3'
+    assert first_divergence('exact', 'ab', 'ab\n') is None
+
+
+def test_float_tolerance():
+    assert outputs_match('float', '2.5', '2.5000001')
+    assert outputs_match('float', '2.5', '2.50')
+    assert not outputs_match('float', '2.5', '2.6')
+    assert outputs_match('float', '2.5', '2.6', tolerance=0.1)
+    assert not outputs_match('float', 'Alive 2.5', 'Dead 2.5')
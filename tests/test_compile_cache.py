@@ -0,0 +1,75 @@
+import os
+import stat
+
+import pytest
+
+from zombie_code_survival.compile_cache import CompileCache, normalize_source, toolchain_version
+
+
+class _App:
+    def __init__(self, **config):
+        self.config = config
+        self.extensions = {}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompileCache(_App(COMPILE_CACHE_DIR=str(tmp_path / 'cache'), COMPILE_CACHE_MAX_BYTES=1 << 20))
+
+
+def test_normalize_source_unifies_line_endings_and_trailing_whitespace():
+    lf = 'int main() {\n  return 0;\n}\n'
+    assert normalize_source('int main() {\r\n  return 0;\r\n}\r\n\r\n  ') == lf
+    assert normalize_source('int main() {\r  return 0;\r}') == lf
+    assert normalize_source(lf) == lf
+    assert normalize_source(None) == '\n'
+
+
+def test_normalize_source_keeps_meaningful_whitespace():
+    assert normalize_source('  int x;\n') != normalize_source('int x;\n')
+    assert normalize_source('a\n\nb\n') != normalize_source('a\nb\n')
+
+
+@pytest.mark.skipif(toolchain_version() is None, reason='g++ is not installed')
+def test_key_is_stable_and_covers_flags_and_source(cache):
+    source = normalize_source('int main() { return 0; }\r\n')
+    key = cache.key(source, ['-std=c++17', '-O2'])
+    assert key == cache.key(normalize_source('int main() { return 0; }\n'), ['-std=c++17', '-O2'])
+    assert key != cache.key(source, ['-std=c++17', '-O0'])
+    assert key != cache.key(source + '\n// changed\n', ['-std=c++17', '-O2'])
+    # Flags are joined with a separator, so they cannot run into each other
+    assert cache.key(source, ['-O', '2']) != cache.key(source, ['-O2'])
+
+
+def test_hits_are_private_copies_of_a_read_only_entry(cache, tmp_path):
+    built = tmp_path / 'built'
+    built.write_bytes(b'binary')
+    cache.store('ab' * 32, {'success': True}, str(built))
+
+    exe = tmp_path / 'submission'
+    assert cache.load('ab' * 32, str(exe))['success']
+    entry = cache._path('ab' * 32, '.bin')
+    assert os.stat(exe).st_nlink == 1
+    assert not os.stat(entry).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+    exe.write_bytes(b'tampered')
+    with open(entry, 'rb') as f:
+        assert f.read() == b'binary'
+
+
+def test_eviction_only_rescans_past_the_cap(cache, tmp_path, monkeypatch):
+    built = tmp_path / 'built'
+    built.write_bytes(b'x' * 1024)
+    cache.store('00' * 32, {'success': True}, str(built))
+    scans = []
+    original = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(1) or original())
+    for i in range(1, 10):
+        cache.store(f'{i:02d}' * 32, {'success': True}, str(built))
+    assert scans == []
+
+    cache.max_bytes = 4096
+    cache.store('ff' * 32, {'success': True}, str(built))
+    assert scans == [1]
+    assert sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(cache.root)
+               for f in files if not f.startswith('.')) <= 4096
@@ -0,0 +1,83 @@
+import shutil
+from contextlib import contextmanager
+
+import pytest
+
+from zombie_code_survival.extensions import admission, metrics, sandbox_runner
+from zombie_code_survival import judge
+from zombie_code_survival.judge import judge_submission, run_test_cases
+
+pytestmark = pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is not installed')
+
+ECHO = '#include <iostream>\nint main() { int x; std::cin >> x; std::cout << x * 2; }\n'
+
+
+def test_a_submission_holds_one_admission_slot_for_the_whole_job(app, monkeypatch):
+    held = []
+    slots = []
+
+    @contextmanager
+    def slot():
+        slots.append(1)
+        held.append(1)
+        try:
+            yield
+        finally:
+            held.pop()
+
+    run = judge._run
+    ran_admitted = []
+    monkeypatch.setattr(admission, 'slot', slot)
+    monkeypatch.setattr(judge, '_run', lambda *args: ran_admitted.append(bool(held)) or run(*args))
+    cases = [(str(i), str(2 * i)) for i in range(6)]
+    with app.app_context():
+        result = run_test_cases(ECHO, cases, custom_stdin='5')
+        tiered = judge_submission(ECHO, cases, tiered=True)
+    assert result['success'] and tiered['success'], (result, tiered)
+    # One slot per submission, held by every case run and the custom run
+    assert len(slots) == 2
+    assert ran_admitted == [True] * 13
+
+
+def test_tiered_judging_gives_run_verdicts_from_the_verify_build(app, monkeypatch):
+    compiles = []
+    monkeypatch.setattr(metrics, 'observe', lambda name, value, **labels: compiles.append(labels.get('profile'))
+                        if name == 'zombie_compile_duration_seconds' else None)
+    with app.app_context():
+        wrong = judge_submission(ECHO, [('2', '5')], tiered=True)
+        broken = judge_submission('int main() { return x; }', [('2', '4')], tiered=True)
+    assert wrong['failed_case']['reason'] == 'mismatch'
+    assert wrong['timings']['profile'] == 'interactive+verify'
+    assert broken['phase'] == 'compile' and not broken['success']
+    assert broken['timings']['profile'] == 'interactive'
+    # Both builds of the judged submission are timed, and the broken one only once
+    assert compiles == ['interactive', 'verify', 'interactive']
+
+
+def test_submissions_are_judged_from_one_verify_build_by_default(app):
+    with app.app_context():
+        result = judge_submission(ECHO, [('2', '4')])
+    assert result['success'], result
+    assert result['timings']['profile'] == 'verify'
+
+
+def test_cases_use_the_levels_compare_mode_and_report_the_divergence(app):
+    prints = '#include <cstdio>\nint main() { std::printf("2.50\\nok\\n"); }\n'
+    with app.app_context():
+        exact = run_test_cases(prints, [('', '2.5\nok')])
+        floats = run_test_cases(prints, [('', '2.5\nok')], compare=('float', None))
+    assert floats['success'], floats
+    failed = exact['failed_case']
+    assert failed['reason'] == 'mismatch'
+    assert failed['divergence'] == 'line 1, column 4'
+
+
+def test_a_flooding_program_fails_with_output_limit(app, monkeypatch):
+    flood = '#include <iostream>\nint main() { for (;;) std::cout << "braaains\\n"; }\n'
+    monkeypatch.setattr(sandbox_runner, 'max_output', 2048)
+    with app.app_context():
+        # No expected output, so nothing stops the run before the cap
+        result = run_test_cases(flood, [('', '')])
+    assert result['failed_case']['reason'] == 'output_limit'
+    assert result['output_limit_exceeded'] and len(result['stdout']) <= 2048
+    assert 'Output limit exceeded: the program printed more than 2048 bytes.' in result['stderr']
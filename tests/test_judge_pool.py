@@ -0,0 +1,54 @@
+import sqlite3
+
+from sqlalchemy.exc import OperationalError
+
+from zombie_code_survival.extensions import db, judge_pool, result_store
+from zombie_code_survival.models import Submission, Survivor
+
+FAILED = {'phase': 'run', 'success': False, 'stdout': '', 'stderr': '', 'cases_total': 1,
+          'failed_case': {'index': 1, 'stdin': '', 'expected': 'x', 'got': 'y', 'reason': 'mismatch'}}
+LOCKED = OperationalError('UPDATE submission', {}, sqlite3.OperationalError('database is locked'))
+
+
+def _queued(app):
+    with app.app_context():
+        survivor = Survivor(username='bob')
+        db.session.add(survivor)
+        db.session.flush()
+        submission = Submission(id='job', survivor_id=survivor.id, level=1, status='queued')
+        db.session.add(submission)
+        db.session.commit()
+    return 'job'
+
+
+def _judged(app, monkeypatch, fill):
+    monkeypatch.setattr('zombie_code_survival.judge.judge_submission', lambda *args, **kwargs: FAILED)
+    monkeypatch.setattr(result_store, 'fill', fill)
+    monkeypatch.setattr('zombie_code_survival.extensions.persistence.backoff', 0)
+    judge_pool._judge(_queued(app), 'int main() {}', '')
+    with app.app_context():
+        return db.session.get(Submission, 'job')
+
+
+def test_a_locked_verdict_write_is_retried(app, monkeypatch):
+    fill = result_store.fill
+    calls = []
+
+    def flaky_fill(*args):
+        calls.append(1)
+        if len(calls) == 1:
+            raise LOCKED
+        fill(*args)
+
+    submission = _judged(app, monkeypatch, flaky_fill)
+    assert len(calls) == 2
+    assert submission.status == 'done' and submission.category == 'incorrect'
+
+
+def test_a_verdict_that_cannot_be_written_still_finishes_the_submission(app, monkeypatch):
+    def locked(*args):
+        raise LOCKED
+
+    submission = _judged(app, monkeypatch, locked)
+    assert submission.status == 'error'
+    assert submission.message.startswith('Judge failed:') and submission.finished_at is not None
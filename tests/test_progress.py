@@ -0,0 +1,95 @@
+import threading
+from datetime import timedelta
+
+from zombie_code_survival.extensions import db
+from zombie_code_survival.judge import grade_submission
+from zombie_code_survival.models import CatalogChallenge, Challenge, LevelStats, Survivor
+
+SOLVED = {'phase': 'run', 'success': True, 'failed_case': None, 'cases_total': 1}
+
+
+def _register(app, username='alice'):
+    with app.app_context():
+        survivor = Survivor(username=username)
+        db.session.add(survivor)
+        db.session.commit()
+        return survivor.id
+
+
+def _solve(app, survivor_id, level, barrier=None):
+    with app.app_context():
+        survivor = db.session.get(Survivor, survivor_id)
+        challenge = survivor.get_progress(level)
+        if barrier is not None:
+            barrier.wait()
+        return grade_submission(survivor, challenge, SOLVED)
+
+
+def test_concurrent_solves_of_one_level_count_once(app):
+    survivor_id = _register(app)
+    barrier = threading.Barrier(8)
+    verdicts = []
+    threads = [threading.Thread(target=lambda: verdicts.append(_solve(app, survivor_id, 1, barrier)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(verdicts) == 8
+    assert all(v['category'] == 'correct' and not v['finished'] for v in verdicts)
+    with app.app_context():
+        assert Challenge.query.filter_by(survivor_id=survivor_id, level=1).count() == 1
+        assert db.session.get(Survivor, survivor_id).solved_count == 1
+        stats = db.session.get(LevelStats, 1)
+        assert (stats.solves, stats.attempts) == (1, 8)
+
+
+def test_repeated_solves_cannot_finish_the_mission(app):
+    survivor_id = _register(app)
+    with app.app_context():
+        levels = [level for (level,) in db.session.query(CatalogChallenge.level).order_by(CatalogChallenge.level)]
+    for _ in range(len(levels)):
+        assert not _solve(app, survivor_id, levels[0])['finished']
+
+    for level in levels[1:-1]:
+        assert not _solve(app, survivor_id, level)['finished']
+    assert _solve(app, survivor_id, levels[-1])['finished']
+    with app.app_context():
+        survivor = db.session.get(Survivor, survivor_id)
+        assert survivor.solved_count == len(levels)
+        assert survivor.end_time is not None
+
+
+def test_replays_do_not_dilute_the_solve_rate(app):
+    survivor_id = _register(app)
+    failed = {'phase': 'run', 'success': False, 'cases_total': 1,
+              'failed_case': {'index': 1, 'stdin': '', 'expected': 'x', 'got': 'y', 'reason': 'mismatch'}}
+    with app.app_context():
+        survivor = db.session.get(Survivor, survivor_id)
+        grade_submission(survivor, survivor.get_progress(2), failed)
+    _solve(app, survivor_id, 2)
+    for _ in range(3):
+        _solve(app, survivor_id, 2)
+    with app.app_context():
+        survivor = db.session.get(Survivor, survivor_id)
+        grade_submission(survivor, survivor.get_progress(2), failed)
+        stats = db.session.get(LevelStats, 2).to_dict()
+    assert (stats['attempts'], stats['attempts_before_solve'], stats['solves']) == (6, 2, 1)
+    assert stats['solve_rate'] == 0.5
+
+
+def test_solve_time_runs_from_the_previous_solve(app):
+    survivor_id = _register(app)
+    with app.app_context():
+        # Registered an hour ago
+        survivor = db.session.get(Survivor, survivor_id)
+        survivor.start_time -= timedelta(hours=1)
+        db.session.commit()
+    _solve(app, survivor_id, 1)
+    _solve(app, survivor_id, 2)
+    with app.app_context():
+        first = db.session.get(LevelStats, 1).solve_seconds.mean
+        second = db.session.get(LevelStats, 2).solve_seconds.mean
+    assert first >= 3600
+    assert second < 60
@@ -0,0 +1,58 @@
+import pytest
+from flask import Flask
+
+from zombie_code_survival import ratelimit
+from zombie_code_survival.ratelimit import RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    return clock
+
+
+def _limiter(tmp_path, burst=3, refill=0.5):
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_DB=str(tmp_path / 'ratelimit.db'), RATE_LIMIT_BURST=burst, RATE_LIMIT_REFILL=refill)
+    return RateLimiter(app)
+
+
+def test_limiting_starts_once_the_burst_is_used_up(tmp_path, clock):
+    limiter = _limiter(tmp_path)
+    assert [limiter.take('survivor:1') for _ in range(3)] == [0, 0, 0]
+    # One token comes back every 1 / refill = 2 seconds
+    assert limiter.take('survivor:1') == pytest.approx(2.0)
+    # Other submitters have buckets of their own
+    assert limiter.take('survivor:2') == 0
+    assert limiter.stats() == {'enabled': True, 'allowed': 4, 'limited': 1}
+
+
+def test_a_bucket_recovers_after_the_refill_interval(tmp_path, clock):
+    limiter = _limiter(tmp_path)
+    for _ in range(3):
+        limiter.take('ip:10.0.0.1')
+    clock.now += 1.0
+    assert limiter.take('ip:10.0.0.1') == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.take('ip:10.0.0.1') == 0
+    assert limiter.take('ip:10.0.0.1') > 0
+    # Idle long enough, the whole burst is back (and no more)
+    clock.now += 60
+    assert [limiter.take('ip:10.0.0.1') for _ in range(3)] == [0, 0, 0]
+    assert limiter.take('ip:10.0.0.1') > 0
+
+
+def test_buckets_are_shared_through_the_file(tmp_path, clock):
+    first, second = _limiter(tmp_path, burst=2), _limiter(tmp_path, burst=2)
+    assert first.take('survivor:1') == 0
+    assert second.take('survivor:1') == 0
+    assert first.take('survivor:1') > 0
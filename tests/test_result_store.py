@@ -0,0 +1,31 @@
+import sqlite3
+
+from sqlalchemy.exc import OperationalError
+
+from zombie_code_survival.extensions import db, persistence, result_store
+from zombie_code_survival.models import Submission, Survivor
+
+RESULT = {'phase': 'run', 'success': True, 'stdout': 'ok', 'stderr': ''}
+VERDICT = {'category': 'correct', 'message': 'Correct! Level solved.', 'finished': False}
+
+
+def test_a_locked_eviction_never_fails_the_save(app, monkeypatch):
+    transaction = persistence.transaction
+
+    def evict_locked(work):
+        if evict_locked.saved:
+            raise OperationalError('DELETE FROM submission', {}, sqlite3.OperationalError('database is locked'))
+        evict_locked.saved = True
+        return transaction(work)
+
+    evict_locked.saved = False
+    monkeypatch.setattr(persistence, 'transaction', evict_locked)
+    monkeypatch.setattr(result_store, '_last_evict', 0.0)
+    with app.app_context():
+        survivor = Survivor(username='carol')
+        db.session.add(survivor)
+        db.session.commit()
+        result_id = result_store.save(survivor.id, 1, RESULT, VERDICT)
+        assert db.session.get(Submission, result_id).stdout == 'ok'
+    # Skipped, so the next save tries again
+    assert result_store._last_evict == 0.0
@@ -0,0 +1,48 @@
+def test_stats_reports_each_judge_component(app):
+    data = app.test_client().get('/stats').get_json()
+    assert {'pch', 'admission', 'judge_pool', 'workspaces', 'rate_limit'} <= set(data)
+    assert data['judge_pool']['pending'] == 0
+
+
+def test_metrics_export_admission_queueing(app, tmp_path):
+    from zombie_code_survival.extensions import admission
+
+    app.config['ADMISSION_DIR'] = str(tmp_path / 'admission')
+    admission.init_app(app)
+    try:
+        with admission.slot():
+            body = app.test_client().get('/metrics').get_data(as_text=True)
+    finally:
+        admission.root = None
+    assert 'zombie_admission_wait_seconds_count ' in body
+    assert 'zombie_admission_host_jobs{state="running"} 1' in body
+    assert 'zombie_admission_host_jobs{state="queued"} 0' in body
+
+
+def test_leaderboard_cache_is_bounded(app):
+    from zombie_code_survival.extensions import leaderboard_cache
+
+    client = app.test_client()
+    for page in range(1, leaderboard_cache.max_pages + 20):
+        assert client.get(f'/leaderboard?page={page}').status_code == 200
+    assert leaderboard_cache.stats()['pages'] == leaderboard_cache.max_pages
+
+
+def test_a_shed_form_post_is_flashed_back_to_the_challenge(app, monkeypatch):
+    from zombie_code_survival.admission import AdmissionRejected
+
+    def saturated(*args, **kwargs):
+        raise AdmissionRejected('Judge queue is full.', 7)
+
+    monkeypatch.setattr('zombie_code_survival.routes.judge_submission', saturated)
+    client = app.test_client()
+    client.post('/', data={'username': 'shed'})
+    response = client.post('/challenge/1', data={'code': 'int main() {}', 'stdin': ''})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/challenge/1')
+    assert response.headers['Retry-After'] == '7'
+    page = client.get('/challenge/1').get_data(as_text=True)
+    assert 'Judge queue is full. Please retry in 7 seconds.' in page
+
+    api = client.post('/challenge/1', data={'code': ''}, headers={'Accept': 'application/json'})
+    assert api.status_code == 503 and api.get_json()['error'].startswith('Judge queue is full.')
@@ -0,0 +1,35 @@
+import sys
+import time
+
+from zombie_code_survival.runner import run_job
+
+FLOOD = 'import sys\nwhile True:\n    sys.{}.write("zombie " * 512)\n'
+
+
+def _flood(stream, max_output=4096):
+    started = time.monotonic()
+    reply = run_job({'argv': [sys.executable, '-c', FLOOD.format(stream)], 'stdin': '', 'timeout': 10,
+                     'cwd': None, 'max_output': max_output})
+    return reply, time.monotonic() - started
+
+
+def test_a_stdout_flood_is_cut_at_the_cap_and_killed():
+    reply, elapsed = _flood('stdout')
+    assert reply['output_limit_exceeded'] and not reply['timed_out']
+    assert len(reply['stdout'].encode('utf-8')) == 4096
+    assert reply['stdout'].startswith('zombie zombie')
+    # Killed at the cap, not left running until the timeout
+    assert elapsed < 5
+
+
+def test_stderr_has_its_own_cap():
+    reply, _ = _flood('stderr', max_output=1024)
+    assert reply['output_limit_exceeded']
+    assert len(reply['stderr']) == 1024 and reply['stdout'] == ''
+
+
+def test_output_under_the_cap_is_kept_whole():
+    reply = run_job({'argv': [sys.executable, '-c', 'print("brains " * 100)'], 'stdin': '', 'timeout': 10,
+                     'cwd': None, 'max_output': 4096})
+    assert not reply['output_limit_exceeded']
+    assert (reply['returncode'], reply['stdout']) == (0, 'brains ' * 100 + '\n')
@@ -0,0 +1,22 @@
+import os
+import stat
+import sys
+
+from flask import Flask
+
+from zombie_code_survival.sandbox import SandboxRunner
+
+
+def test_default_socket_lives_in_the_private_instance_folder(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config.update(RUNNER_SOCKET=None, RUNNER_AUTOSTART=False)
+    runner = SandboxRunner(app)
+    assert runner.socket_path == os.path.join(app.instance_path, 'runner.sock')
+    assert stat.S_IMODE(os.stat(app.instance_path).st_mode) & 0o077 == 0
+
+
+def test_run_once_spawns_a_runner_without_the_daemon():
+    reply = SandboxRunner().run_once({'argv': [sys.executable, '-c', 'print(input()[::-1])'], 'stdin': 'brains\n',
+                                      'timeout': 10, 'cwd': None, 'max_output': 1024})
+    assert reply['error'] is None
+    assert (reply['returncode'], reply['stdout']) == (0, 'sniarb\n')
@@ -0,0 +1,45 @@
+import random
+
+from zombie_code_survival.sketch import QuantileSketch
+
+
+def test_quantiles_stay_within_the_relative_accuracy():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(3, 1.5) for _ in range(5000))
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.02 * exact + 1e-9
+    assert abs(sketch.mean - sum(values) / len(values)) < 1e-6
+
+
+def test_empty_and_tiny_values():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None and sketch.mean is None
+    sketch.add(0)
+    sketch.add(0.0005)
+    sketch.add(10)
+    assert sketch.quantile(0) == 0.0
+    assert abs(sketch.quantile(1) - 10) <= 0.2
+
+
+def test_bucket_count_is_bounded():
+    sketch = QuantileSketch(accuracy=0.001)
+    for i in range(1, 20000):
+        sketch.add(i * 1.01)
+    assert len(sketch.buckets) <= QuantileSketch.MAX_BUCKETS
+    # Folding only loses precision at the low end
+    assert abs(sketch.quantile(0.99) - 0.99 * 20000 * 1.01) <= 0.01 * 20000
+
+
+def test_json_round_trip():
+    sketch = QuantileSketch()
+    for value in (1, 2, 3, 50, 120):
+        sketch.add(value)
+    again = QuantileSketch.from_json(sketch.to_json())
+    assert (again.count, again.zero_count, again.total, again.buckets) == \
+        (sketch.count, sketch.zero_count, sketch.total, sketch.buckets)
+    assert again.quantile(0.5) == sketch.quantile(0.5)
+    assert QuantileSketch.from_json(None).count == 0
@@ -0,0 +1,61 @@
+from flask import Flask
+
+from zombie_code_survival.replay import compare, load_submissions, replay
+from zombie_code_survival.submission_log import SubmissionLog, read_log
+
+RESULT = {'phase': 'run', 'success': True, 'failed_case': None, 'timings': {}, 'stdout': '2.5', 'stderr': ''}
+VERDICT = {'category': 'correct'}
+
+
+def _log(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config.update(dict({'SUBMISSION_LOG': 'submissions.jsonl', 'JUDGE_COMPARE': 'exact', 'JUDGE_FLOAT_TOLERANCE': 1e-6}, **config))
+    return SubmissionLog(app)
+
+
+def test_log_lives_in_the_instance_folder_and_keeps_the_judged_mode(tmp_path):
+    log = _log(tmp_path, SUBMISSION_LOG_MAX_STDIN=8)
+    assert log.path == str(tmp_path / 'instance' / 'submissions.jsonl')
+    log.record(7, 'int main() {}', 'x' * 100, [('', '2.5')], RESULT, VERDICT, 0.1, compare=('float', 0.01))
+    log.record(1, 'int main() {}', '', [('', 'ok')], RESULT, VERDICT, 0.1)
+    records = list(read_log(log.path))
+    assert records[0]['type'] == 'cases'
+    first, second = [r for r in records if r['type'] == 'submission']
+    assert (first['compare'], first['tolerance']) == ('float', 0.01)
+    assert (first['stdin'], first['stdin_truncated']) == ('x' * 8, True)
+    assert second['compare'] == 'exact'
+
+
+def test_log_rotates_past_max_bytes(tmp_path):
+    log = _log(tmp_path, SUBMISSION_LOG_MAX_BYTES=2000)
+    for level in range(1, 30):
+        log.record(level, 'int main() {}', '', [('', 'ok')], RESULT, VERDICT, 0.1)
+    assert (tmp_path / 'instance' / 'submissions.jsonl').stat().st_size <= 2000
+    rotated = list(read_log(log.path + '.1'))
+    assert rotated
+    # Each file carries the case sets its submissions refer to
+    for path in (log.path, log.path + '.1'):
+        submissions, skipped = load_submissions(path)
+        assert submissions and skipped == 0
+
+
+def test_replay_uses_the_logged_mode_and_records_judge_exceptions(tmp_path, app, monkeypatch):
+    log = _log(tmp_path)
+    log.record(7, 'float level', '', [('', '2.5')], RESULT, VERDICT, 0.1, compare=('float', None))
+    log.record(1, 'crashes the judge', '', [('', 'ok')], RESULT, VERDICT, 0.1)
+    submissions, _ = load_submissions(log.path)
+
+    seen = []
+
+    def fake_judge(code, test_cases, stdin, profile=None, compare=None):
+        seen.append(compare)
+        if code == 'crashes the judge':
+            raise RuntimeError('boom')
+        return RESULT
+
+    monkeypatch.setattr('zombie_code_survival.judge.run_test_cases', fake_judge)
+    results = replay(app, submissions)
+    assert seen[0] == ('float', 1e-06)
+    assert [row['outcome'] for row in results] == ['pass', 'exception']
+    report = compare(results, {s['n']: {'outcome': s['outcome'], 'latency': s['latency']} for s in submissions})
+    assert report['exceptions'] == [{'n': 2, 'level': 1, 'error': 'RuntimeError: boom'}]
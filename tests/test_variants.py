@@ -0,0 +1,36 @@
+import dataclasses
+
+from zombie_code_survival import variants
+from zombie_code_survival.extensions import challenge_pack
+from zombie_code_survival.variants import VariantPool
+
+
+class _InlineExecutor:
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+def test_base_programs_are_rescreened_when_their_content_changes(app, monkeypatch):
+    screened = []
+
+    def fake_build(base, seed, compiler, flags):
+        screened.append(base['title'])
+        return {'buggy_passes': False}
+
+    monkeypatch.setattr(variants, 'build_variant', fake_build)
+    pool = VariantPool()
+    pool.app, pool.target = app, 0
+    with app.app_context():
+        challenges = challenge_pack.challenges()
+    pool.refill(_InlineExecutor())
+    assert len(screened) == len(challenges)
+
+    screened.clear()
+    pool.refill(_InlineExecutor())
+    assert screened == []
+
+    changed = dict(challenges)
+    changed[1] = dataclasses.replace(challenges[1], title='Reloaded', buggy_code=challenges[1].buggy_code + '\n')
+    monkeypatch.setattr(challenge_pack, 'challenges', lambda: changed)
+    pool.refill(_InlineExecutor())
+    assert screened == ['Reloaded']
@@ -0,0 +1,54 @@
+import threading
+
+from zombie_code_survival.workspace import WorkspacePool
+
+
+class _OwnedLock:
+    # A Lock that knows which thread holds it
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.owner = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.owner = threading.get_ident()
+
+    def __exit__(self, *exc):
+        self.owner = None
+        self._lock.release()
+
+
+class _App:
+    def __init__(self, **config):
+        self.config = config
+        self.extensions = {}
+
+
+def test_checkout_resets_outside_the_pool_lock(tmp_path, monkeypatch):
+    pool = WorkspacePool(_App(WORKSPACE_ROOT=str(tmp_path), WORKSPACE_POOL_SIZE=2))
+    pool._lock = _OwnedLock()
+    reset = WorkspacePool._reset
+    held = []
+
+    def checked_reset(path):
+        held.append(pool._lock.owner == threading.get_ident())
+        return reset(path)
+
+    monkeypatch.setattr(pool, '_reset', checked_reset)
+
+    def job():
+        for _ in range(20):
+            with pool.checkout() as (path, exe_path):
+                with open(exe_path, 'w') as f:
+                    f.write('x')
+
+    threads = [threading.Thread(target=job) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert held and not any(held)
+    stats = pool.stats()
+    assert stats['created'] - 2 + stats['reused'] == 80
+    assert stats['discarded'] == 0
@@ -1,17 +1,39 @@
 # zombie_code_survival/__init__.py
 from flask import Flask
 from .config import Config
-from .extensions import db
+from .extensions import db, compile_cache, pch, judge_pool, admission, sandbox_runner, leaderboard_cache, result_store, metrics, persistence, challenge_pack, variant_pool, assets, rate_limiter, workspace_pool, submission_log
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    metrics.init_app(app)
     db.init_app(app)
+    persistence.init_app(app)
+    challenge_pack.init_app(app)
+    compile_cache.init_app(app)
+    workspace_pool.init_app(app)
+    pch.init_app(app)
+    judge_pool.init_app(app)
+    admission.init_app(app)
+    rate_limiter.init_app(app)
+    sandbox_runner.init_app(app)
+    leaderboard_cache.init_app(app)
+    result_store.init_app(app)
+    submission_log.init_app(app)
+    assets.init_app(app)
 
     from .routes import main
     app.register_blueprint(main)
 
     with app.app_context():
+        from .migrations import run_migrations
+        run_migrations()
         db.create_all()
+        challenge_pack.sync_catalog()
+
+    # Started last: the filler thread needs the tables above
+    variant_pool.init_app(app)
 
     return app
@@ -0,0 +1,180 @@
+# zombie_code_survival/admission.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# fcntl is POSIX-only; elsewhere admission control is not enforced (like the rlimits in judge.py)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when the judge is saturated: the wait queue is full or the wait timed out.
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Host-wide limit on concurrent compile/run jobs with a bounded wait queue.
+
+    Run slots and queue slots are lock files under ADMISSION_DIR held with flock, so the limit
+    covers every worker process on the box and a crashed worker never leaks a slot. A job first
+    takes a queue slot (or is rejected at once when all are taken), then waits for a run slot
+    until ADMISSION_QUEUE_TIMEOUT.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        self.max_concurrent = 0
+        self.max_queue = 0
+        self.queue_timeout = 0
+        self.retry_after = 1
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cpus = os.cpu_count() or 1
+        self.max_concurrent = int(app.config.get('ADMISSION_MAX_CONCURRENT') or cpus)
+        self.max_queue = int(app.config.get('ADMISSION_MAX_QUEUE') or 4 * self.max_concurrent)
+        self.queue_timeout = float(app.config.get('ADMISSION_QUEUE_TIMEOUT') or 10)
+        self.retry_after = int(app.config.get('ADMISSION_RETRY_AFTER') or 5)
+        root = app.config.get('ADMISSION_DIR')
+        if not root or fcntl is None:
+            self.root = None
+            return
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        app.extensions['admission'] = self
+
+    @property
+    def enabled(self):
+        return self.root is not None
+
+    def _slot_paths(self, kind, count):
+        return [os.path.join(self.root, f"{kind}-{i}.lock") for i in range(count)]
+
+    @staticmethod
+    def _try_take(paths):
+        for path in paths:
+            f = open(path, "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        return None
+
+    @staticmethod
+    def _release(f):
+        if f is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            finally:
+                f.close()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one run slot for the duration of the block. Raises AdmissionRejected when saturated.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = time.monotonic()
+        queue_slot = self._try_take(self._slot_paths("queue", self.max_queue))
+        if queue_slot is None:
+            self._reject()
+            raise AdmissionRejected("Judge queue is full.", self.retry_after)
+
+        run_slot = None
+        with self._lock:
+            self._waiting += 1
+        try:
+            run_paths = self._slot_paths("run", self.max_concurrent)
+            delay = 0.005
+            while True:
+                run_slot = self._try_take(run_paths)
+                if run_slot is not None:
+                    break
+                if time.monotonic() - started >= self.queue_timeout:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+            self._release(queue_slot)
+
+        waited = time.monotonic() - started
+        if run_slot is None:
+            self._reject()
+            raise AdmissionRejected("Timed out waiting for a judge slot.", self.retry_after)
+
+        with self._lock:
+            self._running += 1
+            self.admitted += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        from .extensions import metrics  # not at the top: extensions imports this module
+        metrics.observe('zombie_admission_wait_seconds', waited)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._release(run_slot)
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def _count_held(self, paths):
+        # Probe with a shared lock: it fails while someone holds the slot exclusively
+        held = 0
+        for path in paths:
+            try:
+                with open(path, "a") as f:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                    except OSError:
+                        held += 1
+            except OSError:
+                continue
+        return held
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'enabled': self.enabled,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'process_running': self._running,
+                'process_waiting': self._waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'wait_seconds_total': round(self.wait_seconds_total, 3),
+                'wait_seconds_max': round(self.wait_seconds_max, 3),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.admitted, 3) if self.admitted else 0.0,
+            }
+        if self.enabled:
+            stats['host_running'] = self._count_held(self._slot_paths("run", self.max_concurrent))
+            stats['host_queue_depth'] = self._count_held(self._slot_paths("queue", self.max_queue))
+        return stats
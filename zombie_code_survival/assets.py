@@ -0,0 +1,160 @@
+# zombie_code_survival/assets.py
+"""
+Fingerprinted, precompressed static assets.
+
+`python -m zombie_code_survival.assettool build` (see assettool.py) copies every file under
+static/ to static/dist/ with a content hash in its name (css/style.css -> css/style.3f2a9c1b.css),
+writes .gz and, when the optional brotli package is installed, .br copies of the text files, and
+records the mapping in static/dist/manifest.json. Templates link assets through asset_url(),
+which uses the manifest when one has been built and plain url_for('static') otherwise.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+from flask import abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+# Optional: without it only gzip copies are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json', '.txt')
+# Preference order when a client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.asset-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_manifest(dist_dir):
+    try:
+        with open(os.path.join(dist_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_assets(static_dir):
+    """
+    Fingerprint and compress everything under static_dir into static_dir/dist and write the
+    manifest last, so a worker never sees a manifest naming files that are not there yet.
+    Files from the previous build are kept (pages rendered before a restart still link them);
+    anything older is removed. Returns the new manifest.
+    """
+    dist_dir = os.path.join(static_dir, DIST)
+    previous = load_manifest(dist_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir) and DIST in dirs:
+            dirs.remove(DIST)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:8]}{ext}'
+            target = os.path.join(dist_dir, hashed)
+            # Names are content addressed: an existing file already has these bytes
+            if not os.path.exists(target):
+                _write_atomic(target, data)
+                if ext in COMPRESSIBLE:
+                    _write_compressed(target, data)
+            manifest[logical] = hashed
+
+    _write_atomic(os.path.join(dist_dir, MANIFEST),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    _prune(dist_dir, set(manifest.values()) | set(previous.values()))
+    return manifest
+
+
+def _write_compressed(target, data):
+    # mtime=0 keeps the gzip bytes identical between builds of the same file
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            _write_atomic(target + suffix, compressed)
+
+
+def _prune(dist_dir, keep):
+    for root, dirs, files in os.walk(dist_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            logical = os.path.relpath(path, dist_dir).replace(os.sep, '/')
+            for _, suffix in ENCODINGS:
+                if logical.endswith(suffix):
+                    logical = logical[:-len(suffix)]
+            if logical != MANIFEST and logical not in keep:
+                os.unlink(path)
+
+
+class Assets:
+    """
+    Serves the built assets from static/dist with far-future, immutable caching (a changed
+    file gets a new name, so a cached copy never goes stale) and picks the precompressed .br
+    or .gz copy the client accepts. Adds asset_url() to templates.
+
+    The manifest is read once at startup: rebuild, then restart the workers.
+    """
+
+    def __init__(self, app=None):
+        self.dist_dir = None
+        self.manifest = {}
+        self.max_age = 365 * 24 * 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.dist_dir = os.path.join(app.static_folder, DIST)
+        self.manifest = load_manifest(self.dist_dir)
+        self.max_age = int(app.config.get('ASSET_MAX_AGE') or self.max_age)
+        app.extensions['assets'] = self
+        app.add_template_global(self.url, 'asset_url')
+        # More specific than Flask's own /static/<path:filename>, so it wins for dist/
+        app.add_url_rule(f'{app.static_url_path}/{DIST}/<path:filename>', 'assets', self.serve)
+
+    def url(self, path):
+        hashed = self.manifest.get(path)
+        if hashed is None:
+            return url_for('static', filename=path)
+        return url_for('assets', filename=hashed)
+
+    def serve(self, filename):
+        if filename == MANIFEST:
+            abort(404)
+        served, encoding = filename, None
+        for name, suffix in ENCODINGS:
+            candidate = safe_join(self.dist_dir, filename + suffix)
+            if request.accept_encodings[name] and candidate and os.path.isfile(candidate):
+                served, encoding = filename + suffix, name
+                break
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(self.dist_dir, served, mimetype=mimetype, max_age=self.max_age)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
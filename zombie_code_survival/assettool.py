@@ -0,0 +1,41 @@
+# zombie_code_survival/assettool.py
+"""
+Build the fingerprinted static assets (see assets.py).
+
+    python -m zombie_code_survival.assettool build
+
+Run it as part of a deploy, before the workers start; without a build the app serves
+static/ unhashed with Flask's default caching.
+"""
+import argparse
+import os
+import sys
+
+from .assets import DIST, brotli, build_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Write static/dist and its manifest")
+    build.add_argument("--static", default=STATIC_DIR, help="Static folder to build (default: the app's)")
+    args = parser.parse_args(argv)
+
+    manifest = build_assets(args.static)
+    dist_dir = os.path.join(args.static, DIST)
+    for logical, hashed in sorted(manifest.items()):
+        path = os.path.join(dist_dir, hashed)
+        sizes = [f'{os.path.getsize(path)} B']
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(path + suffix):
+                sizes.append(f'{suffix[1:]} {os.path.getsize(path + suffix)} B')
+        print(f'{logical} -> {hashed} ({", ".join(sizes)})')
+    if brotli is None:
+        print('brotli is not installed; wrote gzip copies only', file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# zombie_code_survival/benchmark.py
+"""
+Judge benchmark over the challenge catalog (the live challenge pack, or DebugGenerator).
+
+    python -m zombie_code_survival.benchmark --parallel 4 --repeat 5 --json bench.json
+
+Every level's solution and buggy code go through the real judge (run_test_cases with the verify
+profile, or another with --profile), so the numbers include the same compile flags, precompiled
+headers and runner daemon the site uses.
+Each run is also checked: a solution must pass all of its test cases (the exit status is
+non-zero when one does not, so the catalog verifies itself), and buggy code that passes them
+anyway is reported as a warning, since a player could submit it unchanged (--strict fails on
+those too).
+The compile cache is off unless --compile-cache is given, otherwise every repetition after
+the first would measure a cache hit instead of g++.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from . import create_app
+from .extensions import pch, challenge_pack
+from .compile_cache import toolchain_version
+
+KINDS = ('solution', 'buggy')
+
+
+def percentile(samples, p):
+    """
+    Nearest-rank percentile of samples (0 < p <= 100); None for no samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]
+
+
+def _check(kind, result):
+    """
+    Returns None when the run behaved as its kind should, else a short reason.
+    """
+    if kind == 'solution':
+        if result['success']:
+            return None
+        failed = result.get('failed_case')
+        if failed is None:
+            return 'solution failed to compile: ' + (result.get('stderr') or '').strip()[:200]
+        return 'solution failed test case {} ({}): expected "{}", got "{}"'.format(
+            failed['index'], failed['reason'], failed['expected'][:80], failed['got'][:80])
+    return 'buggy code passed every test case' if result['success'] else None
+
+
+def _describe_failure(result):
+    if result['phase'] == 'compile' and not result['success']:
+        return 'compile'
+    failed = result.get('failed_case')
+    return failed['reason'] if failed else None
+
+
+def run_benchmark(challenges, parallel=1, repeat=1, compile_timeout=5, run_timeout=2, profile='verify'):
+    """
+    Judge each (level, kind) pair repeat times with up to parallel jobs in flight, with one
+    compile profile ('verify', as the site judges by default, or 'interactive') or through
+    judge_submission's tiered pre-pass (profile 'tiered').
+    Returns { level: { kind: {...summary...} } }.
+    """
+    from .judge import judge_submission, run_test_cases
+
+    jobs = [(level, kind) for _ in range(repeat) for level in sorted(challenges) for kind in KINDS]
+
+    def judge(job):
+        level, kind = job
+        data = challenges[level]
+        code = data.solution if kind == 'solution' else data.buggy_code
+        started = time.perf_counter()
+        if profile == 'tiered':
+            result = judge_submission(code, data.get_test_cases(), compile_timeout=compile_timeout,
+                                      run_timeout=run_timeout, tiered=True, compare=(data.compare, data.tolerance))
+        else:
+            result = run_test_cases(code, data.get_test_cases(), compile_timeout=compile_timeout,
+                                    run_timeout=run_timeout, profile=profile, compare=(data.compare, data.tolerance))
+        return job, result, time.perf_counter() - started
+
+    samples = {}
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix='bench') as pool:
+        for (level, kind), result, wall in pool.map(judge, jobs):
+            entry = samples.setdefault(level, {}).setdefault(kind, {
+                'compile': [], 'run': [], 'total': [], 'cached': 0, 'outcomes': {}, 'problems': []})
+            timings = result.get('timings') or {}
+            entry['compile'].append(timings.get('compile', 0.0))
+            if result['phase'] == 'run':
+                entry['run'].append(timings.get('run', 0.0))
+            entry['total'].append(wall)
+            entry['cached'] += bool(timings.get('compile_cached'))
+            outcome = _describe_failure(result) or 'pass'
+            entry['outcomes'][outcome] = entry['outcomes'].get(outcome, 0) + 1
+            problem = _check(kind, result)
+            if problem and problem not in entry['problems']:
+                entry['problems'].append(problem)
+
+    report = {}
+    for level, kinds in samples.items():
+        report[level] = {}
+        for kind, entry in kinds.items():
+            problems = entry['problems'] if kind == 'solution' else []
+            warnings = entry['problems'] if kind == 'buggy' else []
+            report[level][kind] = {
+                'title': challenges[level].title,
+                'runs': len(entry['total']),
+                'cases': len(challenges[level].get_test_cases()),
+                'compile_cached': entry['cached'],
+                'compile_p50': percentile(entry['compile'], 50),
+                'compile_p95': percentile(entry['compile'], 95),
+                'run_p50': percentile(entry['run'], 50),
+                'run_p95': percentile(entry['run'], 95),
+                'total_p50': percentile(entry['total'], 50),
+                'total_p95': percentile(entry['total'], 95),
+                'outcomes': entry['outcomes'],
+                'verified': not problems,
+                'problems': problems,
+                'warnings': warnings,
+            }
+    return report
+
+
+def _ms(seconds):
+    return '     -' if seconds is None else '{:6.0f}'.format(seconds * 1000)
+
+
+def print_report(report, out=sys.stdout):
+    out.write('level kind      compile p50/p95 ms   run p50/p95 ms   ok  title\n')
+    for level in sorted(report):
+        for kind in KINDS:
+            row = report[level].get(kind)
+            if row is None:
+                continue
+            status = 'NO' if not row['verified'] else ('warn' if row['warnings'] else 'yes')
+            out.write('{:5d} {:<9} {} {}       {} {}     {:<4} {}\n'.format(
+                level, kind, _ms(row['compile_p50']), _ms(row['compile_p95']),
+                _ms(row['run_p50']), _ms(row['run_p95']), status, row['title']))
+            for problem in row['problems'] + row['warnings']:
+                out.write('      ! {}\n'.format(problem))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and verify the judge against the challenge catalog.")
+    parser.add_argument("--parallel", type=int, default=1, help="Judge jobs in flight at once (default 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each solution and buggy program (default 3)")
+    parser.add_argument("--levels", help="Comma-separated levels to run (default: all)")
+    parser.add_argument("--json", metavar="PATH", help="Write the full report as JSON to PATH")
+    parser.add_argument("--compile-cache", action="store_true",
+                        help="Keep the compile cache on (measures cache hits after the first run)")
+    parser.add_argument("--strict", action="store_true",
+                        help="Also fail when buggy code passes its level's test cases")
+    parser.add_argument("--compile-timeout", type=float, default=5)
+    parser.add_argument("--run-timeout", type=float, default=2)
+    parser.add_argument("--profile", choices=('verify', 'tiered', 'interactive'), default='verify',
+                        help="Compile profile: verify (how the site judges by default), tiered (with the "
+                             "JUDGE_TIERED_PROFILES -O0 pre-pass) or interactive")
+    args = parser.parse_args(argv)
+
+    # Admission control would queue or reject the benchmark's own parallel jobs, and the
+    # variant pool would compete with them for CPU. A scratch database keeps the app's
+    # migrations and catalog sync off the live one.
+    db_path = os.path.join(tempfile.mkdtemp(prefix='zombie-benchmark-'), 'benchmark.db')
+    overrides = {'ADMISSION_DIR': None, 'VARIANTS_ENABLED': False, 'RATE_LIMIT_DB': None, 'SUBMISSION_LOG': None,
+                 'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path, 'LEADERBOARD_STAMP': db_path + '.stamp'}
+    if not args.compile_cache:
+        overrides['COMPILE_CACHE_DIR'] = None
+    app = create_app(overrides)
+
+    challenges = challenge_pack.challenges()
+    if args.levels:
+        wanted = {int(level) for level in args.levels.split(',') if level.strip()}
+        challenges = {level: data for level, data in challenges.items() if level in wanted}
+
+    # Time steady-state compiles, not the ones racing the startup PCH build
+    pch.wait(timeout=120)
+
+    started = time.perf_counter()
+    with app.app_context():
+        report = run_benchmark(challenges, parallel=args.parallel, repeat=args.repeat,
+                               compile_timeout=args.compile_timeout, run_timeout=args.run_timeout,
+                               profile=args.profile)
+    elapsed = time.perf_counter() - started
+
+    print_report(report)
+    rows = [row for kinds in report.values() for row in kinds.values()]
+    failures = sum(1 for row in rows if not row['verified'])
+    warnings = sum(1 for row in rows if row['warnings'])
+    runs = sum(row['runs'] for row in rows)
+    print('{} runs in {:.1f}s with parallel={}, profile {}; {} check(s) failed, {} warning(s)'.format(
+        runs, elapsed, args.parallel, args.profile, failures, warnings))
+
+    if args.json:
+        from .judge import COMPILER, COMPILE_PROFILES, compile_flags
+        document = {
+            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'toolchain': toolchain_version(COMPILER),
+            'profile': args.profile,
+            'compile_flags': {name: compile_flags(name) for name in COMPILE_PROFILES},
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'parallel': args.parallel,
+            'repeat': args.repeat,
+            'compile_cache': args.compile_cache,
+            'elapsed_seconds': elapsed,
+            'failed_checks': failures,
+            'warnings': warnings,
+            'levels': {str(level): report[level] for level in sorted(report)},
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    return 1 if failures or (args.strict and warnings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
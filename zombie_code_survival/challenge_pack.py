@@ -0,0 +1,256 @@
+# zombie_code_survival/challenge_pack.py
+"""
+On-disk challenge packs.
+
+A pack is one file: a magic line, a JSON header line, then the body.
+
+    ZPACK1
+    {"version": "...", "sha256": "<hex of body>", "levels": {"1": [offset, length], ...}}
+    <body: one JSON object per level, at the offsets listed in the header>
+
+Build and publish one with `python -m zombie_code_survival.packtool build` (see packtool.py).
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, has_app_context, request
+
+from .debug_generator import ChallengeData, DebugGenerator
+
+MAGIC = b"ZPACK1\n"
+
+
+class PackError(ValueError):
+    pass
+
+
+def _level_record(data):
+    return {'title': data.title, 'buggy_code': data.buggy_code, 'solution': data.solution,
+            'error_type': data.error_type, 'expected_output': str(data.expected_output),
+            'test_cases': [list(case) for case in data.get_test_cases()],
+            'compare': data.compare, 'tolerance': data.tolerance}
+
+
+def build_pack(challenges, version=None):
+    """
+    Serialize a {level: ChallengeData} mapping into pack bytes.
+    """
+    body = bytearray()
+    index = {}
+    for level in sorted(challenges):
+        blob = json.dumps(_level_record(challenges[level]), sort_keys=True).encode('utf-8')
+        index[str(level)] = [len(body), len(blob)]
+        body += blob
+    header = {
+        'version': version or datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+        'sha256': hashlib.sha256(body).hexdigest(),
+        'levels': index,
+    }
+    return MAGIC + json.dumps(header, sort_keys=True).encode('utf-8') + b"\n" + bytes(body)
+
+
+def write_pack(path, challenges, version=None):
+    """
+    Write a pack next to path and os.replace it into place, so readers see the old or new file, never half of one.
+    """
+    data = build_pack(challenges, version)
+    fd, tmp_path = tempfile.mkstemp(prefix='.pack-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+class Pack:
+    """
+    A pack file mapped read-only. The kernel shares its pages between every worker that maps
+    it, and a level is only decoded the first time it is asked for.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_size <= len(MAGIC):
+                raise PackError(f'{path}: not a challenge pack')
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (st.st_mtime_ns, st.st_ino, st.st_size)
+        try:
+            header = self._read_header(path)
+        except BaseException:
+            self._map.close()
+            raise
+        self.path = path
+        self.version = header['version']
+        self.checksum = header['sha256']
+        self._index = {int(level): tuple(span) for level, span in header['levels'].items()}
+        self._decoded = {}
+
+    def _read_header(self, path):
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise PackError(f'{path}: not a challenge pack')
+        header_end = self._map.find(b"\n", len(MAGIC))
+        if header_end < 0:
+            raise PackError(f'{path}: truncated header')
+        try:
+            header = json.loads(self._map[len(MAGIC):header_end])
+            header['version'], header['levels']
+        except (ValueError, KeyError, TypeError) as e:
+            raise PackError(f'{path}: bad header ({e})')
+        self._body = header_end + 1
+        if hashlib.sha256(self._map[self._body:]).hexdigest() != header.get('sha256'):
+            raise PackError(f'{path}: checksum mismatch')
+        return header
+
+    def levels(self):
+        return sorted(self._index)
+
+    def get(self, level):
+        """
+        Return the ChallengeData for a level, or None if the pack does not have it.
+        """
+        data = self._decoded.get(level)
+        if data is None and level in self._index:
+            offset, length = self._index[level]
+            start = self._body + offset
+            record = json.loads(self._map[start:start + length])
+            data = self._decoded[level] = ChallengeData(
+                record['buggy_code'], record['solution'], record['error_type'], record['expected_output'],
+                record['title'], [tuple(case) for case in record['test_cases']],
+                # Packs built before per-level compare modes have neither key
+                record.get('compare'), record.get('tolerance'))
+        return data
+
+    def challenges(self):
+        return {level: self.get(level) for level in self.levels()}
+
+
+class ChallengePack:
+    """
+    Source of challenge content for the app: the pack file at CHALLENGE_PACK when there is one,
+    otherwise DebugGenerator. Nothing is read until content is first needed.
+
+    Publishing a new pack (write_pack / the build command) hot-reloads it: each worker stats the
+    file at most every CHALLENGE_PACK_RELOAD_INTERVAL seconds, from a hook on the judge routes
+    only (ordinary page views never write the catalog), maps the new file when its identity
+    changes and re-syncs the catalog table if the version is new. A pack that is corrupt or
+    fails its checksum is ignored: the previous content stays live, or DebugGenerator's at startup.
+    """
+
+    # Submissions are judged against the catalog, so these requests pick up a new pack first
+    RELOAD_ENDPOINTS = ('main.challenge', 'main.submit_challenge')
+
+    def __init__(self, app=None):
+        self.path = None
+        self.reload_interval = 5.0
+        self._pack = None
+        self._generated = None
+        self._synced_version = None
+        self._rejected = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.get('CHALLENGE_PACK')
+        if path != self.path:
+            self._pack = self._synced_version = self._rejected = None
+        self.path = path
+        self.reload_interval = float(app.config.get('CHALLENGE_PACK_RELOAD_INTERVAL') or 0)
+        app.extensions['challenge_pack'] = self
+        if self.path and self.reload_interval > 0:
+            app.before_request(self._reload_before_judging)
+
+    @property
+    def version(self):
+        pack = self._current()
+        return pack.version if pack is not None else 'generator'
+
+    def _current(self):
+        if self._pack is None and self.path and os.path.exists(self.path):
+            with self._lock:
+                if self._pack is None:
+                    self._pack = self._open()
+        return self._pack
+
+    def _open(self):
+        """
+        Map the pack at self.path. Returns None (remembering the file, so it is not retried until
+        it changes) when it cannot be read or is corrupt.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        identity = (st.st_mtime_ns, st.st_ino, st.st_size)
+        if identity == self._rejected:
+            return None
+        try:
+            return Pack(self.path)
+        except (OSError, PackError) as e:
+            self._rejected = identity
+            if has_app_context():
+                current_app.logger.warning('challenge pack ignored: %s', e)
+            return None
+
+    def challenges(self):
+        """
+        Return the current {level: ChallengeData}.
+        """
+        pack = self._current()
+        if pack is not None:
+            return pack.challenges()
+        if self._generated is None:
+            self._generated = DebugGenerator().generate_all_challenges()
+        return self._generated
+
+    def sync_catalog(self):
+        """
+        Write the current content to the catalog table (a no-op when nothing changed).
+        """
+        from .extensions import persistence
+        from .models import CatalogChallenge
+
+        version = self.version
+        challenges = self.challenges()
+        persistence.transaction(lambda: CatalogChallenge.sync(challenges))
+        self._synced_version = version
+
+    def _reload_before_judging(self):
+        if request.method == 'POST' and request.endpoint in self.RELOAD_ENDPOINTS:
+            self.maybe_reload()
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        identity = (st.st_mtime_ns, st.st_ino, st.st_size)
+        pack = self._pack
+        if pack is not None and pack.identity == identity:
+            return
+        fresh = self._open()
+        if fresh is None:
+            return
+        with self._lock:
+            self._pack = fresh
+        if fresh.version != self._synced_version:
+            self.sync_catalog()
+
@@ -0,0 +1,236 @@
+# zombie_code_survival/compare.py
+"""
+Streaming output comparators.
+
+A comparator is built from the expected output, fed the program's stdout chunk by chunk as it
+arrives, and answers as early as it can: feed() returns False once no continuation could match
+any more, so the runner can kill the program there instead of letting it run to the end.
+finish() gives the verdict once the output is complete, and after a mismatch divergence()
+says where the output first went wrong ("line 2, column 5", "line 3", "token 4").
+
+    exact       the outputs are equal once leading/trailing whitespace is stripped (the default)
+    whitespace  line by line, ignoring trailing spaces, \\r and blank lines at either end
+    tokens      the same whitespace-separated tokens, however they are laid out
+    float       tokens, with numbers equal within a relative/absolute tolerance
+
+Like runner.py, this module only uses the standard library: the runner daemon imports it
+as a plain module.
+"""
+import math
+
+
+class ExactComparator:
+    def __init__(self, expected, tolerance=None):
+        self.expected = expected.strip()
+        self.pos = 0
+        self.started = False
+        self.ok = True
+
+    def feed(self, text):
+        if not self.ok:
+            return False
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return True
+            self.started = True
+        if self.pos < len(self.expected):
+            n = min(len(text), len(self.expected) - self.pos)
+            if text[:n] != self.expected[self.pos:self.pos + n]:
+                # Leave pos on the first character that differs
+                self.pos += next(i for i in range(n) if text[i] != self.expected[self.pos + i])
+                self.ok = False
+                return False
+            self.pos += n
+            text = text[n:]
+        # Past the end of the expected output only trailing whitespace may follow
+        if text and not text.isspace():
+            self.ok = False
+        return self.ok
+
+    def finish(self):
+        if self.pos < len(self.expected):
+            self.ok = False
+        return self.ok
+
+    def divergence(self):
+        # pos counts characters of the stripped expected output; report it as line and column
+        if self.ok:
+            return None
+        line = self.expected.count('\n', 0, self.pos) + 1
+        column = self.pos - (self.expected.rfind('\n', 0, self.pos) + 1) + 1
+        return f'line {line}, column {column}'
+
+
+class LineComparator:
+    def __init__(self, expected, tolerance=None):
+        lines = [line.rstrip() for line in expected.splitlines()]
+        while lines and not lines[-1]:
+            lines.pop()
+        while lines and not lines[0]:
+            lines.pop(0)
+        self.expected = lines
+        self.index = 0
+        self.partial = ''
+        self.blank_run = 0
+        self.started = False
+        self.ok = True
+
+    def _line(self, line):
+        line = line.rstrip()
+        if not line:
+            # Blank lines only count once something follows them
+            if self.started:
+                self.blank_run += 1
+            return
+        self.started = True
+        for got in [''] * self.blank_run + [line]:
+            if self.index >= len(self.expected) or self.expected[self.index] != got:
+                self.ok = False
+                return
+            self.index += 1
+        self.blank_run = 0
+
+    def feed(self, text):
+        if not self.ok:
+            return False
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self._line(line)
+            if not self.ok:
+                return False
+        head = self.partial.rstrip()
+        if head:
+            # The line being written must start its expected line, after the blank lines before it
+            target = self.index + self.blank_run
+            for i in range(self.index, min(target, len(self.expected))):
+                if self.expected[i]:
+                    self.index = i
+                    self.ok = False
+                    return False
+            if target >= len(self.expected) or not self.expected[target].startswith(head):
+                self.index = target
+                self.ok = False
+        return self.ok
+
+    def finish(self):
+        if self.ok and self.partial:
+            self._line(self.partial)
+            self.partial = ''
+        if self.index < len(self.expected):
+            self.ok = False
+        return self.ok
+
+    def divergence(self):
+        # index is the (0-based) expected line the output failed on
+        return None if self.ok else f'line {self.index + 1}'
+
+
+class TokenComparator:
+    def __init__(self, expected, tolerance=None):
+        self.expected = expected.split()
+        self.index = 0
+        self.partial = ''
+        self.ok = True
+
+    def tokens_match(self, got, expected):
+        return got == expected
+
+    def could_extend(self, partial, expected):
+        return expected.startswith(partial)
+
+    def _token(self, token):
+        if self.index >= len(self.expected) or not self.tokens_match(token, self.expected[self.index]):
+            self.ok = False
+            return
+        self.index += 1
+
+    def feed(self, text):
+        if not self.ok:
+            return False
+        data = self.partial + text
+        tokens = data.split()
+        self.partial = tokens.pop() if tokens and not data[-1].isspace() else ''
+        for token in tokens:
+            self._token(token)
+            if not self.ok:
+                return False
+        if self.partial and (self.index >= len(self.expected) or
+                             not self.could_extend(self.partial, self.expected[self.index])):
+            self.ok = False
+        return self.ok
+
+    def finish(self):
+        if self.ok and self.partial:
+            self._token(self.partial)
+            self.partial = ''
+        if self.index < len(self.expected):
+            self.ok = False
+        return self.ok
+
+    def divergence(self):
+        return None if self.ok else f'token {self.index + 1}'
+
+
+class FloatComparator(TokenComparator):
+    def __init__(self, expected, tolerance=None):
+        super().__init__(expected)
+        self.tolerance = 1e-6 if tolerance is None else float(tolerance)
+
+    @staticmethod
+    def _number(token):
+        try:
+            value = float(token)
+        except ValueError:
+            return None
+        return value if math.isfinite(value) else None
+
+    def tokens_match(self, got, expected):
+        a, b = self._number(got), self._number(expected)
+        if a is None or b is None:
+            return got == expected
+        return abs(a - b) <= self.tolerance * max(1.0, abs(b))
+
+    def could_extend(self, partial, expected):
+        # "3.1" may still become "3.14159"; numbers are only judged once complete
+        if self._number(expected) is not None:
+            return True
+        return expected.startswith(partial)
+
+
+COMPARATORS = {
+    'exact': ExactComparator,
+    'whitespace': LineComparator,
+    'tokens': TokenComparator,
+    'float': FloatComparator,
+}
+
+
+def make_comparator(mode, expected, tolerance=None):
+    """
+    Build the comparator for mode (a COMPARATORS key) against the expected output.
+    """
+    try:
+        cls = COMPARATORS[mode or 'exact']
+    except KeyError:
+        raise ValueError(f'unknown compare mode {mode!r} (expected one of {", ".join(COMPARATORS)})')
+    return cls(expected or '', tolerance)
+
+
+def outputs_match(mode, expected, got, tolerance=None):
+    """
+    Compare a complete output in one go.
+    """
+    return first_divergence(mode, expected, got, tolerance) is None
+
+
+def first_divergence(mode, expected, got, tolerance=None):
+    """
+    Compare a complete output in one go. Returns None when it matches, else where it first
+    differs (see the comparators' divergence()).
+    """
+    comparator = make_comparator(mode, expected, tolerance)
+    if comparator.feed(got or '') and comparator.finish():
+        return None
+    return comparator.divergence()
@@ -0,0 +1,230 @@
+# zombie_code_survival/compile_cache.py
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+# fcntl is POSIX-only; without it eviction simply runs unlocked
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def normalize_source(code_str):
+    """
+    Normalize submitted source so that textually identical programs share a cache key.
+    Browsers post textarea content with CRLF line endings while the generator uses LF,
+    so line endings are unified and trailing whitespace at the end of the file is dropped.
+    """
+    source = (code_str or "").replace("\r\n", "\n").replace("\r", "\n")
+    return source.rstrip() + "\n"
+
+
+@functools.lru_cache(maxsize=None)
+def toolchain_version(compiler="g++"):
+    """
+    Return a string identifying the compiler build (version + target), or None if it cannot be run.
+    """
+    try:
+        version = subprocess.run([compiler, "-dumpfullversion", "-dumpversion"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, timeout=5, text=True)
+        machine = subprocess.run([compiler, "-dumpmachine"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, timeout=5, text=True)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if version.returncode != 0:
+        return None
+    return f"{compiler} {version.stdout.strip()} {machine.stdout.strip()}"
+
+
+class CompileCache:
+    """
+    On-disk, content-addressed cache of compile results.
+
+    Entries are keyed by sha256(toolchain version, compiler flags, normalized source) and stored as
+    either a built binary (<key>.bin) or the compiler diagnostics of a failed build (<key>.json).
+    Files are published read-only with os.replace so concurrent workers never observe partial
+    entries, and hits are copied into the caller's work directory: the submission never gets a
+    link to the shared entry it could write through. Total size is capped with LRU eviction on
+    file mtime, which is bumped on every hit. Each process keeps a running estimate of the cache
+    size and only rescans the directory once that goes over max_bytes, or every RESCAN_INTERVAL
+    seconds to pick up what other workers stored.
+    """
+
+    RESCAN_INTERVAL = 60.0
+
+    def __init__(self, app=None):
+        self.root = None
+        self.max_bytes = 0
+        self._approx_bytes = None
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        root = app.config.get('COMPILE_CACHE_DIR')
+        self.max_bytes = int(app.config.get('COMPILE_CACHE_MAX_BYTES') or 0)
+        if not root or self.max_bytes <= 0:
+            self.root = None
+            return
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._approx_bytes = None
+        app.extensions['compile_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.root is not None
+
+    def key(self, source, flags, compiler="g++"):
+        if not self.enabled:
+            return None
+        version = toolchain_version(compiler)
+        if version is None:
+            return None
+        h = hashlib.sha256()
+        for part in (version, "\0".join(flags), source):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0\0")
+        return h.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def load(self, key, exe_path):
+        """
+        Look up a compile result. On a binary hit the binary is copied to exe_path.
+        Returns a compile-phase result dict, or None on a miss.
+        """
+        if key is None:
+            return None
+        bin_path = self._path(key, ".bin")
+        try:
+            # An open entry survives eviction, so the copy never sees a half-removed file
+            with open(bin_path, "rb") as src:
+                try:
+                    os.unlink(exe_path)
+                except FileNotFoundError:
+                    pass
+                with open(exe_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            os.chmod(exe_path, 0o755)
+            self._touch(bin_path)
+            return {'success': True, 'phase': 'compile', 'stdout': '', 'stderr': ''}
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return None
+
+        diag_path = self._path(key, ".json")
+        try:
+            with open(diag_path, "r", encoding="utf-8") as f:
+                diagnostics = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(diag_path)
+        return {'success': False, 'phase': 'compile',
+                'stdout': diagnostics.get('stdout', ''), 'stderr': diagnostics.get('stderr', '')}
+
+    def store(self, key, result, exe_path=None):
+        """
+        Publish a finished compile. Successful results store the binary at exe_path,
+        failed results store the diagnostics. Errors are swallowed: the cache is best-effort.
+        """
+        if key is None:
+            return
+        try:
+            shard = os.path.join(self.root, key[:2])
+            os.makedirs(shard, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=shard)
+            try:
+                if result['success']:
+                    with os.fdopen(fd, "wb") as dst, open(exe_path, "rb") as src:
+                        shutil.copyfileobj(src, dst)
+                    path = self._path(key, ".bin")
+                else:
+                    with os.fdopen(fd, "w", encoding="utf-8") as dst:
+                        json.dump({'stdout': result.get('stdout', ''), 'stderr': result.get('stderr', '')}, dst)
+                    path = self._path(key, ".json")
+                os.chmod(tmp_path, 0o444)
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            due = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                   or time.monotonic() - self._last_scan >= self.RESCAN_INTERVAL)
+        if due:
+            self.evict()
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache is back under 90% of max_bytes.
+        Only one process evicts at a time; others skip rather than wait.
+        """
+        if not self.enabled:
+            return
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(os.path.join(self.root, ".lock"), "a")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return
+
+            entries = []
+            total = 0
+            for shard in os.scandir(self.root):
+                if not shard.is_dir() or shard.name.startswith("."):
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+
+            if total > self.max_bytes:
+                target = int(self.max_bytes * 0.9)
+                for _, size, path in sorted(entries):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= target:
+                        break
+            with self._lock:
+                self._approx_bytes = total
+                self._last_scan = time.monotonic()
+        except OSError:
+            pass
+        finally:
+            if lock_file is not None:
+                lock_file.close()
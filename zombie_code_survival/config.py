@@ -1,5 +1,6 @@
 # zombie_code_survival/config.py
 import os
+import tempfile
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -8,3 +9,97 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite tuning for several writer processes: WAL journal, busy timeout, and retries of
+    # "database is locked" in persistence.transaction()
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') != '0'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    DB_RETRY_ATTEMPTS = int(os.environ.get('DB_RETRY_ATTEMPTS') or 5)
+    DB_RETRY_BACKOFF = float(os.environ.get('DB_RETRY_BACKOFF') or 0.05)
+    LEADERBOARD_PAGE_SIZE = int(os.environ.get('LEADERBOARD_PAGE_SIZE') or 50)
+    # Stamp file touched when a survivor finishes; defaults to one per database in the temp dir
+    LEADERBOARD_STAMP = os.environ.get('LEADERBOARD_STAMP')
+    # Rendered leaderboard pages kept per worker (least recently used out first)
+    LEADERBOARD_CACHE_PAGES = int(os.environ.get('LEADERBOARD_CACHE_PAGES') or 64)
+
+    # Challenge content: a pack built with `python -m zombie_code_survival.packtool build`,
+    # re-checked for a new version at most every CHALLENGE_PACK_RELOAD_INTERVAL seconds (0 disables).
+    # Without the file the challenges come straight from DebugGenerator.
+    CHALLENGE_PACK = os.environ.get('CHALLENGE_PACK', os.path.join(basedir, 'challenges.pack'))
+    CHALLENGE_PACK_RELOAD_INTERVAL = float(os.environ.get('CHALLENGE_PACK_RELOAD_INTERVAL', 5))
+
+    # Content-addressed compile cache shared by all workers on the host (empty dir or 0 bytes disables it)
+    COMPILE_CACHE_DIR = os.environ.get('COMPILE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'zombie-compile-cache'))
+    COMPILE_CACHE_MAX_BYTES = int(os.environ.get('COMPILE_CACHE_MAX_BYTES') or 256 * 1024 * 1024)
+
+    # Precompiled headers for the catalog's standard-header sets, built in the background at startup
+    PCH_ENABLED = os.environ.get('PCH_ENABLED', '1') != '0'
+    PCH_DIR = os.environ.get('PCH_DIR', os.path.join(tempfile.gettempdir(), 'zombie-pch'))
+
+    # Asynchronous submissions: the challenge page enqueues jobs for a pool of judge threads
+    # and polls for the verdict. With it off (or without JavaScript) the form posts synchronously.
+    JUDGE_ASYNC = os.environ.get('JUDGE_ASYNC', '1') != '0'
+    JUDGE_WORKERS = int(os.environ.get('JUDGE_WORKERS') or os.cpu_count() or 1)
+    JUDGE_MAX_PENDING = int(os.environ.get('JUDGE_MAX_PENDING') or 4 * JUDGE_WORKERS)
+
+    # How test-case output is compared for levels that set no mode of their own
+    # (exact, whitespace, tokens or float; see compare.py and ChallengeData.compare)
+    JUDGE_COMPARE = os.environ.get('JUDGE_COMPARE') or 'exact'
+    JUDGE_FLOAT_TOLERANCE = float(os.environ.get('JUDGE_FLOAT_TOLERANCE') or 1e-6)
+
+    # Append-only JSON-lines log of judged submissions, replayable with replay.py. Off unless set;
+    # a relative path is taken from the app's instance folder. Past SUBMISSION_LOG_MAX_BYTES the
+    # file is rotated to <path>.1 (replacing the previous one). SUBMISSION_LOG_SOURCE=hash keeps
+    # only a hash of each source instead of the compressed code.
+    SUBMISSION_LOG = os.environ.get('SUBMISSION_LOG')
+    SUBMISSION_LOG_SOURCE = os.environ.get('SUBMISSION_LOG_SOURCE') or 'compressed'
+    SUBMISSION_LOG_MAX_BYTES = int(os.environ.get('SUBMISSION_LOG_MAX_BYTES') or 64 * 1024 * 1024)
+    # Characters of the player's own stdin kept per record (it is never graded)
+    SUBMISSION_LOG_MAX_STDIN = int(os.environ.get('SUBMISSION_LOG_MAX_STDIN') or 4096)
+
+    # Check submissions compile with the fast -O0 profile first and judge those that do at -O2
+    # (judge.judge_submission). Off by default: every compiling submission is then built twice,
+    # about 1.8x the compile time of judging from the -O2 build alone
+    JUDGE_TIERED_PROFILES = os.environ.get('JUDGE_TIERED_PROFILES', '0') != '0'
+
+    # Host-wide admission control for compile/run jobs (defaults: one slot per CPU, queue of 4x that)
+    ADMISSION_DIR = os.environ.get('ADMISSION_DIR', os.path.join(tempfile.gettempdir(), 'zombie-admission'))
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT') or os.cpu_count() or 1)
+    ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE') or 4 * ADMISSION_MAX_CONCURRENT)
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT') or 10)
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER') or 5)
+
+    # Reusable judge work directories, on RAM-backed /dev/shm unless it is missing or noexec
+    WORKSPACE_ROOT = os.environ.get('WORKSPACE_ROOT') or '/dev/shm'
+    WORKSPACE_POOL_SIZE = int(os.environ.get('WORKSPACE_POOL_SIZE') or os.cpu_count() or 1)
+
+    # Per-survivor (per-IP when anonymous) submission token bucket, shared by all workers
+    # through a small SQLite file; an empty RATE_LIMIT_DB turns it off
+    RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'zombie-ratelimit.db'))
+    RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST') or 5)
+    RATE_LIMIT_REFILL = float(os.environ.get('RATE_LIMIT_REFILL') or 0.5)
+
+    # Pre-started runner daemon (runner.py) that launches submissions over a Unix socket;
+    # the socket defaults to runner.sock in the app's private instance folder (empty: no daemon)
+    RUNNER_SOCKET = os.environ.get('RUNNER_SOCKET')
+    RUNNER_AUTOSTART = os.environ.get('RUNNER_AUTOSTART', '1') != '0'
+    RUNNER_MAX_JOBS = int(os.environ.get('RUNNER_MAX_JOBS') or os.cpu_count() or 1)
+    # Bytes of stdout and of stderr kept per run; the program is killed once either goes over
+    RUN_MAX_OUTPUT = int(os.environ.get('RUN_MAX_OUTPUT') or 64 * 1024)
+
+    # Server-side execution results (the session only keeps the id of the last run)
+    RESULT_MAX_CHARS = int(os.environ.get('RESULT_MAX_CHARS') or 64 * 1024)
+    RESULT_TTL = int(os.environ.get('RESULT_TTL') or 3600)
+    RESULT_EVICT_INTERVAL = int(os.environ.get('RESULT_EVICT_INTERVAL') or 60)
+
+    # Cache lifetime of fingerprinted static assets (assettool.py build)
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE') or 365 * 24 * 3600)
+
+    # Prometheus-text /metrics endpoint (per worker process)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+    # Per-survivor challenge variants, pre-generated and verified by a background process pool
+    VARIANTS_ENABLED = os.environ.get('VARIANTS_ENABLED', '1') != '0'
+    VARIANT_POOL_TARGET = int(os.environ.get('VARIANT_POOL_TARGET') or 5)
+    VARIANT_WORKERS = int(os.environ.get('VARIANT_WORKERS') or 1)
+    VARIANT_REFILL_INTERVAL = float(os.environ.get('VARIANT_REFILL_INTERVAL') or 30)
@@ -1,7 +1,9 @@
 # zombie_code_survival/debug_generator.py
+import random
+import re
 import textwrap
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
 
 @dataclass
 class ChallengeData:
@@ -10,12 +12,119 @@ class ChallengeData:
     error_type: str
     expected_output: str
     title: str
+    # (stdin, expected stdout) pairs; empty means a single case with no stdin and expected_output
+    test_cases: List[Tuple[str, str]] = field(default_factory=list)
+    # How output is compared (a compare.COMPARATORS mode) and the float tolerance; None uses the site default
+    compare: Optional[str] = None
+    tolerance: Optional[float] = None
+
+    def get_test_cases(self):
+        return list(self.test_cases) or [("", str(self.expected_output))]
+
+# Rough C++ lexer for variants: literals, comments and preprocessor lines are kept verbatim
+_TOKEN = re.compile(r'''
+    (?P<skip>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|//[^\n]*|/\*.*?\*/|\#[^\n]*)
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<other>\s+|.)
+''', re.S | re.X)
+
+_DECL_TYPES = {'int', 'long', 'short', 'unsigned', 'double', 'float', 'char', 'bool', 'string', 'auto', 'void', 'size_t'}
+_NUMERIC_DECL_TYPES = {'int', 'long', 'short', 'unsigned'}
+_VARIANT_NAMES = ['horde', 'bunker', 'ammo', 'medkit', 'walker', 'scout', 'radio', 'shelter', 'outpost', 'supply',
+                  'crawler', 'beacon', 'ration', 'barricade', 'flare', 'convoy', 'patrol', 'antidote', 'fuel', 'relay']
+
+
+def _tokens(source):
+    return [(m.lastgroup, m.group()) for m in _TOKEN.finditer(source)]
+
+
+def _code(tokens):
+    # (index, kind, text) of tokens that are code, skipping whitespace
+    return [(i, kind, text) for i, (kind, text) in enumerate(tokens) if kind != 'skip' and not text.isspace()]
+
+
+def _declared_names(tokens):
+    """
+    Names the program declares itself (variables, parameters, functions), minus main and any
+    name also used as a member (.size, ->next) or qualified (std::x), which renaming would break.
+    """
+    code = _code(tokens)
+    declared, unsafe = set(), {'main'}
+    statement_type, depth = None, 0
+    for pos, (_, kind, text) in enumerate(code):
+        before = [t for _, _, t in code[max(0, pos - 3):pos]]
+        if text in (';', '{', '}'):
+            statement_type, depth = None, 0
+        elif text in ('(', ')'):
+            depth += 1 if text == '(' else -1
+        if kind != 'ident':
+            continue
+        if statement_type is None:
+            statement_type = text
+        if before[-1:] == ['.'] or before[-2:] in (['-', '>'], [':', ':']):
+            unsafe.add(text)
+            continue
+        back = pos - 1
+        while back >= 0 and code[back][2] in ('*', '&'):
+            back -= 1
+        type_token = code[back][2] if back >= 0 else ''
+        if (type_token in _DECL_TYPES
+                # vector<int> v
+                or (type_token == '>' and back >= 2 and code[back - 2][2] == '<')
+                # int a = 1, b = 2;
+                or (type_token == ',' and depth == 0 and statement_type in _DECL_TYPES)):
+            declared.add(text)
+    return declared - unsafe
+
+
+def _declared_constants(tokens):
+    """
+    Keys of the integer constants a variant may change: ('init', name, value) for
+    `int name = value` style declarations and ('list', values, index) for brace initializers.
+    """
+    code = _code(tokens)
+    keys = {}
+    statement_type = None
+    for pos, (index, kind, text) in enumerate(code):
+        if text in (';', '{', '}'):
+            statement_type = None
+            if text == '{':
+                end = pos + 1
+                while end < len(code) and (code[end][1] == 'number' or code[end][2] == ','):
+                    end += 1
+                values = tuple(t for _, k, t in code[pos + 1:end] if k == 'number')
+                if values and end < len(code) and code[end][2] == '}' and pos and code[pos - 1][2] in ('=', ']'):
+                    for n, (number_index, _, _) in enumerate(t for t in code[pos + 1:end] if t[1] == 'number'):
+                        keys[number_index] = ('list', values, n)
+            continue
+        if statement_type is None and kind == 'ident':
+            statement_type = text
+        if (kind == 'number' and '.' not in text and statement_type in _NUMERIC_DECL_TYPES and pos >= 2
+                and code[pos - 1][2] == '=' and code[pos - 2][1] == 'ident'
+                and pos + 1 < len(code) and code[pos + 1][2] in (';', ',')):
+            keys[index] = ('init', code[pos - 2][2], text)
+    return keys
+
+
+def _rewrite(source, renames, constants):
+    tokens = _tokens(source)
+    keys = _declared_constants(tokens)
+    out = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind == 'ident' and text in renames:
+            text = renames[text]
+        elif index in keys and keys[index] in constants:
+            text = str(constants[keys[index]])
+        out.append(text)
+    return ''.join(out)
+
 
 class DebugGenerator:
     """
     Produces 20 C++ debugging challenges.
     Each ChallengeData.expected_output is the exact stdout the correct program should produce.
-    If a challenge requires stdin for testing, the expected_output includes a note of the stdin value to use.
+    If a challenge reads stdin, its test_cases list the (stdin, expected stdout) pairs it is judged on.
     """
 
     def generate_1_missing_semicolon(self):
@@ -24,7 +133,6 @@ class DebugGenerator:
             using namespace std;
 
             int main() {
-                cout << "Survivors: ";
                 int s
                 cin >> s;
                 cout << "Survivors: " << s << endl;
@@ -36,15 +144,14 @@ class DebugGenerator:
             using namespace std;
 
             int main() {
-                cout << "Survivors: ";
                 int s;
                 cin >> s;
                 cout << "Survivors: " << s << endl;
                 return 0;
             }
         ''')
-        # Test: stdin = "5" -> expected output "Survivors: 5\n"
-        return ChallengeData(buggy_code, solution, "syntax", "Survivors: 5", "Missing semicolon (syntax)")
+        test_cases = [("5", "Survivors: 5"), ("42", "Survivors: 42"), ("0", "Survivors: 0")]
+        return ChallengeData(buggy_code, solution, "syntax", "Survivors: 5", "Missing semicolon (syntax)", test_cases)
 
     def generate_2_off_by_one_sum(self):
         buggy_code = textwrap.dedent(r'''
@@ -208,8 +315,8 @@ class DebugGenerator:
                 return 0;
             }
         ''')
-        # Will print "2.5" (note: string comparison expects "2.5")
-        return ChallengeData(buggy_code, solution, "logic", "2.5", "Integer division -> float (logic)")
+        # Will print "2.5"; compared as a number, so "2.50" or "2.500000" pass too
+        return ChallengeData(buggy_code, solution, "logic", "2.5", "Integer division -> float (logic)", compare='float')
 
     def generate_8_array_index_order(self):
         buggy_code = textwrap.dedent(r'''
@@ -614,6 +721,45 @@ class DebugGenerator:
         # For minutes=90 expected "1:30"
         return ChallengeData(buggy_code, solution, "format", "1:30", "Output formatting (format)")
 
+    def generate_variant(self, data: ChallengeData, seed: Optional[int]) -> ChallengeData:
+        """
+        Return a seeded variant of a challenge: the program's own identifiers renamed, its integer
+        constants (scalar `int x = N` initializers and brace-initializer lists) changed, and the
+        numbers in each test case's stdin replaced. The same seed always gives the same variant;
+        seed None returns the challenge unchanged.
+
+        Expected outputs are carried over from data and are NOT valid for the new program; run
+        the solution to record them (variants.build_variant does).
+        """
+        if seed is None:
+            return replace(data, test_cases=data.get_test_cases())
+        rng = random.Random(seed)
+        buggy_tokens, solution_tokens = _tokens(data.buggy_code), _tokens(data.solution)
+        existing = {text for kind, text in buggy_tokens + solution_tokens if kind == 'ident'}
+
+        renames = {}
+        pool = [name for name in _VARIANT_NAMES if name not in existing]
+        rng.shuffle(pool)
+        for name in sorted(_declared_names(buggy_tokens) & _declared_names(solution_tokens)):
+            if not pool:
+                break
+            renames[name] = pool.pop()
+
+        constants = {}
+        for key in sorted(set(_declared_constants(buggy_tokens).values()) | set(_declared_constants(solution_tokens).values())):
+            value = int(key[2] if key[0] == 'init' else key[1][key[2]])
+            if value:
+                constants[key] = rng.randint(max(1, value // 2), value * 2 + 1)
+
+        test_cases = []
+        for stdin, expected in data.get_test_cases():
+            stdin = re.sub(r'\d+', lambda m: m.group() if m.group() == '0' else str(rng.randint(1, max(9, 2 * int(m.group())))),
+                           stdin)
+            test_cases.append((stdin, expected))
+
+        return replace(data, buggy_code=_rewrite(data.buggy_code, renames, constants),
+                       solution=_rewrite(data.solution, renames, constants), test_cases=test_cases)
+
     def generate_all_challenges(self) -> Dict[int, ChallengeData]:
         """
         Return a mapping from level number (1..20) to ChallengeData.
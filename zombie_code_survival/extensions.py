@@ -1,3 +1,33 @@
 from flask_sqlalchemy import SQLAlchemy
+from .compile_cache import CompileCache
+from .pch import PrecompiledHeaders
+from .judge_pool import JudgePool
+from .admission import AdmissionController
+from .sandbox import SandboxRunner
+from .leaderboard_cache import LeaderboardCache
+from .result_store import ResultStore
+from .metrics import Metrics
+from .persistence import SQLitePersistence
+from .challenge_pack import ChallengePack
+from .variants import VariantPool
+from .assets import Assets
+from .ratelimit import RateLimiter
+from .workspace import WorkspacePool
+from .submission_log import SubmissionLog
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+compile_cache = CompileCache()
+pch = PrecompiledHeaders()
+judge_pool = JudgePool()
+admission = AdmissionController()
+sandbox_runner = SandboxRunner()
+leaderboard_cache = LeaderboardCache()
+result_store = ResultStore()
+metrics = Metrics()
+persistence = SQLitePersistence()
+challenge_pack = ChallengePack()
+variant_pool = VariantPool()
+assets = Assets()
+rate_limiter = RateLimiter()
+workspace_pool = WorkspacePool()
+submission_log = SubmissionLog()
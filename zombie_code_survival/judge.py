@@ -0,0 +1,347 @@
+# zombie_code_survival/judge.py
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy.exc import OperationalError
+from .compare import first_divergence
+from .compile_cache import normalize_source
+from .extensions import db, compile_cache, pch, admission, sandbox_runner, leaderboard_cache, metrics, persistence, workspace_pool
+from .models import CatalogChallenge, Challenge, LeaderboardEntry, LevelStats
+
+COMPILER = "g++"
+COMPILE_PROFILES = {
+    # Every click: no optimisation, pipes between the compiler stages, the fastest linker around
+    'interactive': {'flags': ["-std=c++17", "-O0", "-pipe"], 'fast_linker': True},
+    # What counts toward solving, and what the catalog is verified with
+    'verify': {'flags': ["-std=c++17", "-O2"], 'fast_linker': False},
+}
+COMPILE_FLAGS = COMPILE_PROFILES['verify']['flags']
+
+@functools.lru_cache(maxsize=None)
+def _fast_linker_flags(compiler):
+    # mold, then lld, then gold instead of the default BFD ld, if the compiler can drive it
+    for name in ('mold', 'lld', 'gold'):
+        if shutil.which(f'ld.{name}') is None:
+            continue
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'probe.cpp'), 'w', encoding='utf-8') as f:
+                f.write('int main() { return 0; }\n')
+            try:
+                proc = subprocess.run([compiler, f'-fuse-ld={name}', 'probe.cpp', '-o', 'probe'], cwd=tmpdir,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+        if proc.returncode == 0:
+            return (f'-fuse-ld={name}',)
+    return ()
+
+def _setting(name, default=None):
+    # The judge also runs from tools' worker threads, outside any app context
+    return current_app.config.get(name, default) if has_app_context() else default
+
+def compile_flags(profile='verify'):
+    """
+    The g++ flags of a compile profile (see COMPILE_PROFILES).
+    """
+    spec = COMPILE_PROFILES[profile]
+    return list(spec['flags']) + (list(_fast_linker_flags(COMPILER)) if spec['fast_linker'] else [])
+
+def judge_submission(code_str, test_cases, custom_stdin=None, compile_timeout=5, run_timeout=2, tiered=None, compare=None):
+    """
+    Judge a challenge submission from a single verify build (run_test_cases, profile 'verify').
+    tiered=True (or JUDGE_TIERED_PROFILES on) first builds the source with the fast interactive
+    profile and stops there on a compile error. Code that compiles is then built again at -O2
+    and every verdict comes from that build, so nothing ever rests on an unoptimised binary
+    whose undefined behaviour could run differently; the extra -O0 build makes a compiling
+    submission's compile phase roughly 1.8x as long, which is why it is off by default.
+    compare is passed on to run_test_cases.
+    Returns the run_test_cases dict, with the timings of both builds added up when tiered.
+    """
+    if tiered is None:
+        tiered = _setting('JUDGE_TIERED_PROFILES', False)
+    if not tiered:
+        return run_test_cases(code_str, test_cases, custom_stdin, compile_timeout, run_timeout, profile='verify',
+                              compare=compare)
+    timings = {'compile': 0.0, 'compile_cached': False, 'run': 0.0, 'profile': 'interactive'}
+    # One admission slot for the whole job: both builds and every run
+    with workspace_pool.checkout() as (tmpdir, exe_path), admission.slot():
+        failed = _compile(normalize_source(code_str), tmpdir, exe_path, compile_timeout, timings,
+                          compile_flags('interactive'))
+        if failed is not None:
+            failed.update(cases_total=len(test_cases), failed_case=None, timings=timings)
+            return record_judge_metrics(failed)
+        _record_compile_metrics(timings)
+        result = _judge(code_str, test_cases, custom_stdin, compile_timeout, run_timeout, 'verify', compare,
+                        tmpdir, exe_path)
+    result['timings'] = {
+        'compile': timings['compile'] + result['timings']['compile'],
+        'compile_cached': timings['compile_cached'] and result['timings']['compile_cached'],
+        'run': result['timings']['run'],
+        'profile': 'interactive+verify',
+    }
+    return result
+
+def run_test_cases(code_str, test_cases, custom_stdin=None, compile_timeout=5, run_timeout=2, profile='verify',
+                   compare=None):
+    """
+    Compile C++ code once with the flags of a compile profile and run the binary against every
+    (stdin, expected stdout) test case concurrently, each with its own run_timeout. The whole job
+    holds one admission slot, taken before any work starts, so it raises AdmissionRejected only
+    up front when the judge is saturated and is never shed halfway through. No new case is
+    started after the first failure.
+    Compile results are looked up in the content-addressed compile cache first, so a source that
+    has been built before goes straight to the run phase. Cache misses use a precompiled header
+    when one covers the submission's includes.
+    The binary is launched by the sandbox runner daemon when it is available, otherwise by a
+    one-shot runner.py spawned for the job; either applies preexec_fn=limit_resources on POSIX
+    systems, never in this threaded process. On Windows, preexec_fn isn't used (not supported) and
+    resource limits are not enforced here. Program output is capped at RUN_MAX_OUTPUT bytes per stream.
+    Output is compared while it streams and a run is killed as soon as its output can no longer
+    match. compare is the level's (mode, tolerance) (see compare.py); either left None falls back
+    to JUDGE_COMPARE / JUDGE_FLOAT_TOLERANCE.
+    An optional custom_stdin run (the player's own input) goes along in the same batch, ungraded.
+    Returns a dict for the output worth showing (the first failing case, else the custom run,
+    else case 1): { success: bool, phase: 'compile'|'run', stdout: str, stderr: str,
+    timings: { compile: seconds, compile_cached: bool, run: seconds, profile: str },
+    cases_total: int, failed_case: None or { index, stdin, expected, got, reason, divergence } }
+    where success means every case passed, reason is 'mismatch' | 'runtime' | 'timeout' |
+    'output_limit' and divergence says where a mismatching output first differed (None
+    otherwise); output_limit_exceeded / timed_out are True when the shown program was killed for
+    either reason.
+    timings.run is the wall time of the whole batch of runs. Challenge views go through
+    judge_submission, which picks the profile.
+    """
+    with workspace_pool.checkout() as (tmpdir, exe_path), admission.slot():
+        return _judge(code_str, test_cases, custom_stdin, compile_timeout, run_timeout, profile, compare,
+                      tmpdir, exe_path)
+
+def _judge(code_str, test_cases, custom_stdin, compile_timeout, run_timeout, profile, compare, tmpdir, exe_path):
+    # run_test_cases in a workspace the caller has checked out, under its admission slot
+    timings = {'compile': 0.0, 'compile_cached': False, 'run': 0.0, 'profile': profile}
+    failed = _compile(normalize_source(code_str), tmpdir, exe_path, compile_timeout, timings, compile_flags(profile))
+    if failed is not None:
+        failed.update(cases_total=len(test_cases), failed_case=None, timings=timings)
+        return record_judge_metrics(failed)
+
+    started = time.perf_counter()
+    outcomes = {}
+    mode, tolerance = compare or (None, None)
+    compare = (mode or _setting('JUDGE_COMPARE') or 'exact',
+               tolerance if tolerance is not None else _setting('JUDGE_FLOAT_TOLERANCE'))
+    workers = max(1, min(len(test_cases) + bool(custom_stdin), sandbox_runner.max_jobs))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='judge-case') as pool:
+        custom = pool.submit(_run, exe_path, tmpdir, custom_stdin, run_timeout) if custom_stdin else None
+        futures = {pool.submit(_run, exe_path, tmpdir, stdin, run_timeout, expected, compare): (index, stdin, expected)
+                   for index, (stdin, expected) in enumerate(test_cases, start=1)}
+        try:
+            for future in as_completed(futures):
+                index, stdin, expected = futures[future]
+                run = future.result()
+                outcomes[index] = (run, _case_failure(run, stdin, expected, index, compare))
+                if outcomes[index][1] is not None:
+                    break
+            custom_run = custom.result() if custom is not None else None
+        finally:
+            for pending in futures:
+                pending.cancel()
+    timings['run'] = time.perf_counter() - started
+
+    failures = [outcomes[i] for i in sorted(outcomes) if outcomes[i][1] is not None]
+    if failures:
+        shown, failed_case = failures[0]
+    else:
+        shown, failed_case = custom_run or outcomes[1][0], None
+    result = dict(shown)
+    result.update(success=failed_case is None, cases_total=len(test_cases), failed_case=failed_case, timings=timings)
+    return record_judge_metrics(result)
+
+def record_judge_metrics(result):
+    """
+    Count a finished run_test_cases / judge_submission result in /metrics and return it.
+    """
+    timings = result['timings']
+    _record_compile_metrics(timings)
+    if result['phase'] == 'run':
+        metrics.observe('zombie_run_duration_seconds', timings['run'])
+    metrics.inc('zombie_judge_results_total', phase=result['phase'], success=str(bool(result['success'])).lower())
+    failed = result.get('failed_case')
+    if result.get('timed_out') or (failed is not None and failed['reason'] == 'timeout'):
+        metrics.inc('zombie_judge_timeouts_total', phase=result['phase'])
+    return result
+
+def _record_compile_metrics(timings):
+    cached = timings['compile_cached']
+    metrics.observe('zombie_compile_duration_seconds', timings['compile'], cached=str(cached).lower(),
+                    profile=timings['profile'])
+    if compile_cache.enabled:
+        metrics.inc('zombie_cache_requests_total', cache='compile', result='hit' if cached else 'miss')
+
+def _case_failure(run, stdin, expected, index, compare=('exact', None)):
+    got = (run.get('stdout') or "").strip()
+    divergence = None
+    if run.get('output_limit_exceeded'):
+        reason = 'output_limit'
+    elif run.get('timed_out'):
+        reason = 'timeout'
+    elif run.get('diverged'):
+        reason, divergence = 'mismatch', run.get('divergence')
+    elif not run['success']:
+        reason = 'runtime'
+    else:
+        matched, divergence = _output_matches(run, expected, compare)
+        if matched:
+            return None
+        reason = 'mismatch'
+    return {'index': index, 'stdin': stdin, 'expected': (expected or "").strip(), 'got': got, 'reason': reason,
+            'divergence': divergence}
+
+def _compile(source, tmpdir, exe_path, compile_timeout, timings, flags):
+    """
+    Build source into exe_path (or reuse a cached build of the same source), recording
+    the compile time in timings. Returns a failed compile-phase result dict, or None when
+    exe_path is ready to run.
+    """
+    started = time.perf_counter()
+    try:
+        return _build(source, tmpdir, exe_path, compile_timeout, timings, flags)
+    finally:
+        timings['compile'] = time.perf_counter() - started
+
+def _build(source, tmpdir, exe_path, compile_timeout, timings, flags):
+    cache_key = compile_cache.key(source, flags, COMPILER)
+    cached = compile_cache.load(cache_key, exe_path)
+    if cached is not None:
+        timings['compile_cached'] = True
+        return None if cached['success'] else cached
+
+    with open(os.path.join(tmpdir, "submission.cpp"), "w", encoding="utf-8") as f:
+        f.write(source)
+
+    # Relative paths keep the temp dir out of diagnostics, so they can be cached and shown as-is
+    # Force-including a matching precompiled header skips re-parsing the standard headers
+    pch_flags = pch.flags_for(source, flags)
+    compile_cmd = [COMPILER, *flags, *pch_flags, "submission.cpp", "-o", os.path.basename(exe_path)]
+    try:
+        comp = subprocess.run(compile_cmd, cwd=tmpdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=compile_timeout, text=True)
+    except subprocess.TimeoutExpired:
+        return {'success': False, 'phase': 'compile', 'stdout': '', 'stderr': 'Compilation timed out.', 'timed_out': True}
+    except FileNotFoundError as e:
+        # g++ not installed or not in PATH
+        return {'success': False, 'phase': 'compile', 'stdout': '', 'stderr': f'g++ not found: {e}'}
+    result = {'success': comp.returncode == 0, 'phase': 'compile', 'stdout': comp.stdout or "", 'stderr': comp.stderr or ""}
+    compile_cache.store(cache_key, result, exe_path)
+    return None if result['success'] else result
+
+def _output_matches(run, expected, compare):
+    # (matched, divergence): the runner's streaming verdict when it gave one, else compare the captured output here
+    if run.get('matched') is not None:
+        return run['matched'], run.get('divergence')
+    mode, tolerance = compare
+    divergence = first_divergence(mode, (expected or "").strip(), run.get('stdout') or "", tolerance)
+    return divergence is None, divergence
+
+def _run(exe_path, tmpdir, stdin_data, run_timeout, expected=None, compare=None):
+    # Run the executable in the runner daemon, or a spawned one-shot runner, never a fork of this process
+    job = {'argv': [exe_path], 'stdin': stdin_data or '', 'timeout': run_timeout, 'cwd': tmpdir,
+           'max_output': sandbox_runner.max_output}
+    if compare is not None and (expected or "").strip():
+        job.update(expected=expected.strip(), compare=compare[0], tolerance=compare[1])
+    reply = sandbox_runner.run(job)
+    if reply is None:
+        reply = sandbox_runner.run_once(job)
+    return _run_result(reply, job['max_output'])
+
+def _run_result(reply, max_output):
+    if reply.get('error'):
+        return {'success': False, 'phase': 'run', 'stdout': '', 'stderr': f"Execution failed: {reply['error']}"}
+    if reply.get('timed_out'):
+        return {'success': False, 'phase': 'run', 'stdout': '', 'stderr': 'Execution timed out.', 'timed_out': True}
+    if reply.get('output_limit_exceeded'):
+        stderr = (reply.get('stderr') or '') + f'\nOutput limit exceeded: the program printed more than {max_output} bytes.'
+        return {'success': False, 'phase': 'run', 'stdout': reply.get('stdout') or '', 'stderr': stderr.lstrip('\n'),
+                'output_limit_exceeded': True}
+    if reply.get('diverged'):
+        stderr = (reply.get('stderr') or '') + '\nStopped early: the output no longer matched the expected output.'
+        return {'success': False, 'phase': 'run', 'stdout': reply.get('stdout') or '', 'stderr': stderr.lstrip('\n'),
+                'diverged': True, 'divergence': reply.get('divergence')}
+    return {'success': reply['returncode'] == 0, 'phase': 'run', 'stdout': reply.get('stdout') or "", 'stderr': reply.get('stderr') or "",
+            'matched': reply.get('matched'), 'divergence': reply.get('divergence')}
+
+def _shorten(text, limit=200):
+    # Verdict messages are flashed into the session cookie; full output lives in the result store
+    return text if len(text) <= limit else text[:limit] + '...'
+
+def grade_submission(survivor, challenge, result):
+    """
+    Turn a run_test_cases result into a verdict for this challenge, marking the
+    challenge (and the survivor's mission, once every level is solved) as complete.
+    Returns a dict: { category: 'correct'|'incorrect'|'info', message: str, finished: bool }
+    The level's analytics rollup counts the submission either way.
+    """
+    solved_before = bool(challenge.is_solved)
+    if result['phase'] == 'compile' and not result['success']:
+        _count_attempt(challenge.level, compile_error=True, solved_before=solved_before)
+        return {'category': 'incorrect', 'message': 'Compilation error. See compiler output below.', 'finished': False}
+
+    failed = result.get('failed_case')
+    if failed is not None:
+        _count_attempt(challenge.level, solved_before=solved_before)
+        where = f" on test case {failed['index']} of {result['cases_total']}" if result['cases_total'] > 1 else ''
+        stdin_note = f" (stdin: \"{_shorten(failed['stdin'], 40)}\")" if failed['stdin'] else ''
+        if failed['reason'] == 'output_limit':
+            message = f'Output limit exceeded{where}. Your program printed far more than expected.'
+        elif failed['reason'] == 'timeout':
+            message = f'Execution timed out{where}{stdin_note}.'
+        elif failed['reason'] == 'runtime':
+            message = f'Runtime error or non-zero exit{where}{stdin_note}. See stderr below.'
+        elif not failed['expected']:
+            return {'category': 'info', 'message': 'Run completed. No expected output configured for this level.', 'finished': False}
+        else:
+            at = f', first differing at {failed["divergence"]}' if failed.get('divergence') else ''
+            message = f'Output mismatch{where}{stdin_note}{at}. Expected: "{_shorten(failed["expected"])}", Got: "{_shorten(failed["got"])}"'
+        return {'category': 'incorrect', 'message': message, 'finished': False}
+
+    def record_solve():
+        # One transaction: the solved level, its rollup, and the finish when it was the last one.
+        # The progress row is upserted and only marked while still unsolved, so when the same
+        # level is solved by several requests at once exactly one of them counts it.
+        now = datetime.utcnow()
+        # Solve time runs from the survivor's previous solve, so it measures this level alone
+        started = max(filter(None, (Challenge.last_solve_time(survivor.id, challenge.level), challenge.start_time)))
+        Challenge.insert_missing(survivor.id, challenge.level, challenge.start_time)
+        marked = db.session.execute(
+            db.update(Challenge)
+            .where(Challenge.survivor_id == survivor.id, Challenge.level == challenge.level,
+                   Challenge.is_solved.isnot(True))
+            .values(is_solved=True, end_time=now)
+        ).rowcount
+        LevelStats.count_attempt(challenge.level, solved_before=not marked)
+        if not marked:
+            return False
+        LevelStats.count_solve(challenge.level, (now - started).total_seconds())
+        solved = Challenge.solved_levels(survivor.id)
+        survivor.solved_count = solved
+        if solved < CatalogChallenge.query.count() or survivor.end_time is not None:
+            return False
+        survivor.end_time = now
+        LeaderboardEntry.record(survivor)
+        return True
+
+    if persistence.transaction(record_solve):
+        leaderboard_cache.invalidate()
+        return {'category': 'correct', 'message': 'All systems restored! The cure has been synthesized!', 'finished': True}
+    return {'category': 'correct', 'message': 'Correct! Level solved.', 'finished': False}
+
+
+def _count_attempt(level, compile_error=False, solved_before=False):
+    # Analytics are best effort: a rollup that cannot be written never fails the submission
+    try:
+        persistence.transaction(lambda: LevelStats.count_attempt(level, compile_error, solved_before))
+    except OperationalError as e:
+        current_app.logger.warning('level stats for level %s not updated: %s', level, e)
@@ -0,0 +1,139 @@
+# zombie_code_survival/judge_pool.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .admission import AdmissionRejected
+
+
+class JudgePool:
+    """
+    Background pool of judge workers for asynchronous submissions.
+
+    POSTs enqueue a Submission row and return immediately; a worker thread compiles, runs and
+    grades the code inside an app context and writes the verdict back to the row. Compiling and
+    running happen in child processes, so threads are enough to keep the work off the request
+    threads. The executor is created lazily so it is never inherited across a pre-fork.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_workers = 1
+        self.max_pending = 0
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = int(app.config.get('JUDGE_WORKERS') or os.cpu_count() or 1)
+        self.max_pending = int(app.config.get('JUDGE_MAX_PENDING') or 4 * self.max_workers)
+        app.extensions['judge_pool'] = self
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='judge')
+            return self._executor
+
+    def submit(self, survivor_id, level, code, stdin_data):
+        """
+        Record a queued submission and hand it to a worker. Returns the submission id.
+        Raises AdmissionRejected when this process already has max_pending jobs in flight.
+        """
+        from .extensions import db, admission, persistence
+        from .models import Submission
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise AdmissionRejected("Judge queue is full.", admission.retry_after)
+            self._pending += 1
+
+        submission = Submission(id=uuid.uuid4().hex, survivor_id=survivor_id, level=level, status='queued')
+        try:
+            persistence.transaction(lambda: db.session.add(submission))
+            self.executor.submit(self._run, submission.id, code, stdin_data)
+        except Exception:
+            self._done()
+            raise
+        return submission.id
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, submission_id, code, stdin_data):
+        try:
+            self._judge(submission_id, code, stdin_data)
+        finally:
+            self._done()
+
+    def _judge(self, submission_id, code, stdin_data):
+        from .extensions import db, persistence, result_store, submission_log
+        from .models import Survivor, Submission
+        from .judge import judge_submission, grade_submission
+
+        def start():
+            submission = db.session.get(Submission, submission_id)
+            if submission is None:
+                return None
+            submission.status = 'running'
+            return submission.survivor_id, submission.level
+
+        with self.app.app_context():
+            result = verdict = error = None
+            try:
+                job = persistence.transaction(start)
+                if job is None:
+                    return
+                survivor_id, level = job
+                survivor = db.session.get(Survivor, survivor_id)
+                challenge = survivor.get_progress(level)
+                started = time.perf_counter()
+                result = judge_submission(code, challenge.test_cases, custom_stdin=stdin_data,
+                                          compare=challenge.compare)
+                latency = time.perf_counter() - started
+                verdict = grade_submission(survivor, challenge, result)
+                submission_log.record(level, code, stdin_data, challenge.test_cases, result, verdict, latency,
+                                      compare=challenge.compare)
+            except AdmissionRejected as e:
+                error = f'{e.reason} Please retry in {e.retry_after} seconds.'
+            except Exception as e:
+                db.session.rollback()
+                error = f'Judge failed: {e}'
+
+            def finish(error):
+                submission = db.session.get(Submission, submission_id)
+                if submission is None:
+                    return
+                if error is None:
+                    result_store.fill(submission, result, verdict)
+                else:
+                    submission.status = 'error'
+                    submission.category = 'incorrect'
+                    submission.message = error
+                if submission.finished_at is None:
+                    submission.finished_at = datetime.utcnow()
+
+            # The row must leave queued/running whatever happens, or its poller never stops:
+            # when the verdict cannot be written, record the failure instead
+            try:
+                persistence.transaction(lambda: finish(error))
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.exception('verdict of submission %s not saved', submission_id)
+                try:
+                    persistence.transaction(lambda: finish(f'Judge failed: {e}'))
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('submission %s left unfinished', submission_id)
+            result_store.evict_expired()
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'pending': self._pending, 'max_pending': self.max_pending}
@@ -0,0 +1,99 @@
+# zombie_code_survival/leaderboard_cache.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class LeaderboardCache:
+    """
+    Per-process cache of rendered leaderboard pages.
+
+    The leaderboard only changes when a survivor finishes, so the version is the identity of a
+    stamp file that grade_submission touches at that moment; every worker sees the change with
+    a single stat() and re-renders once. The same version drives the ETag/Last-Modified headers
+    so browsers and proxies revalidate with a 304. Keys come from the query string, so at most
+    max_pages pages are kept, least recently used out first.
+    """
+
+    def __init__(self, app=None):
+        self.stamp_path = None
+        self.max_pages = 64
+        self._pages = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        stamp = app.config.get('LEADERBOARD_STAMP')
+        if not stamp:
+            # One stamp per database, so apps pointed at different databases never share it
+            db_key = hashlib.sha256(app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')).hexdigest()[:12]
+            stamp = os.path.join(tempfile.gettempdir(), f'zombie-leaderboard-{db_key}.stamp')
+        self.stamp_path = stamp
+        self.max_pages = int(app.config.get('LEADERBOARD_CACHE_PAGES') or self.max_pages)
+        if not os.path.exists(stamp):
+            self.invalidate()
+        app.extensions['leaderboard_cache'] = self
+
+    def version(self):
+        """
+        Current (mtime_ns, inode) of the stamp. os.replace gives each invalidation a fresh inode,
+        so the version changes even on filesystems with coarse timestamps.
+        """
+        try:
+            st = os.stat(self.stamp_path)
+        except OSError:
+            return (0, 0)
+        return (st.st_mtime_ns, st.st_ino)
+
+    @staticmethod
+    def etag(version, key):
+        return 'lb-{}-{}-{}'.format(version[0], version[1], '-'.join(str(k) for k in key))
+
+    @staticmethod
+    def last_modified(version):
+        return datetime.fromtimestamp(version[0] / 1e9, tz=timezone.utc).replace(microsecond=0)
+
+    def invalidate(self):
+        """
+        Mark every worker's cached pages stale. Call after the finish has been committed.
+        """
+        tmp_path = f'{self.stamp_path}.{os.getpid()}.{threading.get_ident()}'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(str(time.time_ns()))
+            os.replace(tmp_path, self.stamp_path)
+        except OSError:
+            pass
+
+    def get(self, key, version):
+        with self._lock:
+            if self._version != version:
+                self._pages.clear()
+                self._version = version
+            html = self._pages.get(key)
+            if html is None:
+                self.misses += 1
+            else:
+                self._pages.move_to_end(key)
+                self.hits += 1
+            return html
+
+    def put(self, key, version, html):
+        with self._lock:
+            if self._version == version:
+                self._pages[key] = html
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'pages': len(self._pages)}
@@ -0,0 +1,269 @@
+# zombie_code_survival/loadtest.py
+"""
+Load generator: N simulated survivors playing the game at once.
+
+    python -m zombie_code_survival.loadtest --survivors 50 --ramp-up 10 --levels 3
+    python -m zombie_code_survival.loadtest --url http://127.0.0.1:5000 --survivors 200
+
+Each survivor registers through the entry page, opens level select, then for each of its
+levels opens the challenge and submits C++ picked by the scenario mix (the level's solution,
+its buggy code, or a program that does not compile), and finally checks the leaderboard.
+Without --url the app from create_app() is driven in-process through its WSGI interface,
+which measures the app and judge without a web server in front, against a scratch database
+in a fresh temp dir (its path is in the JSON report); with --url any running
+server is driven over HTTP. Reports throughput, per-route latency percentiles and error rates.
+
+Survivors submit the catalog version of each level and as fast as the scenario says, so
+per-survivor variants and the submission rate limit are turned off in-process, as is the
+submission log (synthetic traffic is not worth replaying); start a server under test with
+VARIANTS_ENABLED=0 RATE_LIMIT_DB= SUBMISSION_LOG= for the same reasons.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .benchmark import percentile
+from .debug_generator import DebugGenerator
+
+ROUTES = ('entry', 'level_select', 'challenge_get', 'challenge_post', 'leaderboard')
+DEFAULT_MIX = 'correct=6,wrong=3,compile_error=1'
+BROKEN_SOURCE = "#include <iostream>\nint main() { std::cout << \"no cure\" << std::endl return 0; }\n"
+
+
+def parse_mix(text):
+    """
+    Parse 'correct=6,wrong=3,compile_error=1' into normalized weights.
+    """
+    weights = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('correct', 'wrong', 'compile_error'):
+            raise ValueError(f'unknown scenario {name!r}')
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError('scenario mix needs a positive weight')
+    return {name: weight / total for name, weight in weights.items()}
+
+
+class WsgiClient:
+    """
+    One survivor's browser against the in-process app (own cookie jar, redirects not followed).
+    """
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return _status(response.status_code, response.headers)
+
+
+class HttpClient:
+    """
+    One survivor's browser against a running server over HTTP.
+    """
+
+    class _NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), self._NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                return _status(response.status, response.headers)
+        except urllib.error.HTTPError as e:
+            e.read()
+            return _status(e.code, e.headers)
+
+
+def _status(code, headers):
+    # A form post the judge shed comes back as a redirect carrying Retry-After: count it as one
+    if 300 <= code < 400 and headers.get('Retry-After'):
+        return 'shed'
+    return code
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: {} for route in ROUTES}
+        self.scenarios = {}
+
+    def timed(self, client, route, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            status = client.request(method, path, data)
+        except OSError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        # The app answers successful form posts with a redirect
+        ok = isinstance(status, int) and status < 400
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route][str(status)] = self.errors[route].get(str(status), 0) + 1
+        return status
+
+    def scenario(self, name):
+        with self._lock:
+            self.scenarios[name] = self.scenarios.get(name, 0) + 1
+
+
+def play(client, recorder, challenges, levels, mix, think_time, rng):
+    """
+    One survivor's session.
+    """
+    username = 'load-' + uuid.uuid4().hex[:12]
+    recorder.timed(client, 'entry', 'POST', '/', {'username': username})
+    recorder.timed(client, 'level_select', 'GET', '/level-select')
+    names, weights = zip(*sorted(mix.items()))
+    for level in sorted(challenges)[:levels]:
+        time.sleep(think_time * rng.random())
+        recorder.timed(client, 'challenge_get', 'GET', f'/challenge/{level}')
+        scenario = rng.choices(names, weights)[0]
+        recorder.scenario(scenario)
+        data = challenges[level]
+        code = {'correct': data.solution, 'wrong': data.buggy_code, 'compile_error': BROKEN_SOURCE}[scenario]
+        recorder.timed(client, 'challenge_post', 'POST', f'/challenge/{level}', {'code': code, 'stdin': ''})
+    recorder.timed(client, 'leaderboard', 'GET', '/leaderboard')
+
+
+def run_load(make_client, survivors, ramp_up=0.0, levels=3, mix=None, think_time=0.0, seed=None):
+    """
+    Run survivors sessions, starting them evenly over ramp_up seconds. Returns the report dict.
+    """
+    mix = mix or parse_mix(DEFAULT_MIX)
+    challenges = DebugGenerator().generate_all_challenges()
+    recorder = Recorder()
+    seeder = random.Random(seed)
+
+    def survivor(index, rng):
+        delay = ramp_up * index / survivors if survivors > 1 else 0.0
+        time.sleep(max(0.0, started + delay - time.perf_counter()))
+        play(make_client(), recorder, challenges, levels, mix, think_time, rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, survivors), thread_name_prefix='survivor') as pool:
+        futures = [pool.submit(survivor, i, random.Random(seeder.random())) for i in range(survivors)]
+        crashed = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                crashed += 1
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    report = {
+        'survivors': survivors,
+        'ramp_up': ramp_up,
+        'levels': levels,
+        'mix': mix,
+        'scenarios': recorder.scenarios,
+        'crashed_sessions': crashed,
+        'elapsed_seconds': elapsed,
+        'requests': total,
+        'throughput_rps': total / elapsed if elapsed else None,
+        'routes': {},
+    }
+    for route in ROUTES:
+        samples = recorder.latencies[route]
+        errors = sum(recorder.errors[route].values())
+        report['routes'][route] = {
+            'requests': len(samples),
+            'errors': recorder.errors[route],
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'p50': percentile(samples, 50),
+            'p90': percentile(samples, 90),
+            'p95': percentile(samples, 95),
+            'p99': percentile(samples, 99),
+            'max': max(samples) if samples else None,
+        }
+    return report
+
+
+def _ms(seconds):
+    return '      -' if seconds is None else '{:7.0f}'.format(seconds * 1000)
+
+
+def print_report(report, out=sys.stdout):
+    out.write('route           requests  errors     p50     p95     p99     max (ms)\n')
+    for route, row in report['routes'].items():
+        out.write('{:<15} {:8d} {:6.1%} {} {} {} {}\n'.format(
+            route, row['requests'], row['error_rate'], _ms(row['p50']), _ms(row['p95']), _ms(row['p99']), _ms(row['max'])))
+    out.write('{} survivors, {} requests in {:.1f}s: {:.1f} req/s; {} session(s) crashed\n'.format(
+        report['survivors'], report['requests'], report['elapsed_seconds'],
+        report['throughput_rps'] or 0.0, report['crashed_sessions']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent survivors against the game.")
+    parser.add_argument("--survivors", type=int, default=20, help="Simulated players (default 20)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which players start (default 0)")
+    parser.add_argument("--levels", type=int, default=3, help="Levels each player submits (default 3)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Submission weights over correct, wrong and compile_error (default %(default)s)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Max random pause before each level (s)")
+    parser.add_argument("--url", help="Base URL of a running server (default: drive create_app() in-process)")
+    parser.add_argument("--seed", type=int, help="Random seed for scenario choices")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.url:
+        def make_client():
+            return HttpClient(args.url)
+    else:
+        from . import create_app
+        # A scratch database, so the load-* survivors never reach the real leaderboard or analytics
+        db_path = os.path.join(tempfile.mkdtemp(prefix='zombie-loadtest-'), 'loadtest.db')
+        app = create_app({'VARIANTS_ENABLED': False, 'RATE_LIMIT_DB': None, 'SUBMISSION_LOG': None,
+                          'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path, 'LEADERBOARD_STAMP': db_path + '.stamp'})
+
+        def make_client():
+            return WsgiClient(app)
+
+    report = run_load(make_client, args.survivors, ramp_up=args.ramp_up, levels=args.levels, mix=mix,
+                      think_time=args.think_time, seed=args.seed)
+    report['target'] = args.url or 'in-process'
+    if not args.url:
+        report['database'] = db_path
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['crashed_sessions'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# zombie_code_survival/metrics.py
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPILE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+RUN_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    In-process counters and histograms served in the Prometheus text format at /metrics.
+
+    Recording is a dict update and a bisect under one lock, so it stays on in production.
+    Request time per route comes from request hooks, DB query count and time from SQLAlchemy
+    cursor events, and judge timings from judge.record_judge_metrics; the caches, admission
+    control and the judge pool keep their own counters, which are read at scrape time.
+    Values are per worker process (scrape each worker, or aggregate by instance).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._families = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._define()
+        if app is not None:
+            self.init_app(app)
+
+    def _define(self):
+        self.counter('zombie_http_requests_total', 'HTTP requests by route, method and status.')
+        self.histogram('zombie_http_request_duration_seconds', 'Time to produce a response, by route.', REQUEST_BUCKETS)
+        self.histogram('zombie_http_request_db_queries', 'DB queries issued per request, by route.', QUERY_COUNT_BUCKETS)
+        self.counter('zombie_db_queries_total', 'SQL statements executed.')
+        self.histogram('zombie_db_query_duration_seconds', 'Time spent executing SQL statements.', QUERY_BUCKETS)
+        self.histogram('zombie_compile_duration_seconds', 'Compile phase time (cached: compile cache hit).', COMPILE_BUCKETS)
+        self.histogram('zombie_run_duration_seconds', 'Run phase time per judged program (all test cases).', RUN_BUCKETS)
+        self.counter('zombie_judge_results_total', 'Judged programs by final phase and success.')
+        self.counter('zombie_judge_timeouts_total', 'Judge timeouts by phase.')
+        self.counter('zombie_cache_requests_total', 'Cache lookups by cache and result.')
+        self.counter('zombie_admission_total', 'Judge admission decisions.')
+        self.gauge('zombie_admission_jobs', 'Judge jobs in this process by state.')
+        self.histogram('zombie_admission_wait_seconds', 'Time admitted judge jobs waited for a run slot.', WAIT_BUCKETS)
+        self.gauge('zombie_admission_host_jobs', 'Judge jobs holding a slot across the host, by state.')
+        self.gauge('zombie_judge_pool_pending', 'Async submissions queued or running in this process.')
+        self.counter('zombie_workspaces_total', 'Judge workspaces by event (created, reused, discarded after a failed reset).')
+        self.counter('zombie_rate_limit_total', 'Submissions checked against the rate limit, by decision.')
+        self.counter('zombie_variants_total', 'Challenge variants built by this process, by outcome.')
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get('METRICS_ENABLED', True))
+        if not self.enabled:
+            return
+        app.extensions['metrics'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if _extension_samples not in self._collectors:
+            self.collector(_extension_samples)
+        _listen_for_queries(self)
+
+    # Registration
+
+    def counter(self, name, help_text):
+        self._families[name] = ('counter', help_text, None)
+
+    def gauge(self, name, help_text):
+        self._families[name] = ('gauge', help_text, None)
+
+    def histogram(self, name, help_text, buckets):
+        self._families[name] = ('histogram', help_text, tuple(buckets))
+
+    def collector(self, func):
+        """
+        Register func() -> iterable of (name, labels dict, value), called on every scrape.
+        """
+        self._collectors.append(func)
+        return func
+
+    # Recording
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self._families[name][2]
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    # Request hooks
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_queries = 0
+
+    def _after_request(self, response):
+        self._finish_request(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        if exc is not None:
+            self._finish_request(500)
+
+    def _finish_request(self, status):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        self.inc('zombie_http_requests_total', route=route, method=request.method, status=status)
+        self.observe('zombie_http_request_duration_seconds', time.perf_counter() - started, route=route)
+        self.observe('zombie_http_request_db_queries', g.pop('_metrics_queries', 0), route=route)
+
+    # Exposition
+
+    def render(self):
+        samples = {name: [] for name in self._families}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                samples[name].append((labels, value))
+            histograms = [(name, labels, list(series)) for (name, labels), series in self._histograms.items()]
+        for func in self._collectors:
+            for name, labels, value in func():
+                samples[name].append((tuple(sorted(labels.items())), value))
+
+        lines = []
+        for name, (kind, help_text, buckets) in self._families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(samples[name]):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            for hist_name, labels, series in sorted(histograms):
+                if hist_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), series):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", _format_value(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(series[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+_listening = []
+
+
+def _listen_for_queries(metrics):
+    # Engine-class listeners see every engine, including ones Flask-SQLAlchemy creates later
+    if _listening:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_metrics_started')
+        if not started:
+            return
+        metrics.inc('zombie_db_queries_total')
+        metrics.observe('zombie_db_query_duration_seconds', time.perf_counter() - started.pop())
+        if has_request_context() and '_metrics_queries' in g:
+            g._metrics_queries += 1
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(context):
+        if context.connection is not None:
+            started = context.connection.info.get('_metrics_started')
+            if started:
+                started.pop()
+
+    _listening.append(metrics)
+
+
+def _extension_samples():
+    # Counters the other extensions already keep, read at scrape time
+    from .extensions import pch, leaderboard_cache, admission, judge_pool, variant_pool, rate_limiter, workspace_pool
+
+    if pch.root is not None:
+        stats = pch.stats()
+        yield 'zombie_cache_requests_total', {'cache': 'pch', 'result': 'hit'}, stats['hits']
+        yield 'zombie_cache_requests_total', {'cache': 'pch', 'result': 'miss'}, stats['misses']
+    stats = leaderboard_cache.stats()
+    yield 'zombie_cache_requests_total', {'cache': 'leaderboard', 'result': 'hit'}, stats['hits']
+    yield 'zombie_cache_requests_total', {'cache': 'leaderboard', 'result': 'miss'}, stats['misses']
+    stats = admission.stats()
+    yield 'zombie_admission_total', {'decision': 'admitted'}, stats['admitted']
+    yield 'zombie_admission_total', {'decision': 'rejected'}, stats['rejected']
+    yield 'zombie_admission_jobs', {'state': 'running'}, stats['process_running']
+    yield 'zombie_admission_jobs', {'state': 'waiting'}, stats['process_waiting']
+    if admission.enabled:
+        yield 'zombie_admission_host_jobs', {'state': 'running'}, stats['host_running']
+        yield 'zombie_admission_host_jobs', {'state': 'queued'}, stats['host_queue_depth']
+    yield 'zombie_judge_pool_pending', {}, judge_pool.stats()['pending']
+    if workspace_pool.root is not None:
+        stats = workspace_pool.stats()
+        for event in ('created', 'reused', 'discarded'):
+            yield 'zombie_workspaces_total', {'event': event}, stats[event]
+    if rate_limiter.enabled:
+        stats = rate_limiter.stats()
+        yield 'zombie_rate_limit_total', {'decision': 'allowed'}, stats['allowed']
+        yield 'zombie_rate_limit_total', {'decision': 'limited'}, stats['limited']
+    if variant_pool.enabled:
+        stats = variant_pool.stats()
+        yield 'zombie_variants_total', {'outcome': 'accepted'}, stats['generated']
+        yield 'zombie_variants_total', {'outcome': 'rejected'}, stats['rejected']
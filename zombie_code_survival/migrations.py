@@ -0,0 +1,237 @@
+# zombie_code_survival/migrations.py
+"""
+Schema migrations for existing databases, run by create_app before db.create_all().
+
+Each migration inspects the live schema and only acts when it finds the old layout,
+so running them against a fresh or already-migrated database is a no-op.
+"""
+import json
+from datetime import datetime
+from sqlalchemy import inspect, select, text
+from .extensions import db
+
+
+def _columns(inspector, table):
+    if not inspector.has_table(table):
+        return set()
+    return {c['name'] for c in inspector.get_columns(table)}
+
+
+def split_challenge_catalog(conn):
+    """
+    Slim the per-survivor challenge table down to progress columns. The code and expected
+    output it used to copy for every survivor now live once in catalog_challenge.
+    """
+    inspector = inspect(conn)
+    if 'buggy_code' not in _columns(inspector, 'challenge'):
+        return
+    from .models import CatalogChallenge, Challenge
+
+    for index in inspector.get_indexes('challenge'):
+        conn.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+    conn.execute(text('ALTER TABLE challenge RENAME TO challenge_legacy'))
+    CatalogChallenge.__table__.create(conn, checkfirst=True)
+    Challenge.__table__.create(conn)
+    conn.execute(text(
+        'INSERT INTO challenge (id, level, is_solved, start_time, end_time, survivor_id) '
+        'SELECT id, level, is_solved, start_time, end_time, survivor_id FROM challenge_legacy'
+    ))
+    conn.execute(text('DROP TABLE challenge_legacy'))
+
+
+def backfill_leaderboard(conn):
+    """
+    Create the materialized leaderboard and fill it from survivors who finished before it existed.
+    """
+    inspector = inspect(conn)
+    if inspector.has_table('leaderboard_entry') or not inspector.has_table('survivor'):
+        return
+    from .models import Survivor, Challenge, LeaderboardEntry
+
+    LeaderboardEntry.__table__.create(conn)
+    survivors = Survivor.__table__
+    challenges = Challenge.__table__
+    # Name the columns: later migrations add survivor columns this database may not have yet
+    finished = conn.execute(select(survivors.c.id, survivors.c.username, survivors.c.start_time, survivors.c.end_time)
+                            .where(survivors.c.end_time.isnot(None))).all()
+    for s in finished:
+        level_times = {}
+        rows = conn.execute(select(challenges.c.level, challenges.c.start_time, challenges.c.end_time)
+                            .where(challenges.c.survivor_id == s.id)).all()
+        for c in rows:
+            if c.end_time and c.start_time:
+                level_times[c.level] = int((c.end_time - c.start_time).total_seconds())
+        conn.execute(LeaderboardEntry.__table__.insert().values(
+            survivor_id=s.id,
+            username=s.username,
+            completion_seconds=(s.end_time - s.start_time).total_seconds(),
+            level_times_json=json.dumps(level_times),
+        ))
+
+
+def add_catalog_test_cases(conn):
+    """
+    Add the per-level test case column; CatalogChallenge.sync fills it at startup.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table('catalog_challenge'):
+        return
+    if 'test_cases_json' not in _columns(inspector, 'catalog_challenge'):
+        conn.execute(text('ALTER TABLE catalog_challenge ADD COLUMN test_cases_json TEXT'))
+
+
+def add_catalog_compare(conn):
+    """
+    Add the per-level output compare mode and tolerance; CatalogChallenge.sync fills them at startup.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table('catalog_challenge'):
+        return
+    columns = _columns(inspector, 'catalog_challenge')
+    if 'compare_mode' not in columns:
+        conn.execute(text('ALTER TABLE catalog_challenge ADD COLUMN compare_mode VARCHAR(16)'))
+    if 'compare_tolerance' not in columns:
+        conn.execute(text('ALTER TABLE catalog_challenge ADD COLUMN compare_tolerance FLOAT'))
+
+
+def unique_challenge_progress(conn):
+    """
+    Make (survivor_id, level) unique on challenge. Concurrent solves could insert the same
+    progress row more than once; keep the earliest solve of each and drop the rest, then
+    recount what those duplicates inflated.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table('challenge'):
+        return
+    indexes = {index['name']: index for index in inspector.get_indexes('challenge')}
+    current = indexes.get('ix_challenge_survivor_level')
+    if current is not None and current['unique']:
+        return
+    from .models import Challenge
+
+    challenges = Challenge.__table__
+    rows = conn.execute(select(challenges.c.id, challenges.c.survivor_id, challenges.c.level,
+                               challenges.c.is_solved, challenges.c.end_time)).all()
+    best = {}
+    for row in rows:
+        key = (row.survivor_id, row.level)
+        # Solved beats unsolved, then the earliest solve, then the oldest row
+        rank = (not row.is_solved, row.end_time is None, row.end_time or datetime.min, row.id)
+        if key not in best or rank < best[key][0]:
+            best[key] = (rank, row.id)
+    keep = {row_id for _, row_id in best.values()}
+    duplicates = [row.id for row in rows if row.id not in keep]
+    for start in range(0, len(duplicates), 500):
+        conn.execute(challenges.delete().where(challenges.c.id.in_(duplicates[start:start + 500])))
+
+    if current is not None:
+        conn.execute(text('DROP INDEX ix_challenge_survivor_level'))
+    for index in challenges.indexes:
+        if index.name == 'ix_challenge_survivor_level':
+            index.create(conn)
+    if not duplicates:
+        return
+    if 'solved_count' in _columns(inspector, 'survivor'):
+        conn.execute(text(
+            'UPDATE survivor SET solved_count = '
+            '(SELECT COUNT(*) FROM challenge WHERE challenge.survivor_id = survivor.id AND challenge.is_solved)'
+        ))
+    if inspector.has_table('level_stats'):
+        conn.execute(text(
+            'UPDATE level_stats SET solves = MIN(solves, '
+            '(SELECT COUNT(*) FROM challenge WHERE challenge.level = level_stats.level AND challenge.is_solved))'
+        ))
+
+
+def add_progress_summary(conn):
+    """
+    Add the denormalized Survivor.solved_count (backfilled from progress rows) and the
+    composite (survivor_id, level) index the progress queries use.
+    """
+    inspector = inspect(conn)
+    if inspector.has_table('survivor') and 'solved_count' not in _columns(inspector, 'survivor'):
+        conn.execute(text('ALTER TABLE survivor ADD COLUMN solved_count INTEGER NOT NULL DEFAULT 0'))
+        conn.execute(text(
+            'UPDATE survivor SET solved_count = '
+            '(SELECT COUNT(*) FROM challenge WHERE challenge.survivor_id = survivor.id AND challenge.is_solved)'
+        ))
+    if inspector.has_table('challenge'):
+        from .models import Challenge
+
+        for index in Challenge.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _solve_time_sketches(conn):
+    # {level: QuantileSketch} of solve times, each from the survivor's previous solve (or their start)
+    from .models import Challenge
+    from .sketch import QuantileSketch
+
+    challenges = Challenge.__table__
+    rows = conn.execute(select(challenges.c.survivor_id, challenges.c.level, challenges.c.start_time,
+                               challenges.c.end_time)
+                        .where(challenges.c.is_solved, challenges.c.end_time.isnot(None),
+                               challenges.c.start_time.isnot(None))
+                        .order_by(challenges.c.survivor_id, challenges.c.end_time)).all()
+    sketches = {}
+    previous = {}
+    for c in rows:
+        started = max(filter(None, (previous.get(c.survivor_id), c.start_time)))
+        sketches.setdefault(c.level, QuantileSketch()).add((c.end_time - started).total_seconds())
+        previous[c.survivor_id] = c.end_time
+    return sketches
+
+
+def backfill_level_stats(conn):
+    """
+    Create the per-level analytics rollup and fill it from the levels solved before it existed.
+    Failed submissions were never recorded, so those levels start with attempts = solves.
+    """
+    inspector = inspect(conn)
+    if inspector.has_table('level_stats') or not inspector.has_table('challenge'):
+        return
+    from .models import LevelStats
+
+    LevelStats.__table__.create(conn)
+    for level, sketch in _solve_time_sketches(conn).items():
+        conn.execute(LevelStats.__table__.insert().values(
+            level=level, attempts=sketch.count, attempts_before_solve=sketch.count, compile_errors=0,
+            solves=sketch.count, solve_seconds_json=sketch.to_json(),
+        ))
+
+
+def split_level_stats_attempts(conn):
+    """
+    Add LevelStats.attempts_before_solve and re-time solves from the previous solve. Replays
+    were never told apart, so every attempt counted so far is taken as one made before solving;
+    the solve times are rebuilt from the progress rows, which record every solve.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table('level_stats') or 'attempts_before_solve' in _columns(inspector, 'level_stats'):
+        return
+    from .models import LevelStats
+
+    conn.execute(text('ALTER TABLE level_stats ADD COLUMN attempts_before_solve INTEGER NOT NULL DEFAULT 0'))
+    conn.execute(text('UPDATE level_stats SET attempts_before_solve = attempts'))
+    stats = LevelStats.__table__
+    sketches = _solve_time_sketches(conn) if inspector.has_table('challenge') else {}
+    for level, sketch in sketches.items():
+        conn.execute(stats.update().where(stats.c.level == level).values(solve_seconds_json=sketch.to_json()))
+
+
+MIGRATIONS = [
+    split_challenge_catalog,
+    add_catalog_test_cases,
+    add_catalog_compare,
+    backfill_leaderboard,
+    unique_challenge_progress,
+    add_progress_summary,
+    backfill_level_stats,
+    split_level_stats_attempts,
+]
+
+
+def run_migrations():
+    with db.engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
@@ -1,13 +1,21 @@
 # zombie_code_survival/models.py
-from datetime import datetime
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
 from .extensions import db
+from .sketch import QuantileSketch
+
+# What the level grids need from a survivor's progress, without the challenge text
+LevelProgress = namedtuple('LevelProgress', 'level is_solved start_time end_time')
 
 class Survivor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), index=True, unique=True)
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=True)
-    
+    # Denormalized count of solved levels, kept in step by grade_submission
+    solved_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     challenges = db.relationship('Challenge', backref='survivor', lazy='dynamic', cascade="all, delete-orphan")
 
     def get_completion_time(self):
@@ -16,22 +24,222 @@ class Survivor(db.Model):
         duration = self.end_time - self.start_time
         return str(duration).split('.')[0]
 
+    def _new_progress(self, catalog):
+        # Levels are timed from registration, as when all 20 rows were seeded up front
+        return Challenge(level=catalog.level, catalog=catalog, survivor_id=self.id,
+                         is_solved=False, start_time=self.start_time)
+
+    def get_progress(self, level):
+        """
+        Return this survivor's Challenge for a level (unsaved if untouched), or None for an unknown level.
+        """
+        catalog = db.session.get(CatalogChallenge, level)
+        if catalog is None:
+            return None
+        progress = self.challenges.filter_by(level=level).first() or self._new_progress(catalog)
+        progress.variant = ChallengeVariant.query.filter_by(survivor_id=self.id, level=level).first()
+        return progress
+
+    def get_progress_summary(self):
+        """
+        Return a LevelProgress for every catalog level, ordered by level, in one query that
+        reads only the level numbers and this survivor's progress columns.
+        """
+        rows = (db.session.query(CatalogChallenge.level, Challenge.is_solved, Challenge.start_time, Challenge.end_time)
+                .outerjoin(Challenge, db.and_(Challenge.level == CatalogChallenge.level, Challenge.survivor_id == self.id))
+                .order_by(CatalogChallenge.level)
+                .all())
+        return [LevelProgress(level, bool(is_solved), start_time or self.start_time, end_time)
+                for level, is_solved, start_time, end_time in rows]
+
     def __repr__(self):
         return f'<Survivor {self.username}>'
 
-class Challenge(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    level = db.Column(db.Integer, index=True)
+class CatalogChallenge(db.Model):
+    """
+    One row per level, shared by every survivor. Synced from the challenge pack (or DebugGenerator)
+    at startup and whenever a new pack version is published.
+    """
+    __tablename__ = 'catalog_challenge'
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
     title = db.Column(db.String(120), nullable=True)
     buggy_code = db.Column(db.Text)
     solution = db.Column(db.Text)
     error_type = db.Column(db.String(50))
     expected_output = db.Column(db.Text)
+    test_cases_json = db.Column(db.Text, nullable=True)
+    # Output compare mode and float tolerance for this level (None: JUDGE_COMPARE / JUDGE_FLOAT_TOLERANCE)
+    compare_mode = db.Column(db.String(16), nullable=True)
+    compare_tolerance = db.Column(db.Float, nullable=True)
+
+    @property
+    def compare(self):
+        """
+        (mode, tolerance) this level's output is compared with; see judge.run_test_cases.
+        """
+        return (self.compare_mode, self.compare_tolerance)
+
+    @property
+    def test_cases(self):
+        """
+        (stdin, expected stdout) pairs this level is judged on.
+        """
+        if self.test_cases_json:
+            return [tuple(case) for case in json.loads(self.test_cases_json)]
+        return [("", self.expected_output or "")]
+
+    @classmethod
+    def sync(cls, challenges_data):
+        """
+        Insert or update catalog rows from a {level: ChallengeData} mapping, inside the caller's
+        transaction (see ChallengePack.sync_catalog). Returns True when anything changed.
+        """
+        existing = {c.level: c for c in cls.query.all()}
+        changed = False
+        stale = []
+        for level, data in challenges_data.items():
+            fields = {
+                'title': data.title,
+                'buggy_code': data.buggy_code,
+                'solution': data.solution,
+                'error_type': data.error_type,
+                'expected_output': str(data.expected_output),
+                'test_cases_json': json.dumps(data.get_test_cases()),
+                'compare_mode': data.compare,
+                'compare_tolerance': data.tolerance,
+            }
+            row = existing.get(level)
+            if row is None:
+                db.session.add(cls(level=level, **fields))
+                changed = True
+                continue
+            for name, value in fields.items():
+                if getattr(row, name) != value:
+                    setattr(row, name, value)
+                    changed = True
+                    if name not in ('title', 'compare_mode', 'compare_tolerance'):
+                        stale.append(level)
+        if stale:
+            # Variants not handed out yet were generated from the old program
+            (ChallengeVariant.query
+             .filter(ChallengeVariant.level.in_(set(stale)), ChallengeVariant.survivor_id.is_(None))
+             .delete(synchronize_session=False))
+        if LevelStats.ensure(challenges_data):
+            changed = True
+        return changed
+
+    def __repr__(self):
+        return f'<CatalogChallenge Level {self.level}>'
+
+class ChallengeVariant(db.Model):
+    """
+    A verified, seeded variant of a level (see DebugGenerator.generate_variant), generated
+    ahead of time by the VariantPool. survivor_id is set when registration claims it.
+    """
+    __tablename__ = 'challenge_variant'
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.Integer, db.ForeignKey('catalog_challenge.level'), index=True)
+    seed = db.Column(db.Integer)
+    buggy_code = db.Column(db.Text)
+    solution = db.Column(db.Text)
+    expected_output = db.Column(db.Text)
+    test_cases_json = db.Column(db.Text)
+    survivor_id = db.Column(db.Integer, db.ForeignKey('survivor.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_challenge_variant_survivor_level', 'survivor_id', 'level'),)
+
+    @classmethod
+    def from_fields(cls, level, seed, fields):
+        return cls(level=level, seed=seed, buggy_code=fields['buggy_code'], solution=fields['solution'],
+                   expected_output=fields['expected_output'], test_cases_json=json.dumps(fields['test_cases']))
+
+    @property
+    def test_cases(self):
+        return [tuple(case) for case in json.loads(self.test_cases_json)]
+
+    def __repr__(self):
+        return f'<ChallengeVariant Level {self.level} seed {self.seed}>'
+
+class Challenge(db.Model):
+    """
+    A survivor's progress on one level. Rows are only written once a level is solved;
+    until then Survivor.get_progress hands out an unsaved instance. The code and test
+    cases come from the survivor's variant of the level when it has one, else the catalog.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.Integer, db.ForeignKey('catalog_challenge.level'), index=True)
     is_solved = db.Column(db.Boolean, default=False)
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=True)
     survivor_id = db.Column(db.Integer, db.ForeignKey('survivor.id'))
 
+    catalog = db.relationship('CatalogChallenge')
+    # Set by Survivor.get_progress; not a column
+    variant = None
+
+    # Unique: one progress row per survivor and level, however many solves race to create it
+    __table_args__ = (db.Index('ix_challenge_survivor_level', 'survivor_id', 'level', unique=True),)
+
+    @classmethod
+    def insert_missing(cls, survivor_id, level, start_time):
+        """
+        INSERT the survivor's progress row for a level unless one exists (ON CONFLICT DO NOTHING),
+        in the current session; the caller commits.
+        """
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        db.session.execute(
+            insert(cls).values(survivor_id=survivor_id, level=level, is_solved=False, start_time=start_time)
+            .on_conflict_do_nothing(index_elements=['survivor_id', 'level'])
+        )
+
+    @classmethod
+    def last_solve_time(cls, survivor_id, exclude_level):
+        """
+        When the survivor last solved a level other than exclude_level, or None.
+        """
+        return (db.session.query(db.func.max(cls.end_time))
+                .filter(cls.survivor_id == survivor_id, cls.is_solved.is_(True), cls.level != exclude_level)
+                .scalar())
+
+    @classmethod
+    def solved_levels(cls, survivor_id):
+        return (db.session.query(db.func.count(db.distinct(cls.level)))
+                .filter(cls.survivor_id == survivor_id, cls.is_solved.is_(True))
+                .scalar())
+
+    @property
+    def title(self):
+        return self.catalog.title
+
+    @property
+    def buggy_code(self):
+        return (self.variant or self.catalog).buggy_code
+
+    @property
+    def solution(self):
+        return (self.variant or self.catalog).solution
+
+    @property
+    def error_type(self):
+        return self.catalog.error_type
+
+    @property
+    def expected_output(self):
+        return (self.variant or self.catalog).expected_output
+
+    @property
+    def test_cases(self):
+        return (self.variant or self.catalog).test_cases
+
+    @property
+    def compare(self):
+        # Variants keep their level's compare mode
+        return self.catalog.compare
+
     def get_level_time(self):
         if not self.end_time or not self.start_time:
             return None
@@ -40,3 +248,157 @@ class Challenge(db.Model):
 
     def __repr__(self):
         return f'<Challenge Level {self.level} for Survivor {self.survivor_id}>'
+
+class LeaderboardEntry(db.Model):
+    """
+    Materialized leaderboard row, written in the same transaction that sets Survivor.end_time
+    so the rankings page is a single indexed, pre-sorted read.
+    """
+    survivor_id = db.Column(db.Integer, db.ForeignKey('survivor.id'), primary_key=True, autoincrement=False)
+    username = db.Column(db.String(64))
+    completion_seconds = db.Column(db.Float, index=True)
+    level_times_json = db.Column(db.Text, default='{}')
+
+    @classmethod
+    def record(cls, survivor):
+        """
+        Add (or refresh) the survivor's entry in the current session; the caller commits.
+        """
+        level_times = {}
+        for c in survivor.challenges.order_by(Challenge.level).all():
+            if c.end_time and c.start_time:
+                level_times[c.level] = int((c.end_time - c.start_time).total_seconds())
+        entry = db.session.get(cls, survivor.id) or cls(survivor_id=survivor.id)
+        entry.username = survivor.username
+        entry.completion_seconds = (survivor.end_time - survivor.start_time).total_seconds()
+        entry.level_times_json = json.dumps(level_times)
+        db.session.add(entry)
+        return entry
+
+    @property
+    def level_times(self):
+        return {int(level): seconds for level, seconds in json.loads(self.level_times_json or '{}').items()}
+
+    def get_completion_time(self):
+        if self.completion_seconds is None:
+            return None
+        return str(timedelta(seconds=self.completion_seconds)).split('.')[0]
+
+    def __repr__(self):
+        return f'<LeaderboardEntry {self.username} {self.completion_seconds}s>'
+
+class LevelStats(db.Model):
+    """
+    Per-level analytics rollup, updated by grade_submission as each submission is judged, so
+    the analytics endpoint reads one row per level however many survivors there are.
+    """
+    __tablename__ = 'level_stats'
+    level = db.Column(db.Integer, db.ForeignKey('catalog_challenge.level'), primary_key=True, autoincrement=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # The attempts made before the survivor had solved the level; replays of a solved level are left out
+    attempts_before_solve = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    compile_errors = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Survivors who solved the level, and how long each took since their previous solve (or their start)
+    solves = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solve_seconds_json = db.Column(db.Text, nullable=True)
+
+    @classmethod
+    def ensure(cls, levels):
+        """
+        Add missing rows for these levels to the current session; the caller commits.
+        Returns whether any were added.
+        """
+        missing = set(levels) - {level for (level,) in db.session.query(cls.level)}
+        for level in missing:
+            db.session.add(cls(level=level, attempts=0, attempts_before_solve=0, compile_errors=0, solves=0))
+        return bool(missing)
+
+    @classmethod
+    def count_attempt(cls, level, compile_error=False, solved_before=False):
+        """
+        Count one judged submission with a single UPDATE, in the current session; the caller commits.
+        solved_before: the survivor had already solved this level, so it is a replay.
+        """
+        db.session.execute(
+            db.update(cls).where(cls.level == level)
+            .values(attempts=cls.attempts + 1,
+                    attempts_before_solve=cls.attempts_before_solve + (0 if solved_before else 1),
+                    compile_errors=cls.compile_errors + (1 if compile_error else 0))
+        )
+
+    @classmethod
+    def count_solve(cls, level, seconds):
+        """
+        Count a first solve taking `seconds` (since the survivor's previous solve, or their start),
+        in the current session; the caller commits.
+        """
+        stats = db.session.query(cls).filter_by(level=level).with_for_update().first()
+        if stats is None:
+            return
+        sketch = stats.solve_seconds
+        sketch.add(max(0.0, seconds))
+        stats.solves += 1
+        stats.solve_seconds_json = sketch.to_json()
+
+    @property
+    def solve_seconds(self):
+        return QuantileSketch.from_json(self.solve_seconds_json)
+
+    def to_dict(self):
+        sketch = self.solve_seconds
+
+        def seconds(value):
+            return None if value is None else round(value, 3)
+        return {
+            'level': self.level,
+            'attempts': self.attempts,
+            'attempts_before_solve': self.attempts_before_solve,
+            'compile_errors': self.compile_errors,
+            'solves': self.solves,
+            # First solves per attempt made before solving: replays of a solved level do not dilute it
+            'solve_rate': round(self.solves / self.attempts_before_solve, 4) if self.attempts_before_solve else None,
+            'solve_seconds': {
+                'p50': seconds(sketch.quantile(0.5)),
+                'p90': seconds(sketch.quantile(0.9)),
+                'mean': seconds(sketch.mean),
+            },
+        }
+
+    def __repr__(self):
+        return f'<LevelStats Level {self.level} {self.solves}/{self.attempts}>'
+
+class Submission(db.Model):
+    """
+    A queued or finished asynchronous judge job. Kept in the database so any worker
+    process can answer status polls, not just the one running the job.
+    """
+    id = db.Column(db.String(32), primary_key=True)
+    survivor_id = db.Column(db.Integer, db.ForeignKey('survivor.id'), index=True)
+    level = db.Column(db.Integer)
+    status = db.Column(db.String(16), default='queued')  # queued | running | done | error
+    phase = db.Column(db.String(16), nullable=True)
+    success = db.Column(db.Boolean, nullable=True)
+    stdout = db.Column(db.Text, nullable=True)
+    stderr = db.Column(db.Text, nullable=True)
+    category = db.Column(db.String(16), nullable=True)
+    message = db.Column(db.Text, nullable=True)
+    finished = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'level': self.level,
+            'status': self.status,
+            'phase': self.phase,
+            'success': self.success,
+            'stdout': self.stdout or '',
+            'stderr': self.stderr or '',
+            'category': self.category,
+            'message': self.message,
+            'finished': bool(self.finished),
+        }
+
+    def __repr__(self):
+        return f'<Submission {self.id} Level {self.level} {self.status}>'
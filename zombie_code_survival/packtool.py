@@ -0,0 +1,45 @@
+# zombie_code_survival/packtool.py
+"""
+Build and inspect challenge packs (see challenge_pack.py).
+
+    python -m zombie_code_survival.packtool build --output zombie_code_survival/challenges.pack
+    python -m zombie_code_survival.packtool info zombie_code_survival/challenges.pack
+
+build writes the pack atomically, so running workers hot-reload it on their next check.
+"""
+import argparse
+import sys
+
+from .challenge_pack import Pack, PackError, write_pack
+from .debug_generator import DebugGenerator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect challenge packs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build a pack from DebugGenerator")
+    build.add_argument("--output", required=True, help="Pack file to write (replaced atomically)")
+    build.add_argument("--version", help="Pack version (default: UTC timestamp)")
+    info = sub.add_parser("info", help="Verify a pack and print its version and levels")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        write_pack(args.output, DebugGenerator().generate_all_challenges(), args.version)
+        pack = Pack(args.output)
+        print(f'{args.output}: version {pack.version}, {len(pack.levels())} levels, sha256 {pack.checksum}')
+        return 0
+
+    try:
+        pack = Pack(args.path)
+    except (OSError, PackError) as e:
+        print(f'invalid pack: {e}', file=sys.stderr)
+        return 1
+    print(f'{args.path}: version {pack.version}, sha256 {pack.checksum}')
+    for level, data in pack.challenges().items():
+        print(f'  {level:3d} {data.title} ({len(data.get_test_cases())} case(s))')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
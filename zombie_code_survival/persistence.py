@@ -0,0 +1,89 @@
+# zombie_code_survival/persistence.py
+import random
+import sqlite3
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+# SQLite reports these while another connection holds the write lock (or moved the WAL on)
+TRANSIENT_ERRORS = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_transient(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return any(text in message for text in TRANSIENT_ERRORS)
+
+
+class SQLitePersistence:
+    """
+    Tunes SQLite for several web and judge workers writing to one database file.
+
+    Every new connection switches to WAL (readers no longer block the writer or each other),
+    synchronous=NORMAL (durable at checkpoints, no fsync per commit), and a busy timeout so a
+    writer waits for the lock instead of failing at once. transaction() commits a unit of work
+    and retries it, with jittered backoff, when SQLite still reports the database as locked.
+    Non-SQLite databases are left alone; transaction() then simply commits.
+    """
+
+    def __init__(self, app=None):
+        self.wal = True
+        self.busy_timeout_ms = 5000
+        self.synchronous = 'NORMAL'
+        self.attempts = 5
+        self.backoff = 0.05
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Call after db.init_app so the engine exists.
+        """
+        from .extensions import db
+
+        self.wal = bool(app.config.get('SQLITE_WAL', True))
+        self.busy_timeout_ms = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS') or self.busy_timeout_ms)
+        self.synchronous = app.config.get('SQLITE_SYNCHRONOUS') or self.synchronous
+        self.attempts = max(1, int(app.config.get('DB_RETRY_ATTEMPTS') or self.attempts))
+        self.backoff = float(app.config.get('DB_RETRY_BACKOFF') or self.backoff)
+        app.extensions['persistence'] = self
+
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', self._configure_connection)
+
+    def _configure_connection(self, dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f'PRAGMA busy_timeout = {self.busy_timeout_ms}')
+            if self.wal:
+                cursor.execute('PRAGMA journal_mode = WAL')
+                cursor.execute(f'PRAGMA synchronous = {self.synchronous}')
+                # Keep the WAL from growing without bound between automatic checkpoints
+                cursor.execute('PRAGMA journal_size_limit = 67108864')
+            cursor.execute('PRAGMA temp_store = MEMORY')
+            cursor.execute('PRAGMA cache_size = -16000')
+        finally:
+            cursor.close()
+
+    def transaction(self, work):
+        """
+        Run work() and commit, as one transaction. On a transient lock error the session is
+        rolled back and work() runs again, so it must (re)apply all of its changes each time.
+        Returns work()'s return value.
+        """
+        from .extensions import db
+
+        for attempt in range(1, self.attempts + 1):
+            try:
+                value = work()
+                db.session.commit()
+                return value
+            except OperationalError as e:
+                db.session.rollback()
+                if attempt >= self.attempts or not is_transient(e):
+                    raise
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
@@ -0,0 +1,111 @@
+# zombie_code_survival/ratelimit.py
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app, request, session
+
+
+class RateLimiter:
+    """
+    Token bucket per submitter in front of the judge: RATE_LIMIT_BURST submissions at once,
+    then one more every 1 / RATE_LIMIT_REFILL seconds.
+
+    Buckets live in their own small SQLite file at RATE_LIMIT_DB (not the app database, so
+    limiting never waits on game writes), updated in one IMMEDIATE transaction per take, so
+    every worker process on the box shares them. Survivors are keyed by session id, anyone
+    else by IP. If the store itself fails the submission is let through.
+    """
+
+    PRUNE_INTERVAL = 300
+
+    def __init__(self, app=None):
+        self.path = None
+        self.burst = 5.0
+        self.refill = 0.5
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self.allowed = 0
+        self.limited = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.burst = float(app.config.get('RATE_LIMIT_BURST') or self.burst)
+        self.refill = float(app.config.get('RATE_LIMIT_REFILL') or self.refill)
+        self.path = app.config.get('RATE_LIMIT_DB') or None
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+        app.extensions['rate_limiter'] = self
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.path != self.path:
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn, self._local.path = conn, self.path
+        return conn
+
+    @staticmethod
+    def current_key():
+        if 'survivor_id' in session:
+            return f"survivor:{session['survivor_id']}"
+        return f'ip:{request.remote_addr}'
+
+    def take(self, key=None):
+        """
+        Take one token from key's bucket (default: the current request's submitter).
+        Returns 0 when the submission may go ahead, else the seconds until a token is free.
+        """
+        if not self.enabled:
+            return 0
+        key = key or self.current_key()
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.refill)
+                if tokens >= 1:
+                    conn.execute('INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                                 'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                                 (key, tokens - 1, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            if now - self._last_prune > self.PRUNE_INTERVAL:
+                self._prune(conn, now)
+        except sqlite3.Error as e:
+            current_app.logger.warning('rate limiter: %s; letting the submission through', e)
+            return 0
+        if tokens >= 1:
+            self.allowed += 1
+            return 0
+        self.limited += 1
+        return (1 - tokens) / self.refill
+
+    def _prune(self, conn, now):
+        # A bucket idle long enough to be full again is the same as no row at all
+        self._last_prune = now
+        conn.execute('DELETE FROM buckets WHERE updated < ?', (now - self.burst / self.refill,))
+
+    @staticmethod
+    def describe(wait):
+        seconds = max(1, math.ceil(wait))
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+
+    def stats(self):
+        return {'enabled': self.enabled, 'allowed': self.allowed, 'limited': self.limited}
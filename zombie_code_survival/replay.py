@@ -0,0 +1,211 @@
+# zombie_code_survival/replay.py
+"""
+Replay a captured submission log (see submission_log.py) through this build's judge.
+
+    python -m zombie_code_survival.replay instance/submissions.jsonl --concurrency 4 --json new.json
+    python -m zombie_code_survival.replay submissions.jsonl --speed 1 --baseline old.json
+
+Each logged submission is judged again (with the verify profile the site judges with by
+default, or another with --profile) against the test cases and in the compare mode it was
+originally judged with; a judge that raises is recorded as outcome 'exception' rather than
+stopping the replay. --speed 0 (the default) replays as fast as --concurrency allows;
+--speed 1 keeps the original arrival times, 10 is ten times faster. The report compares
+every verdict and the latency distribution with the log itself, or with an earlier replay's
+--json output given as --baseline, which is how two builds are compared on the same traffic.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import create_app
+from .benchmark import percentile
+from .extensions import pch
+from .submission_log import decode_source, outcome, read_log
+
+
+def load_submissions(path, levels=None, limit=None):
+    """
+    Returns (replayable submissions in log order, number skipped). Each submission is the log
+    record plus n (its position among the log's submissions), code and test_cases.
+    """
+    cases = {}
+    submissions = []
+    skipped = 0
+    n = 0
+    for record in read_log(path):
+        if record.get('type') == 'cases':
+            cases[record['id']] = [tuple(case) for case in record['cases']]
+            continue
+        if record.get('type') != 'submission':
+            continue
+        n += 1
+        if levels and record.get('level') not in levels:
+            continue
+        if 'source' not in record or record.get('cases') not in cases:
+            skipped += 1
+            continue
+        submissions.append(dict(record, n=n, code=decode_source(record['source']), test_cases=cases[record['cases']]))
+        if limit and len(submissions) >= limit:
+            break
+    return submissions, skipped
+
+
+def replay(app, submissions, speed=0.0, concurrency=1, profile='verify'):
+    """
+    Judge submissions again, keeping their relative arrival times scaled by speed (0: no delays).
+    Returns one {n, level, outcome, latency} per submission, in log order, plus error (the
+    exception's text) where outcome is 'exception'.
+    """
+    from .judge import judge_submission, run_test_cases
+
+    def judge(submission):
+        # The logged mode, not today's JUDGE_COMPARE, so a changed default is not a regression
+        compare = (submission.get('compare'), submission.get('tolerance'))
+        row = {'n': submission['n'], 'level': submission['level']}
+        with app.app_context():
+            started = time.perf_counter()
+            try:
+                if profile == 'tiered':
+                    result = judge_submission(submission['code'], submission['test_cases'], submission['stdin'],
+                                              tiered=True, compare=compare)
+                else:
+                    result = run_test_cases(submission['code'], submission['test_cases'], submission['stdin'],
+                                            profile=profile, compare=compare)
+                row['outcome'] = outcome(result)
+            except Exception as e:
+                row.update(outcome='exception', error=f'{type(e).__name__}: {e}')
+            row['latency'] = time.perf_counter() - started
+            return row
+
+    results = [None] * len(submissions)
+    first_at = submissions[0]['at'] if submissions else 0.0
+    started = time.monotonic()
+    # Bound the backlog so arrival times stay meaningful when the judge falls behind
+    slots = threading.Semaphore(concurrency * 2)
+
+    def done(index, future):
+        try:
+            results[index] = future.result()
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='replay') as pool:
+        for index, submission in enumerate(submissions):
+            if speed > 0:
+                delay = (submission['at'] - first_at) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            future = pool.submit(judge, submission)
+            future.add_done_callback(lambda f, i=index: done(i, f))
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compare replay results with a baseline {n: {outcome, latency}}. Returns the report dict.
+    """
+    diffs = []
+    ours, theirs = [], []
+    for row in results:
+        base = baseline.get(row['n'])
+        if base is None:
+            continue
+        ours.append(row['latency'])
+        theirs.append(base['latency'])
+        if base['outcome'] != row['outcome']:
+            diffs.append({'n': row['n'], 'level': row['level'], 'baseline': base['outcome'], 'replay': row['outcome']})
+
+    def summary(samples):
+        return {'p50': percentile(samples, 50), 'p95': percentile(samples, 95), 'p99': percentile(samples, 99),
+                'mean': sum(samples) / len(samples) if samples else None}
+
+    exceptions = [{'n': row['n'], 'level': row['level'], 'error': row.get('error')}
+                  for row in results if row['outcome'] == 'exception']
+    return {'compared': len(ours), 'verdict_diffs': diffs, 'exceptions': exceptions,
+            'latency': {'baseline': summary(theirs), 'replay': summary(ours)}}
+
+
+def _fmt(seconds):
+    return '     -' if seconds is None else f'{seconds * 1000:6.0f}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged submissions through the judge and compare the results.")
+    parser.add_argument("log", help="Submission log (SUBMISSION_LOG) to replay")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Arrival-time scale: 1 = as logged, 10 = ten times faster, 0 = no delays (default)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Submissions judged at once (default 1)")
+    parser.add_argument("--profile", choices=('verify', 'tiered', 'interactive'), default='verify',
+                        help="Compile profile: verify (how the site judges by default), tiered (with the "
+                             "JUDGE_TIERED_PROFILES -O0 pre-pass) or interactive")
+    parser.add_argument("--levels", help="Comma-separated levels to replay (default: all)")
+    parser.add_argument("--limit", type=int, help="Replay at most this many submissions")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with an earlier replay's --json output instead of the log")
+    parser.add_argument("--compile-cache", action="store_true", help="Keep the compile cache on")
+    parser.add_argument("--json", metavar="PATH", help="Write the per-submission results and report as JSON to PATH")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero when any verdict differs")
+    args = parser.parse_args(argv)
+
+    levels = {int(level) for level in args.levels.split(',') if level.strip()} if args.levels else None
+    submissions, skipped = load_submissions(args.log, levels, args.limit)
+    if not submissions:
+        print(f'nothing to replay in {args.log} ({skipped} submission(s) without source or test cases)', file=sys.stderr)
+        return 1
+
+    # Replays must not queue behind admission control, claim variants, hit the rate limit or log
+    # themselves, and the app they start (migrations, catalog sync) gets a scratch database
+    db_path = os.path.join(tempfile.mkdtemp(prefix='zombie-replay-'), 'replay.db')
+    overrides = {'ADMISSION_DIR': None, 'VARIANTS_ENABLED': False, 'RATE_LIMIT_DB': None, 'SUBMISSION_LOG': None,
+                 'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path, 'LEADERBOARD_STAMP': db_path + '.stamp'}
+    if not args.compile_cache:
+        overrides['COMPILE_CACHE_DIR'] = None
+    app = create_app(overrides)
+    pch.wait(timeout=120)
+
+    started = time.perf_counter()
+    results = replay(app, submissions, speed=args.speed, concurrency=args.concurrency, profile=args.profile)
+    elapsed = time.perf_counter() - started
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = {row['n']: row for row in json.load(f)['results']}
+        against = args.baseline
+    else:
+        baseline = {s['n']: {'outcome': s['outcome'], 'latency': s['latency']} for s in submissions}
+        against = 'the log'
+    report = compare(results, baseline)
+
+    latency = report['latency']
+    print(f'{len(results)} submission(s) replayed in {elapsed:.1f}s (concurrency {args.concurrency}, '
+          f'speed {args.speed or "max"}), {skipped} skipped; compared with {against}')
+    print('latency ms      p50    p95    p99')
+    for name in ('baseline', 'replay'):
+        row = latency[name]
+        print(f'  {name:<10} {_fmt(row["p50"])} {_fmt(row["p95"])} {_fmt(row["p99"])}')
+    diffs = report['verdict_diffs']
+    print(f'{report["compared"] - len(diffs)}/{report["compared"]} verdict(s) agree')
+    for diff in diffs[:20]:
+        print(f'  #{diff["n"]} level {diff["level"]}: {diff["baseline"]} -> {diff["replay"]}')
+    if len(diffs) > 20:
+        print(f'  ... and {len(diffs) - 20} more')
+    exceptions = report['exceptions']
+    if exceptions:
+        print(f'{len(exceptions)} submission(s) raised in the judge')
+        for row in exceptions[:5]:
+            print(f'  #{row["n"]} level {row["level"]}: {row["error"]}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'log': args.log, 'profile': args.profile, 'concurrency': args.concurrency, 'speed': args.speed,
+                       'elapsed_seconds': elapsed, 'report': report, 'results': results}, f, indent=2)
+    return 1 if args.strict and diffs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# zombie_code_survival/result_store.py
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+TRUNCATION_NOTE = "\n... [output truncated]"
+
+
+class ResultStore:
+    """
+    Server-side store for execution results, backed by the Submission table.
+
+    The session only carries the id of the survivor's last run, so noisy programs and long
+    compiler errors never end up in the cookie. Stored stdout/stderr are capped at
+    RESULT_MAX_CHARS each, and rows older than RESULT_TTL seconds are deleted, at most once
+    per RESULT_EVICT_INTERVAL per worker, whenever a new result is saved.
+    """
+
+    def __init__(self, app=None):
+        self.max_chars = 64 * 1024
+        self.ttl = 3600
+        self.evict_interval = 60
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_chars = int(app.config.get('RESULT_MAX_CHARS') or self.max_chars)
+        self.ttl = int(app.config.get('RESULT_TTL') or self.ttl)
+        self.evict_interval = int(app.config.get('RESULT_EVICT_INTERVAL') or self.evict_interval)
+        app.extensions['result_store'] = self
+
+    def cap(self, text):
+        text = text or ''
+        if len(text) <= self.max_chars:
+            return text
+        return text[:self.max_chars] + TRUNCATION_NOTE
+
+    def fill(self, submission, result, verdict):
+        """
+        Copy a run_test_cases result and its verdict onto a Submission, applying the size caps.
+        """
+        submission.status = 'done'
+        submission.phase = result.get('phase')
+        submission.success = result.get('success')
+        submission.stdout = self.cap(result.get('stdout'))
+        submission.stderr = self.cap(result.get('stderr'))
+        submission.category = verdict['category']
+        submission.message = verdict['message']
+        submission.finished = verdict['finished']
+        submission.finished_at = datetime.utcnow()
+
+    def save(self, survivor_id, level, result, verdict):
+        """
+        Store the result of a synchronous run and return its id.
+        """
+        from .extensions import db, persistence
+        from .models import Submission
+
+        submission = Submission(id=uuid.uuid4().hex, survivor_id=survivor_id, level=level)
+        self.fill(submission, result, verdict)
+        persistence.transaction(lambda: db.session.add(submission))
+        self.evict_expired()
+        return submission.id
+
+    def get(self, result_id, survivor_id):
+        from .models import Submission
+
+        if not result_id:
+            return None
+        return Submission.query.filter_by(id=result_id, survivor_id=survivor_id).first()
+
+    def evict_expired(self, force=False):
+        """
+        Delete expired results. Best effort: when the database stays locked the eviction is
+        skipped and runs again on the next save, so a stored result never turns into an error.
+        Returns the number of rows deleted.
+        """
+        from .extensions import persistence
+        from .models import Submission
+
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_evict < self.evict_interval:
+                return 0
+            self._last_evict = now
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        try:
+            return persistence.transaction(lambda: (Submission.query
+                                                    .filter(Submission.created_at < cutoff,
+                                                            Submission.status.in_(('done', 'error')))
+                                                    .delete(synchronize_session=False)))
+        except OperationalError as e:
+            with self._lock:
+                self._last_evict = 0.0
+            current_app.logger.warning('expired results not evicted: %s', e)
+            return 0
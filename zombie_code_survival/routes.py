@@ -1,91 +1,32 @@
 # zombie_code_survival/routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from datetime import datetime
-import os
-import tempfile
-import subprocess
-import sys
-from .extensions import db
-from .models import Survivor, Challenge
-from .debug_generator import DebugGenerator
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session, jsonify, Response
+import math
+import time
+from werkzeug.http import is_resource_modified
+from .extensions import db, pch, judge_pool, admission, leaderboard_cache, result_store, metrics, persistence, variant_pool, rate_limiter, submission_log, workspace_pool
+from .models import Survivor, CatalogChallenge, Submission, LeaderboardEntry, LevelStats
+from .judge import judge_submission, grade_submission
+from .admission import AdmissionRejected
 
 main = Blueprint('main', __name__)
-debug_gen = DebugGenerator()
 
-# Detect platform: resource is POSIX-only
-POSIX = True
-try:
-    import resource
-except Exception:
-    POSIX = False
-
-# Resource-limiting function only available/used on POSIX systems
-def _limit_resources():
-    """
-    This function will be used as preexec_fn on POSIX systems to limit CPU/memory for executed binaries.
-    On Windows this will not be used.
+@main.app_errorhandler(AdmissionRejected)
+def judge_overloaded(e):
     """
-    if not POSIX:
-        return
-    # CPU time (seconds)
-    resource.setrlimit(resource.RLIMIT_CPU, (2, 2))
-    # Address space limit (200 MB)
-    resource.setrlimit(resource.RLIMIT_AS, (200 * 1024 * 1024, 200 * 1024 * 1024))
-    # Limit number of processes spawned by the child
-    try:
-        resource.setrlimit(resource.RLIMIT_NPROC, (20, 20))
-    except Exception:
-        # Some systems may restrict RLIMIT_NPROC; ignore if not available
-        pass
-    # Limit file size the child can create (10MB)
-    try:
-        resource.setrlimit(resource.RLIMIT_FSIZE, (10 * 1024 * 1024, 10 * 1024 * 1024))
-    except Exception:
-        pass
-
-def compile_and_run_cpp(code_str, stdin_data=None, compile_timeout=5, run_timeout=2):
+    Shed load fast when the judge is saturated instead of letting compiles time out.
+    API callers get a 503 with Retry-After; a form post is sent back to its page with the
+    message flashed, like any other form error (Retry-After still marks the redirect as shed).
     """
-    Compile provided C++ code using g++ and run the produced binary.
-    On POSIX systems this uses preexec_fn=_limit_resources to limit child resources.
-    On Windows, preexec_fn isn't used (not supported) and resource limits are not enforced here.
-    Returns a dict: { success: bool, phase: 'compile'|'run', stdout: str, stderr: str }
-    """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        cpp_path = os.path.join(tmpdir, "submission.cpp")
-        exe_path = os.path.join(tmpdir, "submission")
-        if sys.platform.startswith("win"):
-            # On Windows provide .exe extension for binary name
-            exe_path = os.path.join(tmpdir, "submission.exe")
-
-        with open(cpp_path, "w", encoding="utf-8") as f:
-            f.write(code_str)
-
-        # Compile
-        compile_cmd = ["g++", "-std=c++17", cpp_path, "-O2", "-o", exe_path]
-        try:
-            comp = subprocess.run(compile_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=compile_timeout, text=True)
-            if comp.returncode != 0:
-                return {'success': False, 'phase': 'compile', 'stdout': comp.stdout or "", 'stderr': comp.stderr or ""}
-        except subprocess.TimeoutExpired:
-            return {'success': False, 'phase': 'compile', 'stdout': '', 'stderr': 'Compilation timed out.'}
-        except FileNotFoundError as e:
-            # g++ not installed or not in PATH
-            return {'success': False, 'phase': 'compile', 'stdout': '', 'stderr': f'g++ not found: {e}'}
-
-        # Run the executable
-        try:
-            if POSIX:
-                run_proc = subprocess.run([exe_path], input=(stdin_data or ""), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=run_timeout, text=True, preexec_fn=_limit_resources)
-            else:
-                # Windows: preexec_fn not available; don't pass it.
-                run_proc = subprocess.run([exe_path], input=(stdin_data or ""), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=run_timeout, text=True)
-            return {'success': run_proc.returncode == 0, 'phase': 'run', 'stdout': run_proc.stdout or "", 'stderr': run_proc.stderr or ""}
-        except subprocess.TimeoutExpired:
-            return {'success': False, 'phase': 'run', 'stdout': '', 'stderr': 'Execution timed out.'}
-        except FileNotFoundError as e:
-            return {'success': False, 'phase': 'run', 'stdout': '', 'stderr': f'Executable not found or permission error: {e}'}
-        except Exception as e:
-            return {'success': False, 'phase': 'run', 'stdout': '', 'stderr': f'Execution failed: {e}'}
+    message = f'{e.reason} Please retry in {e.retry_after} seconds.'
+    if request.accept_mimetypes.best == 'application/json' or request.path.endswith('/submissions'):
+        response = jsonify({'error': message})
+        response.status_code = 503
+    else:
+        flash(message, 'info')
+        level = (request.view_args or {}).get('level')
+        response = redirect(url_for('main.challenge', level=level) if level is not None else url_for('main.level_select'))
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 @main.route('/', methods=['GET', 'POST'])
 def entry():
@@ -103,24 +44,16 @@ def entry():
                 flash('This survivor has already completed the mission.', 'info')
                 return render_template('entry.html')
 
+        # Challenges come from the shared catalog; progress rows are written as levels are solved
         survivor = Survivor(username=username)
-        db.session.add(survivor)
-        db.session.commit()
-
-        # Seed C++ challenges
-        challenges_data = debug_gen.generate_all_challenges()
-        for level, data in challenges_data.items():
-            challenge = Challenge(
-                level=level,
-                title=data.title,
-                buggy_code=data.buggy_code,
-                solution=data.solution,
-                error_type=data.error_type,
-                expected_output=str(data.expected_output),
-                survivor_id=survivor.id
-            )
-            db.session.add(challenge)
-        db.session.commit()
+
+        def register():
+            db.session.add(survivor)
+            db.session.flush()
+            # Hand out this survivor's pre-built variant of each level, if the pool has one
+            variant_pool.assign(survivor)
+
+        persistence.transaction(register)
         session['survivor_id'] = survivor.id
         return redirect(url_for('main.briefing'))
 
@@ -142,9 +75,8 @@ def level_select():
         session.pop('survivor_id', None)
         flash('Session expired. Please log in again.', 'info')
         return redirect(url_for('main.entry'))
-    challenges = Challenge.query.filter_by(survivor_id=survivor.id).order_by(Challenge.level).all()
-    solved_count = Challenge.query.filter_by(survivor_id=survivor.id, is_solved=True).count()
-    return render_template('level_select.html', challenges=challenges, solved_count=solved_count, survivor=survivor)
+    challenges = survivor.get_progress_summary()
+    return render_template('level_select.html', challenges=challenges, solved_count=survivor.solved_count, survivor=survivor)
 
 @main.route('/challenge/<int:level>', methods=['GET', 'POST'])
 def challenge(level):
@@ -155,54 +87,88 @@ def challenge(level):
         session.pop('survivor_id', None)
         flash('Session expired. Please log in again.', 'info')
         return redirect(url_for('main.entry'))
-    challenge = Challenge.query.filter_by(survivor_id=survivor.id, level=level).first()
+    challenge = survivor.get_progress(level)
     if not challenge:
         flash('Invalid challenge level', 'info')
         return redirect(url_for('main.level_select'))
 
     if request.method == 'POST':
+        wait = rate_limiter.take()
+        if wait:
+            flash(f'Easy, survivor: the compiler is still cooling down. Try again in {rate_limiter.describe(wait)}.', 'info')
+            return redirect(url_for('main.challenge', level=level))
+
         user_code = request.form.get('code', '')
         stdin_data = request.form.get('stdin', '')
 
-        # Compile & run C++ code
-        result = compile_and_run_cpp(user_code, stdin_data=stdin_data)
-
-        # Save last outputs to session for display
-        session['last_run_phase'] = result.get('phase')
-        session['last_run_stdout'] = result.get('stdout', '')
-        session['last_run_stderr'] = result.get('stderr', '')
-
-        if result['phase'] == 'compile' and not result['success']:
-            flash('Compilation error. See compiler output below.', 'incorrect')
-        elif result['phase'] == 'run' and not result['success']:
-            flash('Runtime error or non-zero exit. See stderr below.', 'incorrect')
-        else:
-            # Successful run, compare output to expected_output (exact match after strip)
-            expected = (challenge.expected_output or "").strip()
-            got = (result.get('stdout') or "").strip()
-            if expected and got == expected:
-                challenge.is_solved = True
-                challenge.end_time = datetime.utcnow()
-                db.session.commit()
-
-                unsolved = Challenge.query.filter_by(survivor_id=survivor.id, is_solved=False).count()
-                if unsolved == 0:
-                    survivor.end_time = datetime.utcnow()
-                    db.session.commit()
-                    flash('All systems restored! The cure has been synthesized!', 'correct')
-                    return redirect(url_for('main.finished'))
-                else:
-                    flash('Correct! Level solved.', 'correct')
-            else:
-                if expected:
-                    flash(f'Output mismatch. Expected: \"{expected}\", Got: \"{got}\"', 'incorrect')
-                else:
-                    flash('Run completed. No expected output configured for this level.', 'info')
+        # Compile once & run C++ code against the level's test cases (plus the player's own stdin)
+        started = time.perf_counter()
+        result = judge_submission(user_code, challenge.test_cases, custom_stdin=stdin_data, compare=challenge.compare)
+        latency = time.perf_counter() - started
+
+        verdict = grade_submission(survivor, challenge, result)
+        submission_log.record(level, user_code, stdin_data, challenge.test_cases, result, verdict, latency,
+                              compare=challenge.compare)
+
+        # Keep the outputs server-side; the session only remembers which run to display
+        for legacy_key in ('last_run_phase', 'last_run_stdout', 'last_run_stderr'):
+            session.pop(legacy_key, None)
+        session['last_run_id'] = result_store.save(survivor.id, level, result, verdict)
+        flash(verdict['message'], verdict['category'])
+        if verdict['finished']:
+            return redirect(url_for('main.finished'))
 
         return redirect(url_for('main.challenge', level=level))
 
-    all_challenges = Challenge.query.filter_by(survivor_id=survivor.id).order_by(Challenge.level).all()
-    return render_template('challenge.html', challenge=challenge, all_challenges=all_challenges, survivor=survivor)
+    all_challenges = survivor.get_progress_summary()
+    last_run = result_store.get(session.get('last_run_id'), survivor.id)
+    return render_template('challenge.html', challenge=challenge, all_challenges=all_challenges, survivor=survivor,
+                           last_run=last_run)
+
+@main.route('/challenge/<int:level>/submissions', methods=['POST'])
+def submit_challenge(level):
+    """
+    Asynchronous counterpart of the challenge POST: enqueue the code for the judge pool
+    and return the submission id at once (202). The page then polls submission_status
+    for the verdict; each poll is one short query, so no request thread waits on the judge.
+    """
+    if 'survivor_id' not in session:
+        return jsonify({'error': 'Not logged in.'}), 401
+    if db.session.get(CatalogChallenge, level) is None:
+        return jsonify({'error': 'Invalid challenge level'}), 404
+    wait = rate_limiter.take()
+    if wait:
+        response = jsonify({'error': f'Easy, survivor: the compiler is still cooling down. Try again in {rate_limiter.describe(wait)}.',
+                            'retry_after': wait})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(wait))
+        return response
+
+    submission_id = judge_pool.submit(session['survivor_id'], level,
+                                      request.form.get('code', ''), request.form.get('stdin', ''))
+    session['last_run_id'] = submission_id
+    return jsonify({
+        'id': submission_id,
+        'status_url': url_for('main.submission_status', submission_id=submission_id),
+    }), 202
+
+def _get_own_submission(submission_id):
+    if 'survivor_id' not in session:
+        return None
+    return Submission.query.filter_by(id=submission_id, survivor_id=session['survivor_id']).first()
+
+def _submission_payload(submission):
+    payload = submission.to_dict()
+    if submission.finished:
+        payload['redirect_url'] = url_for('main.finished')
+    return payload
+
+@main.route('/submissions/<submission_id>')
+def submission_status(submission_id):
+    submission = _get_own_submission(submission_id)
+    if submission is None:
+        return jsonify({'error': 'Unknown submission'}), 404
+    return jsonify(_submission_payload(submission))
 
 @main.route('/finished')
 def finished():
@@ -225,19 +191,78 @@ def logout():
 
 @main.route('/leaderboard')
 def leaderboard():
-    # Simple leaderboard: survivors who finished sorted by completion time
-    survivors = Survivor.query.filter(Survivor.end_time.isnot(None)).all()
-    # compute completion seconds and sort
-    def comp_time(s):
-        delta = s.end_time - s.start_time
-        return delta.total_seconds()
-    survivors = sorted(survivors, key=comp_time)
-    # Build helper structure like before
-    survivors_data = []
-    for s in survivors:
-        level_times = {}
-        for c in s.challenges.order_by(Challenge.level).all():
-            if c.end_time and c.start_time:
-                level_times[c.level] = int((c.end_time - c.start_time).total_seconds())
-        survivors_data.append({'survivor': s, 'completion_time': s.get_completion_time(), 'level_times': level_times})
-    return render_template('leaderboard.html', survivors=survivors_data)
+    page = max(request.args.get('page', 1, type=int), 1)
+    # Pending flashes are rendered by base.html, so those responses can be neither cached nor 304'd
+    if session.get('_flashes'):
+        return _render_leaderboard(page)
+
+    version = leaderboard_cache.version()
+    key = (page, 'survivor_id' in session)
+    response = Response(status=200, mimetype='text/html')
+    response.set_etag(leaderboard_cache.etag(version, key))
+    response.last_modified = leaderboard_cache.last_modified(version)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    if not is_resource_modified(request.environ, etag=response.get_etag()[0], last_modified=response.last_modified):
+        return response.make_conditional(request)
+
+    html = leaderboard_cache.get(key, version)
+    if html is None:
+        html = _render_leaderboard(page)
+        leaderboard_cache.put(key, version, html)
+    response.set_data(html)
+    return response
+
+def _render_leaderboard(page):
+    # Survivors who finished, read pre-sorted from the materialized leaderboard one page at a time
+    per_page = current_app.config['LEADERBOARD_PAGE_SIZE']
+    offset = (page - 1) * per_page
+    entries = (LeaderboardEntry.query
+               .order_by(LeaderboardEntry.completion_seconds, LeaderboardEntry.survivor_id)
+               .offset(offset).limit(per_page + 1).all())
+    has_next = len(entries) > per_page
+    survivors_data = [
+        {'survivor': e, 'completion_time': e.get_completion_time(), 'level_times': e.level_times}
+        for e in entries[:per_page]
+    ]
+    return render_template('leaderboard.html', survivors=survivors_data, rank_offset=offset,
+                           page=page, has_next=has_next)
+
+@main.route('/analytics')
+def analytics():
+    """
+    Per-level attempts, solves, solve rate and solve-time quantiles for organizers, read from
+    the LevelStats rollup: one row per level, however many survivors there are. The solve rate
+    only counts attempts made before solving, and a solve is timed from the survivor's previous one.
+    """
+    rows = (db.session.query(LevelStats, CatalogChallenge.title)
+            .join(CatalogChallenge, CatalogChallenge.level == LevelStats.level)
+            .order_by(LevelStats.level)
+            .all())
+    levels = [dict(stats.to_dict(), title=title) for stats, title in rows]
+    # Hardest first: the lowest solve rate, then the slowest median solve
+    ranked = sorted((l for l in levels if l['attempts_before_solve']),
+                    key=lambda l: (l['solve_rate'], -(l['solve_seconds']['p50'] or 0)))
+    response = jsonify({
+        'levels': levels,
+        'hardest': [l['level'] for l in ranked[:5]],
+        'totals': {'attempts': sum(l['attempts'] for l in levels), 'solves': sum(l['solves'] for l in levels)},
+    })
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@main.route('/stats')
+def stats():
+    """
+    Judge statistics for this worker process, as JSON.
+    """
+    return jsonify({'pch': pch.stats(), 'admission': admission.stats(), 'judge_pool': judge_pool.stats(),
+                    'leaderboard_cache': leaderboard_cache.stats(), 'workspaces': workspace_pool.stats(),
+                    'rate_limit': rate_limiter.stats(), 'variants': variant_pool.stats()})
+
+@main.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text exposition for this worker process
+    if not metrics.enabled:
+        return Response('Metrics are disabled.', status=404, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,253 @@
+# zombie_code_survival/runner.py
+"""
+Sandbox runner daemon.
+
+Started as a plain script (python runner.py --socket PATH) so its memory image is just the
+standard library, never the Flask/SQLAlchemy web process. The web app sends one JSON job per
+connection over a Unix socket; each connection is handled in a forked, single-threaded child
+that launches the submission with rlimits applied, so preexec_fn is safe here and the fork
+cost does not grow with the web worker's RSS.
+
+With --once it runs a single job read from stdin instead, writing the reply to stdout: the web
+app spawns that (exec, no preexec_fn) when the daemon cannot be reached, so a threaded web
+worker never forks a copy of itself to launch a submission.
+
+Keep this module free of package imports (compare.py is the one standard-library-only
+sibling it loads): it must run standalone.
+"""
+import argparse
+import codecs
+import json
+import os
+import signal
+import socketserver
+import subprocess
+import sys
+import threading
+
+# A sibling module when this file runs as a script, part of the package otherwise
+try:
+    from .compare import make_comparator
+except ImportError:
+    from compare import make_comparator
+
+# Detect platform: resource is POSIX-only
+POSIX = True
+try:
+    import resource
+except Exception:
+    POSIX = False
+
+
+# Resource-limiting function only available/used on POSIX systems
+def limit_resources():
+    """
+    This function will be used as preexec_fn on POSIX systems to limit CPU/memory for executed binaries.
+    On Windows this will not be used.
+    """
+    if not POSIX:
+        return
+    # CPU time (seconds)
+    resource.setrlimit(resource.RLIMIT_CPU, (2, 2))
+    # Address space limit (200 MB)
+    resource.setrlimit(resource.RLIMIT_AS, (200 * 1024 * 1024, 200 * 1024 * 1024))
+    # Limit number of processes spawned by the child
+    try:
+        resource.setrlimit(resource.RLIMIT_NPROC, (20, 20))
+    except Exception:
+        # Some systems may restrict RLIMIT_NPROC; ignore if not available
+        pass
+    # Limit file size the child can create (10MB)
+    try:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (10 * 1024 * 1024, 10 * 1024 * 1024))
+    except Exception:
+        pass
+
+
+DEFAULT_MAX_OUTPUT = 64 * 1024
+
+
+def _kill(proc):
+    # The child leads its own session, so this also reaches anything it forked
+    try:
+        if POSIX:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def run_capped(argv, stdin_data, timeout, cwd=None, max_output=DEFAULT_MAX_OUTPUT, comparator=None):
+    """
+    Run argv, reading stdout and stderr incrementally and keeping at most max_output bytes of each.
+    The process is killed as soon as either stream goes over the cap (RLIMIT_FSIZE does not apply
+    to pipes) or the timeout expires, so a runaway printer never buffers more than the cap here.
+    With a comparator (see compare.py) stdout is also checked as it arrives, and the process is
+    killed as soon as it can no longer match.
+    Returns { returncode, stdout: bytes, stderr: bytes, timed_out: bool, output_limit_exceeded: bool,
+              diverged: bool, matched: bool|None (None without a comparator),
+              divergence: str|None (where stdout first differed, when it did not match) }.
+    """
+    proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=cwd, preexec_fn=limit_resources if POSIX else None, start_new_session=POSIX)
+    captured = {'stdout': bytearray(), 'stderr': bytearray()}
+    exceeded = threading.Event()
+    diverged = threading.Event()
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def pump(stream, buf, check=None):
+        try:
+            while True:
+                chunk = stream.read1(65536)
+                if not chunk:
+                    break
+                room = max_output - len(buf)
+                buf += chunk[:room]
+                if len(chunk) > room:
+                    exceeded.set()
+                    _kill(proc)
+                    break
+                if check is not None and not check.feed(decoder.decode(chunk)):
+                    diverged.set()
+                    _kill(proc)
+                    break
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+
+    def feed():
+        try:
+            proc.stdin.write(stdin_data)
+        except OSError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    threads = [threading.Thread(target=pump, args=(proc.stdout, captured['stdout'], comparator), daemon=True),
+               threading.Thread(target=pump, args=(proc.stderr, captured['stderr']), daemon=True),
+               threading.Thread(target=feed, daemon=True)]
+    for t in threads:
+        t.start()
+
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill(proc)
+        proc.wait()
+    for t in threads:
+        t.join(timeout=1)
+    matched = divergence = None
+    if comparator is not None:
+        matched = not diverged.is_set() and comparator.feed(decoder.decode(b'', final=True)) and comparator.finish()
+        if not matched:
+            divergence = comparator.divergence()
+    return {
+        'returncode': proc.returncode,
+        'stdout': bytes(captured['stdout']),
+        'stderr': bytes(captured['stderr']),
+        'timed_out': timed_out and not exceeded.is_set() and not diverged.is_set(),
+        'output_limit_exceeded': exceeded.is_set(),
+        'diverged': diverged.is_set(),
+        'matched': matched,
+        'divergence': divergence,
+    }
+
+
+def run_job(job):
+    """
+    Run one job: { argv: [str], stdin: str, timeout: float, cwd: str|None, max_output: int }
+    plus, to compare stdout while it streams, expected: str, compare: mode and tolerance: float.
+    Returns { returncode: int|None, stdout: str, stderr: str, timed_out: bool,
+              output_limit_exceeded: bool, diverged: bool, matched: bool|None, divergence: str|None,
+              error: str|None }.
+    """
+    reply = {'returncode': None, 'stdout': '', 'stderr': '', 'timed_out': False,
+             'output_limit_exceeded': False, 'diverged': False, 'matched': None, 'divergence': None,
+             'error': None}
+    try:
+        comparator = None
+        if job.get('expected') is not None:
+            comparator = make_comparator(job.get('compare'), job['expected'], job.get('tolerance'))
+        proc = run_capped(job['argv'], (job.get('stdin') or '').encode('utf-8'), job.get('timeout'),
+                          cwd=job.get('cwd'), max_output=int(job.get('max_output') or DEFAULT_MAX_OUTPUT),
+                          comparator=comparator)
+        reply['returncode'] = proc['returncode']
+        reply['stdout'] = proc['stdout'].decode('utf-8', 'replace')
+        reply['stderr'] = proc['stderr'].decode('utf-8', 'replace')
+        reply['timed_out'] = proc['timed_out']
+        reply['output_limit_exceeded'] = proc['output_limit_exceeded']
+        reply['diverged'] = proc['diverged']
+        reply['matched'] = proc['matched']
+        reply['divergence'] = proc['divergence']
+    except OSError as e:
+        reply['error'] = str(e)
+    return reply
+
+
+class RunHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.handle_stream(self.rfile, self.wfile)
+
+    @staticmethod
+    def handle_stream(rfile, wfile):
+        # One JSON job line in, one JSON reply line out
+        line = rfile.readline()
+        if not line:
+            return
+        try:
+            reply = run_job(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {'returncode': None, 'stdout': '', 'stderr': '', 'timed_out': False,
+                     'output_limit_exceeded': False, 'diverged': False, 'matched': None, 'divergence': None,
+                     'error': f'Bad job: {e}'}
+        wfile.write(json.dumps(reply).encode('utf-8') + b"\n")
+        wfile.flush()
+
+
+class RunnerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    # Let a restarted daemon replace a stale socket file
+    def server_bind(self):
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sandbox runner for submitted programs.")
+    parser.add_argument("--socket", help="Unix socket path to listen on")
+    parser.add_argument("--once", action="store_true",
+                        help="Run one job read from stdin, write the reply to stdout and exit")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1,
+                        help="Maximum number of jobs running at once")
+    args = parser.parse_args(argv)
+    if args.once:
+        RunHandler.handle_stream(sys.stdin.buffer, sys.stdout.buffer)
+        return 0
+    if not args.socket:
+        parser.error("--socket is required unless --once is given")
+
+    server = RunnerServer(args.socket, RunHandler)
+    server.max_children = args.max_jobs
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(args.socket)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
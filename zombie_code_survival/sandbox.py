@@ -0,0 +1,144 @@
+# zombie_code_survival/sandbox.py
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# fcntl is POSIX-only; it only guards against two workers starting the daemon at once
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runner.py")
+
+
+class SandboxRunner:
+    """
+    Client for the runner daemon (runner.py) that launches submitted programs.
+
+    The daemon is pre-started from init_app when RUNNER_AUTOSTART is set (and restarted on demand
+    if it dies). run() returns None whenever the daemon cannot be reached; callers then use
+    run_once(), which spawns a one-shot runner.py rather than forking the threaded web worker.
+    """
+
+    def __init__(self, app=None):
+        self.socket_path = None
+        self.autostart = False
+        self.max_jobs = 1
+        self.max_output = 64 * 1024
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.socket_path = app.config.get('RUNNER_SOCKET')
+        if self.socket_path is None:
+            # Not in the shared temp dir, where anyone could plant a socket or lock file first
+            os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+            self.socket_path = os.path.join(app.instance_path, 'runner.sock')
+        self.autostart = bool(app.config.get('RUNNER_AUTOSTART'))
+        self.max_jobs = int(app.config.get('RUNNER_MAX_JOBS') or os.cpu_count() or 1)
+        self.max_output = int(app.config.get('RUN_MAX_OUTPUT') or self.max_output)
+        if not self.socket_path or not hasattr(socket, 'AF_UNIX') or sys.platform.startswith("win"):
+            self.socket_path = None
+            return
+        app.extensions['sandbox_runner'] = self
+        if self.autostart:
+            self.ensure_started(wait=False)
+
+    @property
+    def enabled(self):
+        return self.socket_path is not None
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def is_running(self):
+        try:
+            self._connect(0.5).close()
+            return True
+        except OSError:
+            return False
+
+    def ensure_started(self, wait=True, timeout=3.0):
+        """
+        Start the daemon unless one is already listening. Returns True once it accepts connections.
+        """
+        if self.is_running():
+            return True
+        if not self.autostart:
+            return False
+        with self._lock:
+            lock_file = open(self.socket_path + ".lock", "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if not self.is_running():
+                    # No preexec_fn here, so this spawn does not fork a copy of the web worker
+                    subprocess.Popen([sys.executable, RUNNER_SCRIPT, "--socket", self.socket_path,
+                                      "--max-jobs", str(self.max_jobs)],
+                                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                     close_fds=True, start_new_session=True)
+                    if not wait:
+                        return False
+                    deadline = time.monotonic() + timeout
+                    while time.monotonic() < deadline:
+                        if self.is_running():
+                            return True
+                        time.sleep(0.05)
+                    return False
+                return True
+            finally:
+                lock_file.close()
+
+    def run(self, job):
+        """
+        Run a job (see runner.run_job) in the daemon with rlimits applied. Returns the daemon's
+        reply dict, or None if the daemon is unavailable.
+        """
+        if not self.enabled:
+            return None
+        timeout = job['timeout']
+        payload = json.dumps(job)
+        for attempt in range(2):
+            try:
+                # Allow for queueing behind max_jobs in the daemon on top of the run timeout
+                sock = self._connect(timeout + 10)
+            except OSError:
+                if attempt or not self.ensure_started():
+                    return None
+                continue
+            try:
+                sock.sendall(payload.encode('utf-8') + b"\n")
+                with sock.makefile("rb") as f:
+                    line = f.readline()
+                return json.loads(line) if line else None
+            except (OSError, ValueError):
+                return None
+            finally:
+                sock.close()
+        return None
+
+    def run_once(self, job):
+        """
+        Run a job in a freshly spawned runner.py --once. Returns its reply dict, or one with
+        error set when the helper itself fails.
+        """
+        try:
+            proc = subprocess.run([sys.executable, RUNNER_SCRIPT, "--once"], input=json.dumps(job).encode('utf-8') + b"\n",
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, close_fds=True,
+                                  timeout=job['timeout'] + 10)
+            return json.loads(proc.stdout)
+        except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+            return {'error': f'runner unavailable: {e}'}
@@ -0,0 +1,82 @@
+# zombie_code_survival/sketch.py
+import json
+import math
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch for positive durations, in the style of DDSketch.
+
+    Values are counted in logarithmic buckets, bucket i holding (gamma^(i-1), gamma^i] with
+    gamma = (1 + accuracy) / (1 - accuracy), so any quantile comes back within `accuracy`
+    relative error (2% by default) however many values were added. The size is bounded by the
+    range of the values, not their number: seconds to days is a few hundred buckets, and past
+    MAX_BUCKETS the lowest buckets are folded together. Values at or below MIN_VALUE are
+    counted in their own zero bucket.
+    """
+
+    MAX_BUCKETS = 512
+    MIN_VALUE = 1e-3
+
+    def __init__(self, accuracy=0.02):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        self.total += value
+        if value <= self.MIN_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.MAX_BUCKETS:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the two lowest buckets: precision is lost at the fast end, never the tail
+        low, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(low)
+
+    def quantile(self, q):
+        """
+        Estimated q-quantile (0 <= q <= 1), or None while empty.
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # The bucket's midpoint in relative terms, so the error is at most `accuracy` either way
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_json(self):
+        return json.dumps({'accuracy': self.accuracy, 'zero': self.zero_count, 'count': self.count,
+                           'total': self.total, 'buckets': self.buckets}, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, blob):
+        if not blob:
+            return cls()
+        data = json.loads(blob)
+        sketch = cls(data.get('accuracy', 0.02))
+        sketch.zero_count = data.get('zero', 0)
+        sketch.count = data.get('count', 0)
+        sketch.total = data.get('total', 0.0)
+        sketch.buckets = {int(index): n for index, n in data.get('buckets', {}).items()}
+        return sketch
@@ -0,0 +1,96 @@
+// Asynchronous submissions: enqueue the code, then poll the short status
+// endpoint for the verdict. Without this script the form posts synchronously
+// to the challenge view.
+document.addEventListener("DOMContentLoaded", function () {
+  const form = document.querySelector("form[data-submit-url]");
+  if (!form || !window.fetch) {
+    return;
+  }
+  const button = form.querySelector(".submit-btn");
+  const verdictBox = document.getElementById("judge-verdict");
+  const results = document.getElementById("run-results");
+
+  function showVerdict(category, message) {
+    const icon = category === "correct" ? "✓" : category === "incorrect" ? "✗" : "ℹ";
+    verdictBox.innerHTML = "";
+    const div = document.createElement("div");
+    div.className = "feedback " + category;
+    const span = document.createElement("span");
+    span.className = "feedback-icon";
+    span.textContent = icon;
+    div.appendChild(span);
+    div.appendChild(document.createTextNode(" " + message));
+    verdictBox.appendChild(div);
+  }
+
+  function finish(data) {
+    button.disabled = false;
+    if (data.redirect_url) {
+      window.location = data.redirect_url;
+      return;
+    }
+    if (data.phase) {
+      document.getElementById("run-phase").textContent = data.phase.toUpperCase();
+      document.getElementById("run-stdout").textContent = data.stdout;
+      document.getElementById("run-stderr").textContent = data.stderr;
+      results.hidden = false;
+    }
+    showVerdict(data.category || "info", data.message || "Judge finished.");
+    if (data.category === "correct") {
+      const btn = document.querySelector('.level-btn[data-level="' + data.level + '"]');
+      if (btn) {
+        btn.classList.add("solved");
+      }
+    }
+  }
+
+  function poll(statusUrl, delay) {
+    // Back off from 300 ms to 2 s between polls while the judge works
+    setTimeout(() => {
+      const next = Math.min(delay * 1.5, 2000);
+      fetch(statusUrl, { credentials: "same-origin" })
+        .then((r) => r.json())
+        .then((data) => {
+          if (data.status === "done" || data.status === "error") {
+            finish(data);
+          } else {
+            poll(statusUrl, next);
+          }
+        })
+        .catch(() => poll(statusUrl, next));
+    }, delay);
+  }
+
+  form.addEventListener("submit", function (e) {
+    e.preventDefault();
+    button.disabled = true;
+    showVerdict("info", "Queued for the judge...");
+    fetch(form.dataset.submitUrl, {
+      method: "POST",
+      body: new FormData(form),
+      credentials: "same-origin",
+    })
+      .then((r) => {
+        if (r.status === 429 || r.status === 503) {
+          // Rate limited or judge overloaded: say so here rather than re-posting the
+          // form, and keep the button off until the server's Retry-After has passed
+          const retryAfter = parseInt(r.headers.get("Retry-After"), 10) || 1;
+          return r.json().then((data) => {
+            showVerdict("info", data.error);
+            setTimeout(() => {
+              button.disabled = false;
+            }, retryAfter * 1000);
+          });
+        }
+        if (r.status !== 202) {
+          throw new Error("enqueue failed");
+        }
+        return r.json().then((job) => poll(job.status_url, 300));
+      })
+      .catch(() => {
+        // Fall back to the synchronous flash/redirect flow
+        form.removeAttribute("data-submit-url");
+        form.submit();
+      });
+  });
+});
@@ -0,0 +1,201 @@
+# zombie_code_survival/submission_log.py
+"""
+Append-only log of judged submissions, for replaying real traffic against judge changes
+(see replay.py).
+
+One JSON object per line. A submission record:
+
+    {"type": "submission", "at": <unix time>, "level": 3, "source_sha256": "...",
+     "source": "<base64 zlib of the source>", "stdin": "...", "stdin_truncated": false,
+     "cases": "<test case set id>", "compare": "exact", "tolerance": 1e-06,
+     "outcome": "pass" | "compile" | "mismatch" | ..., "category": "correct",
+     "phase": "run", "failed_case": 2, "timings": {...}, "latency": <seconds>,
+     "stdout_bytes": 12, "stderr_bytes": 0}
+
+compare and tolerance are the ones the submission was judged with, so a replay judges it the
+same way. The player's own stdin is ungraded and only kept up to SUBMISSION_LOG_MAX_STDIN
+characters.
+
+The test cases a submission was judged against are written once per process and file as a
+{"type": "cases", "id": ..., "cases": [[stdin, expected], ...]} record, and referenced by id,
+so survivors' variants replay against their own cases. With SUBMISSION_LOG_SOURCE=hash only
+the source hash is kept; such records are counted but cannot be replayed.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+from flask import current_app
+
+# fcntl is POSIX-only; elsewhere appends rely on O_APPEND alone
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def outcome(result):
+    """
+    Short verdict of a run_test_cases result: 'pass', 'compile' or the failed case's reason.
+    """
+    if result['phase'] == 'compile' and not result['success']:
+        return 'compile'
+    failed = result.get('failed_case')
+    return failed['reason'] if failed else 'pass'
+
+
+def cases_id(test_cases):
+    blob = json.dumps([list(case) for case in test_cases], separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_source(source):
+    return base64.b64encode(zlib.compress(source.encode('utf-8'), 9)).decode('ascii')
+
+
+def decode_source(blob):
+    return zlib.decompress(base64.b64decode(blob)).decode('utf-8')
+
+
+def read_log(path):
+    """
+    Yield the records of a log, skipping lines that do not parse (a torn last line).
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class SubmissionLog:
+    """
+    Appends every judged submission to the JSON-lines file at SUBMISSION_LOG (unset: off).
+
+    Each record is one write() to a file opened with O_APPEND under an exclusive flock, so
+    lines from several workers never interleave, and the file is reopened per record, so it
+    can be rotated (moved away) at any time. Once it would grow past max_bytes, the writer
+    holding the lock moves it to <path>.1 and starts a new file. Logging never fails a submission.
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        self.keep_source = True
+        self.compare = 'exact'
+        self.tolerance = None
+        self.max_bytes = 64 * 1024 * 1024
+        self.max_stdin = 4096
+        self._known_cases = set()
+        self._file = None
+        self._lock = threading.Lock()
+        self.written = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config.get('SUBMISSION_LOG') or None
+        self.keep_source = (app.config.get('SUBMISSION_LOG_SOURCE') or 'compressed') != 'hash'
+        self.compare = app.config.get('JUDGE_COMPARE') or 'exact'
+        self.tolerance = app.config.get('JUDGE_FLOAT_TOLERANCE')
+        self.max_bytes = int(app.config.get('SUBMISSION_LOG_MAX_BYTES') or self.max_bytes)
+        self.max_stdin = int(app.config.get('SUBMISSION_LOG_MAX_STDIN') or self.max_stdin)
+        if self.path is None:
+            return
+        self.path = os.path.join(app.instance_path, self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        app.extensions['submission_log'] = self
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def record(self, level, code, stdin, test_cases, result, verdict, latency, compare=None):
+        """
+        Log one judged submission; latency is the wall time from receiving it to its result and
+        compare the level's (mode, tolerance) as passed to the judge (None: the site defaults).
+        """
+        if not self.enabled:
+            return
+        failed = result.get('failed_case')
+        mode, tolerance = compare or (None, None)
+        stdin = stdin or ''
+        entry = {
+            'type': 'submission',
+            'at': round(time.time(), 3),
+            'level': level,
+            'source_sha256': hashlib.sha256((code or '').encode('utf-8')).hexdigest(),
+            'stdin': stdin[:self.max_stdin],
+            'stdin_truncated': len(stdin) > self.max_stdin,
+            'cases': cases_id(test_cases),
+            'compare': mode or self.compare,
+            'tolerance': tolerance if tolerance is not None else self.tolerance,
+            'outcome': outcome(result),
+            'category': verdict['category'],
+            'phase': result['phase'],
+            'failed_case': failed['index'] if failed else None,
+            'timings': result.get('timings'),
+            'latency': round(latency, 6),
+            'stdout_bytes': len((result.get('stdout') or '').encode('utf-8')),
+            'stderr_bytes': len((result.get('stderr') or '').encode('utf-8')),
+        }
+        if self.keep_source:
+            entry['source'] = encode_source(code or '')
+        try:
+            self._append(entry, test_cases)
+        except OSError as e:
+            current_app.logger.warning('submission log: %s', e)
+            return
+        self.written += 1
+
+    def _open_locked(self, size):
+        """
+        Open the log for appending under an exclusive flock, rotating it first when size more
+        bytes would take it past max_bytes. Returns the fd.
+        """
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                st = os.fstat(fd)
+                try:
+                    current = os.stat(self.path)
+                except FileNotFoundError:
+                    current = None
+                # Someone rotated it while we waited for the lock: append to the new file instead
+                if current is None or (current.st_dev, current.st_ino) != (st.st_dev, st.st_ino):
+                    os.close(fd)
+                    continue
+                if st.st_size and st.st_size + size > self.max_bytes:
+                    os.replace(self.path, self.path + '.1')
+                    os.close(fd)
+                    continue
+                return fd
+            except BaseException:
+                os.close(fd)
+                raise
+
+    def _append(self, entry, test_cases):
+        # Sized without the case set line, which only a new file needs
+        fd = self._open_locked(len(json.dumps(entry, separators=(',', ':'))) + 1)
+        try:
+            st = os.fstat(fd)
+            lines = [entry]
+            with self._lock:
+                # Case sets are written once per file: a rotated log starts over
+                if self._file != (st.st_dev, st.st_ino):
+                    self._file, self._known_cases = (st.st_dev, st.st_ino), set()
+                if entry['cases'] not in self._known_cases:
+                    self._known_cases.add(entry['cases'])
+                    lines.insert(0, {'type': 'cases', 'id': entry['cases'], 'cases': [list(case) for case in test_cases]})
+            data = ''.join(json.dumps(line, separators=(',', ':')) + '\n' for line in lines).encode('utf-8')
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
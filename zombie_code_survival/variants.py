@@ -0,0 +1,210 @@
+# zombie_code_survival/variants.py
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+
+from .debug_generator import ChallengeData, DebugGenerator
+from .runner import run_job
+
+# fcntl is POSIX-only; without it every worker keeps its own filler running
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def _lower_priority():
+    # Pool processes compete with the judge for CPU; let the judge win
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _build(source, tmpdir, name, compiler, flags, timeout):
+    with open(os.path.join(tmpdir, name + ".cpp"), "w", encoding="utf-8") as f:
+        f.write(source)
+    try:
+        proc = subprocess.run([compiler, *flags, name + ".cpp", "-o", name], cwd=tmpdir,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return os.path.join(tmpdir, name) if proc.returncode == 0 else None
+
+
+def _outputs(exe_path, tmpdir, stdins, timeout):
+    # Returns the stripped stdout per stdin, or None as soon as one run fails
+    outputs = []
+    for stdin in stdins:
+        reply = run_job({'argv': [exe_path], 'stdin': stdin, 'timeout': timeout, 'cwd': tmpdir})
+        if reply['error'] or reply['timed_out'] or reply['output_limit_exceeded'] or reply['returncode'] != 0:
+            return None
+        outputs.append(reply['stdout'].strip())
+    return outputs
+
+
+def _content_digest(base):
+    # Identifies a level's program and tests, whatever pack version they came from
+    return hashlib.sha256(json.dumps(base, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def build_variant(base, seed, compiler, flags, compile_timeout=10, run_timeout=2):
+    """
+    Generate the variant of base (a ChallengeData field dict) for seed and verify it: the
+    solution must compile and run cleanly on every stdin, and its real output becomes the
+    expected output. Runs in a pool process. Returns a dict with the variant's fields plus
+    buggy_passes (the buggy program also produces that output), or None if the solution fails.
+    """
+    data = DebugGenerator().generate_variant(ChallengeData(**base), seed)
+    stdins = [stdin for stdin, _ in data.test_cases]
+    tmpdir = tempfile.mkdtemp(prefix="zombie-variant-")
+    try:
+        solution_exe = _build(data.solution, tmpdir, "solution", compiler, flags, compile_timeout)
+        expected = _outputs(solution_exe, tmpdir, stdins, run_timeout) if solution_exe else None
+        if expected is None:
+            return None
+        buggy_exe = _build(data.buggy_code, tmpdir, "buggy", compiler, flags, compile_timeout)
+        buggy = _outputs(buggy_exe, tmpdir, stdins, run_timeout) if buggy_exe else None
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    fields = asdict(data)
+    fields['test_cases'] = [[stdin, out] for stdin, out in zip(stdins, expected)]
+    fields['expected_output'] = expected[0]
+    fields['buggy_passes'] = buggy == expected
+    return fields
+
+
+class VariantPool:
+    """
+    Keeps VARIANT_POOL_TARGET verified, unassigned variants of every level in the
+    challenge_variant table, so registration only has to claim rows.
+
+    One process per database runs the filler (a background thread holding a flock); it farms
+    build_variant out to VARIANT_WORKERS low-priority processes. A variant is kept when its
+    solution verifies and, unless the level's own buggy code already passes, its buggy code
+    still fails. Survivors registered while a level's pool is empty play the catalog version.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.target = 5
+        self.workers = 1
+        self.interval = 30.0
+        self.lock_path = None
+        self._base_buggy_passes = {}
+        self._thread = None
+        self.generated = 0
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = bool(app.config.get('VARIANTS_ENABLED'))
+        self.target = int(app.config.get('VARIANT_POOL_TARGET') or self.target)
+        self.workers = int(app.config.get('VARIANT_WORKERS') or self.workers)
+        self.interval = float(app.config.get('VARIANT_REFILL_INTERVAL') or self.interval)
+        db_key = hashlib.sha256(app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')).hexdigest()[:12]
+        self.lock_path = os.path.join(tempfile.gettempdir(), f'zombie-variants-{db_key}.lock')
+        app.extensions['variant_pool'] = self
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._fill_forever, name="variant-pool", daemon=True)
+            self._thread.start()
+
+    def assign(self, survivor):
+        """
+        Claim one ready variant per level for a new (flushed) survivor, in a single UPDATE.
+        Runs in the caller's transaction; the caller commits.
+        """
+        from sqlalchemy import func, select, update
+        from .extensions import db
+        from .models import ChallengeVariant
+
+        if not self.enabled:
+            return 0
+        oldest = (select(func.min(ChallengeVariant.id))
+                  .where(ChallengeVariant.survivor_id.is_(None))
+                  .group_by(ChallengeVariant.level))
+        result = db.session.execute(update(ChallengeVariant)
+                                    .where(ChallengeVariant.id.in_(oldest), ChallengeVariant.survivor_id.is_(None))
+                                    .values(survivor_id=survivor.id)
+                                    .execution_options(synchronize_session=False))
+        return result.rowcount
+
+    def _fill_forever(self):
+        lock_file = open(self.lock_path, "a")
+        if fcntl is not None:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    time.sleep(self.interval)
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"),
+                                       initializer=_lower_priority)
+        while True:
+            try:
+                self.refill(executor)
+            except Exception:
+                self.app.logger.exception('variant pool: refill failed')
+            time.sleep(self.interval)
+
+    def refill(self, executor):
+        """
+        Top every level up to the target once. Returns the number of variants added.
+        """
+        from sqlalchemy import func
+        from .extensions import db, challenge_pack, persistence
+        from .judge import COMPILER, COMPILE_FLAGS
+        from .models import ChallengeVariant
+
+        with self.app.app_context():
+            challenges = {level: asdict(data) for level, data in challenge_pack.challenges().items()}
+            ready = dict(db.session.query(ChallengeVariant.level, func.count(ChallengeVariant.id))
+                         .filter(ChallengeVariant.survivor_id.is_(None))
+                         .group_by(ChallengeVariant.level).all())
+            db.session.remove()
+
+        flags = list(COMPILE_FLAGS)
+        # Keyed by content, so a level changed by a pack reload is screened afresh
+        digests = {level: _content_digest(base) for level, base in challenges.items()}
+        known = {digest: self._base_buggy_passes[digest] for digest in digests.values()
+                 if digest in self._base_buggy_passes}
+        unknown = [level for level, digest in digests.items() if digest not in known]
+        for level, base in zip(unknown, executor.map(build_variant, [challenges[l] for l in unknown],
+                                                     [None] * len(unknown), [COMPILER] * len(unknown),
+                                                     [flags] * len(unknown))):
+            known[digests[level]] = base is None or base['buggy_passes']
+        self._base_buggy_passes = known
+
+        jobs = [(level, random.getrandbits(31)) for level in challenges
+                for _ in range(max(0, self.target - ready.get(level, 0)))]
+        futures = [(level, seed, executor.submit(build_variant, challenges[level], seed, COMPILER, flags))
+                   for level, seed in jobs]
+        rows = []
+        for level, seed, future in futures:
+            fields = future.result()
+            if fields is None or (fields['buggy_passes'] and not known.get(digests[level])):
+                self.rejected += 1
+                continue
+            rows.append(ChallengeVariant.from_fields(level, seed, fields))
+        if rows:
+            with self.app.app_context():
+                persistence.transaction(lambda: db.session.add_all(rows))
+                db.session.remove()
+            self.generated += len(rows)
+        return len(rows)
+
+    def stats(self):
+        return {'enabled': self.enabled, 'target': self.target, 'generated': self.generated,
+                'rejected': self.rejected}
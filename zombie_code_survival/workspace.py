@@ -0,0 +1,178 @@
+# zombie_code_survival/workspace.py
+import atexit
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+PREFIX = 'zombie-ws-'
+
+
+def _memory_backed(path):
+    # True when path sits on tmpfs/ramfs, going by the longest matching mount point
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    path = os.path.realpath(path)
+    best, fstype = '', None
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype in ('tmpfs', 'ramfs')
+
+
+def _usable(root):
+    # Binaries are executed straight from the workspace, so a noexec mount is no good
+    try:
+        if not os.path.isdir(root) or not os.access(root, os.W_OK | os.X_OK):
+            return False
+        return not (os.statvfs(root).f_flag & getattr(os, 'ST_NOEXEC', 0))
+    except OSError:
+        return False
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class WorkspacePool:
+    """
+    Reusable judge work directories, by default on RAM-backed /dev/shm, so writing the source,
+    the objects and the binary of every submission never touches the disk.
+
+    Each worker process pre-creates WORKSPACE_POOL_SIZE directories under WORKSPACE_ROOT at
+    startup (falling back to the system temp dir when that is missing, read-only or mounted
+    noexec). checkout() hands one out and empties it again on the way back; one that cannot be
+    emptied, or that turned into something other than a plain directory, is thrown away rather
+    than reused, and a workspace that picked up files while idle is emptied before it is handed
+    out again. Directories left behind by dead processes are removed at startup.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        self.base = None
+        self.memory_backed = False
+        self.size = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        root = app.config.get('WORKSPACE_ROOT') or tempfile.gettempdir()
+        if not _usable(root):
+            fallback = tempfile.gettempdir()
+            if root != fallback:
+                app.logger.warning('workspace pool: %s is not usable, falling back to %s', root, fallback)
+            root = fallback
+        self.size = int(app.config.get('WORKSPACE_POOL_SIZE') or os.cpu_count() or 1)
+        app.extensions['workspace_pool'] = self
+        if self.base is not None and self.root == root:
+            return
+        self.root = root
+        self.memory_backed = _memory_backed(root)
+        self._sweep()
+        self.base = tempfile.mkdtemp(prefix=f'{PREFIX}{os.getpid()}-', dir=root)
+        idle = [self._create() for _ in range(self.size)]
+        with self._lock:
+            self._idle = idle
+        atexit.register(shutil.rmtree, self.base, True)
+
+    def _sweep(self):
+        for entry in os.scandir(self.root):
+            if not entry.name.startswith(PREFIX):
+                continue
+            try:
+                pid = int(entry.name[len(PREFIX):].split('-', 1)[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _create(self):
+        path = tempfile.mkdtemp(prefix='job-', dir=self.base)
+        with self._lock:
+            self.created += 1
+        return path
+
+    @staticmethod
+    def _reset(path):
+        """
+        Empty a workspace. Returns False when it cannot be trusted for another job.
+        """
+        try:
+            st = os.lstat(path)
+            if not stat.S_ISDIR(st.st_mode) or (hasattr(os, 'getuid') and st.st_uid != os.getuid()):
+                return False
+            os.chmod(path, 0o700)
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+            with os.scandir(path) as entries:
+                return next(entries, None) is None
+        except OSError:
+            return False
+
+    def _discard(self, path):
+        with self._lock:
+            self.discarded += 1
+        shutil.rmtree(path, ignore_errors=True)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Yield (workspace_dir, exe_path) for one job; the directory is empty on entry.
+        """
+        # Only the pop happens under the pool lock; emptying the directory does not hold up other judges
+        path = None
+        while path is None:
+            with self._lock:
+                path = self._idle.pop() if self._idle else None
+            if path is None:
+                path = self._create()
+            elif self._reset(path):
+                with self._lock:
+                    self.reused += 1
+            else:
+                self._discard(path)
+                path = None
+        exe_path = os.path.join(path, "submission")
+        if sys.platform.startswith("win"):
+            # On Windows provide .exe extension for binary name
+            exe_path = os.path.join(path, "submission.exe")
+        try:
+            yield path, exe_path
+        finally:
+            if not self._reset(path):
+                self._discard(path)
+            else:
+                with self._lock:
+                    keep = len(self._idle) < self.size
+                    if keep:
+                        self._idle.append(path)
+                if not keep:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {'root': self.root, 'memory_backed': self.memory_backed, 'idle': idle, 'created': self.created,
+                'reused': self.reused, 'discarded': self.discarded}
@@ -0,0 +1,118 @@
+# zombie_code_survival/write_benchmark.py
+"""
+SQLite write-throughput benchmark for the registration and solve paths.
+
+    python -m zombie_code_survival.write_benchmark --processes 4 --survivors 25
+
+Several processes (standing in for Gunicorn workers) each register survivors and solve every
+level through grade_submission, the same transactions the challenge view runs, against a
+fresh database file. It runs twice: "before" with SQLite's defaults (rollback journal, no
+retries) and "after" with the WAL/busy-timeout/retry setup from persistence.py, and reports
+committed writes per second and the lock errors each run hit.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+MODES = {
+    # Rollback journal, Python sqlite3's default 5s lock wait, no retries
+    'before': {'SQLITE_WAL': False, 'SQLITE_BUSY_TIMEOUT_MS': 5000, 'DB_RETRY_ATTEMPTS': 1},
+    'after': {},
+}
+
+# Keep the benchmark to the database: no judge daemon, PCH build, metrics hooks or variant pool
+QUIET = {'PCH_ENABLED': False, 'RUNNER_AUTOSTART': False, 'METRICS_ENABLED': False, 'ADMISSION_DIR': None,
+         'VARIANTS_ENABLED': False}
+
+
+def _make_app(db_path, mode):
+    from . import create_app
+
+    config = dict(QUIET, SQLALCHEMY_DATABASE_URI='sqlite:///' + db_path,
+                  LEADERBOARD_STAMP=db_path + '.stamp')
+    config.update(MODES[mode])
+    return create_app(config)
+
+
+def _worker(db_path, mode, index, survivors, barrier, results):
+    from sqlalchemy.exc import OperationalError
+    from .extensions import db, persistence
+    from .judge import grade_submission
+    from .models import Survivor, CatalogChallenge
+
+    app = _make_app(db_path, mode)
+    passed = {'phase': 'run', 'success': True, 'failed_case': None}
+    writes = errors = 0
+    with app.app_context():
+        levels = [c.level for c in CatalogChallenge.query.order_by(CatalogChallenge.level)]
+        barrier.wait()
+        started = time.perf_counter()
+        for n in range(survivors):
+            survivor = Survivor(username=f'bench-{os.getpid()}-{index}-{n}')
+            try:
+                persistence.transaction(lambda: db.session.add(survivor))
+                writes += 1
+            except OperationalError:
+                errors += 1
+                continue
+            for level in levels:
+                try:
+                    grade_submission(survivor, survivor.get_progress(level), passed)
+                    writes += 1
+                except OperationalError:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+    results.put({'writes': writes, 'errors': errors, 'seconds': elapsed})
+
+
+def run_mode(mode, processes, survivors):
+    workdir = tempfile.mkdtemp(prefix='zombie-write-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    # Create the schema and catalog once, before the workers race for it
+    _make_app(db_path, mode)
+
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(db_path, mode, i, survivors, barrier, results))
+               for i in range(processes)]
+    for w in workers:
+        w.start()
+    rows = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+
+    writes = sum(r['writes'] for r in rows)
+    errors = sum(r['errors'] for r in rows)
+    seconds = max(r['seconds'] for r in rows)
+    return {'mode': mode, 'processes': processes, 'writes': writes, 'lock_errors': errors,
+            'seconds': seconds, 'writes_per_second': writes / seconds if seconds else None,
+            'database': db_path}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare SQLite write throughput before and after WAL tuning.")
+    parser.add_argument("--processes", type=int, default=4, help="Concurrent writer processes (default 4)")
+    parser.add_argument("--survivors", type=int, default=10,
+                        help="Survivors each process registers and takes through every level (default 10)")
+    parser.add_argument("--mode", choices=sorted(MODES), action="append",
+                        help="Run only this configuration (repeatable; default: both)")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    report = [run_mode(mode, args.processes, args.survivors) for mode in (args.mode or ['before', 'after'])]
+    for row in report:
+        print('{mode:<7} {processes} procs: {writes:6d} writes in {seconds:6.2f}s = {rate:8.1f}/s, {lock_errors} lock error(s)'
+              .format(rate=row['writes_per_second'] or 0.0, **row))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())